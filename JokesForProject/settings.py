@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -67,6 +68,7 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'jokes.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -119,6 +121,39 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared across workers so per-object invalidation reaches every process
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
+
+
+# Response compression (jokes.middleware.CompressionMiddleware): brotli when
+# the brotli package is installed, else gzip; smaller bodies are sent as-is
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+# Throttling (jokes.throttling): token buckets in Redis shared by all workers.
+# Tokens a request of each scope takes from the global anon/user budget
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL') or CACHES['default']['LOCATION']
+# Connect/read timeout in seconds; past it the request is let through
+THROTTLE_REDIS_TIMEOUT = float(os.getenv('THROTTLE_REDIS_TIMEOUT', '0.2'))
+THROTTLE_SCOPE_COSTS = {
+    'search': 3,
+    'random': 2,
+    'export': 20,
+    'lookups': 0,  # served from memory; bounded by their own scope budget
+}
+
+# Account deletion (jokes.accounts): batches wait while streaming replicas
+# lag more than this many seconds (0 disables the check)
+ACCOUNT_DELETION_MAX_REPLICATION_LAG = float(os.getenv('ACCOUNT_DELETION_MAX_REPLICATION_LAG', '5'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,6 +190,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# User-uploaded and generated files (share cards)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+
+# Hand media byte transfer to the front proxy: '', 'x-accel-redirect' (nginx)
+# or 'x-sendfile' (Apache/lighttpd). See deploy/nginx/jokesfor.conf
+SENDFILE_MODE = os.getenv('SENDFILE_MODE', '')
+SENDFILE_ACCEL_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -164,19 +208,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 # https://www.django-rest-framework.org/api-guide/settings/
 
+# MessagePack request/response bodies for mobile clients (Accept /
+# Content-Type: application/msgpack) when the msgpack package is installed
+MSGPACK_ENABLED = find_spec('msgpack') is not None
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'dj_rest_auth.jwt_auth.JWTCookieAuthentication',
+        'jokes.authentication.CachedJWTCookieAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'jokes.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(['jokes.renderers.MessagePackRenderer'] if MSGPACK_ENABLED else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *(['jokes.parsers.MessagePackParser'] if MSGPACK_ENABLED else []),
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'jokes.pagination.StandardPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'jokes.throttling.AnonRedisThrottle',
+        'jokes.throttling.UserRedisThrottle',
+        'jokes.throttling.ScopedRedisThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
         'user': '1000/hour',
+        # Per-scope budgets (views set throttle_scope)
+        'search': '300/hour',
+        'random': '300/hour',
+        'export': '10/hour',
+        'lookups': '2000/hour',
     },
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
@@ -21,7 +21,13 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
-from jokes.views import GoogleLogin, joke_share_page
+from jokes.views import (
+    GoogleLogin,
+    catalog_snapshot_file,
+    joke_share_card,
+    joke_share_page,
+    share_image_file,
+)
 
 urlpatterns = [
     # Admin
@@ -29,6 +35,13 @@ urlpatterns = [
 
     # Public share pages (before API routes)
     path('jokes/<int:pk>/share/', joke_share_page, name='joke-share'),
+    path('jokes/<int:pk>/card/<slug:size>.<slug:fmt>', joke_share_card, name='joke-share-card'),
+
+    # Share card files (MEDIA_URL + upload_to; proxy serves bytes in sendfile mode)
+    path('media/share-cards/<str:filename>', share_image_file, name='share-image'),
+
+    # Offline catalog bundles (range requests supported)
+    path('media/catalog-snapshots/<str:filename>', catalog_snapshot_file, name='catalog-snapshot-file'),
 
     # API v1
     path('api/v1/', include('jokes.urls')),
@@ -0,0 +1,206 @@
+"""
+Asynchronous account deletion.
+
+request_account_deletion() deactivates the user, blacklists their refresh
+tokens and records an AccountDeletion; the jokes.delete_account_data task
+then runs run_account_deletion(), which removes the user's rows table by
+table in bounded batches (one short transaction each) so a long history
+never becomes one multi-table delete holding locks.
+
+Between batches the task pauses, and waits while streaming replicas lag
+more than settings.ACCOUNT_DELETION_MAX_REPLICATION_LAG seconds. Each run
+stops after ACCOUNT_DELETION_TIME_BUDGET seconds and is re-queued, so
+one large account does not hold a worker.
+
+Deletions that stop making progress (a killed worker leaves them RUNNING,
+an error leaves them FAILED) are re-queued by
+retry_stalled_account_deletions(), run periodically; admins can also
+retry them by hand.
+"""
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    AccountDeletion,
+    Collection,
+    DailyJoke,
+    DataExport,
+    JokeRating,
+    SavedJoke,
+    ShareEvent,
+    UserPreference,
+)
+
+
+# Rows deleted (or updated) per batch
+ACCOUNT_DELETION_BATCH_SIZE = 1000
+
+# Seconds to pause between batches
+ACCOUNT_DELETION_BATCH_PAUSE = 0.05
+
+# Seconds of work per task run before it re-queues itself
+ACCOUNT_DELETION_TIME_BUDGET = 60
+
+# Unfinished deletions without progress for this long are re-queued
+ACCOUNT_DELETION_RETRY_AFTER = timedelta(minutes=15)
+
+# Failed runs after which only an admin retries a deletion
+ACCOUNT_DELETION_MAX_ATTEMPTS = 5
+
+# Steps in order: (progress key, model, delete rows or null their user)
+ACCOUNT_DELETION_STEPS = [
+    ('daily_jokes', DailyJoke, 'delete'),
+    ('ratings', JokeRating, 'delete'),
+    ('saved_jokes', SavedJoke, 'delete'),
+    ('collections', Collection, 'delete'),
+    ('share_events', ShareEvent, 'anonymize'),
+    ('preference', UserPreference, 'delete'),
+    ('data_exports', DataExport, 'delete'),
+]
+
+
+def request_account_deletion(user):
+    """
+    Deactivate a user and schedule removal of their data.
+
+    Returns the AccountDeletion. The task is queued after commit.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+    from .authentication import bump_auth_user_version
+    from .tasks import delete_account_data
+
+    with transaction.atomic():
+        get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+        BlacklistedToken.objects.bulk_create(
+            [
+                BlacklistedToken(token_id=token_id)
+                for token_id in OutstandingToken.objects.filter(user=user).values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        # update() and bulk_create() send no signals
+        bump_auth_user_version(user.pk)
+        deletion = AccountDeletion.objects.create(user_id=user.pk)
+        transaction.on_commit(lambda: delete_account_data.delay(deletion.pk))
+
+    return deletion
+
+
+def get_replication_lag():
+    """
+    Return the largest replay lag of streaming replicas in seconds.
+
+    0 without replicas; lag columns read as NULL (so 0) unless the
+    database role has pg_monitor.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(EXTRACT(EPOCH FROM MAX(replay_lag)), 0) FROM pg_stat_replication'
+        )
+        return float(cursor.fetchone()[0])
+
+
+def _throttle(deadline):
+    """Pause between batches; wait out replica lag until the deadline."""
+    time.sleep(ACCOUNT_DELETION_BATCH_PAUSE)
+    max_lag = settings.ACCOUNT_DELETION_MAX_REPLICATION_LAG
+    while max_lag and time.monotonic() < deadline and get_replication_lag() > max_lag:
+        time.sleep(1)
+
+
+def _process_batch(model, mode, user_id):
+    """Delete or anonymize one batch of a user's rows. Returns the row count."""
+    ids = list(
+        model.objects.filter(user_id=user_id).order_by('pk').values_list('pk', flat=True)[
+            :ACCOUNT_DELETION_BATCH_SIZE
+        ]
+    )
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        if mode == 'anonymize':
+            model.objects.filter(pk__in=ids).update(user=None)
+        else:
+            model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def run_account_deletion(deletion, time_budget=ACCOUNT_DELETION_TIME_BUDGET):
+    """
+    Continue an account deletion for up to time_budget seconds.
+
+    Progress is saved after every batch, so a run may stop (or crash) at
+    any point and the next one resumes. Returns True once the user is gone.
+    """
+    deadline = time.monotonic() + time_budget
+    if deletion.status != AccountDeletion.RUNNING:
+        deletion.status = AccountDeletion.RUNNING
+        deletion.started_at = deletion.started_at or timezone.now()
+        deletion.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    for key, model, mode in ACCOUNT_DELETION_STEPS:
+        while True:
+            if time.monotonic() >= deadline:
+                return False
+            processed = _process_batch(model, mode, deletion.user_id)
+            if not processed:
+                break
+            deletion.progress[key] = deletion.progress.get(key, 0) + processed
+            deletion.save(update_fields=['progress', 'updated_at'])
+            _throttle(deadline)
+
+    # Remaining rows (auth, allauth, tokens) are few; Django cascades them
+    get_user_model().objects.filter(pk=deletion.user_id).delete()
+
+    deletion.status = AccountDeletion.COMPLETED
+    deletion.finished_at = timezone.now()
+    deletion.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return True
+
+
+def retry_account_deletions(deletions):
+    """
+    Queue the unfinished deletions of a queryset again.
+
+    Deletion runs are idempotent, so a retry racing a run that was only
+    slow costs a duplicate batch query, not data. Returns the count.
+    """
+    from .tasks import delete_account_data
+
+    with transaction.atomic():
+        ids = list(
+            deletions.exclude(status=AccountDeletion.COMPLETED)
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)
+        )
+        AccountDeletion.objects.filter(pk__in=ids).update(
+            status=AccountDeletion.PENDING, updated_at=timezone.now()
+        )
+        for deletion_id in ids:
+            transaction.on_commit(partial(delete_account_data.delay, deletion_id))
+
+    return len(ids)
+
+
+def retry_stalled_account_deletions():
+    """
+    Re-queue deletions with no progress for ACCOUNT_DELETION_RETRY_AFTER.
+
+    Covers PENDING (task lost), RUNNING (worker killed mid-run) and FAILED
+    deletions that have not used up ACCOUNT_DELETION_MAX_ATTEMPTS.
+    Returns the count.
+    """
+    stalled = AccountDeletion.objects.filter(
+        Q(status__in=[AccountDeletion.PENDING, AccountDeletion.RUNNING])
+        | Q(status=AccountDeletion.FAILED, attempts__lt=ACCOUNT_DELETION_MAX_ATTEMPTS),
+        updated_at__lt=timezone.now() - ACCOUNT_DELETION_RETRY_AFTER,
+    )
+    return retry_account_deletions(stalled)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Joke, Format, AgeRating, Tone, ContextTag, Language, CultureTag, Source, UserPreference, Collection, SavedJoke, DailyJoke, JokeRating, ShareEvent
+from .accounts import retry_account_deletions
+from .models import Joke, Format, AgeRating, Tone, ContextTag, Language, CultureTag, Source, UserPreference, Collection, SavedJoke, DailyJoke, JokeRating, ShareEvent, CatalogSnapshot, AccountDeletion, DataExport
 
 
 @admin.register(Format)
@@ -72,10 +73,10 @@ class UserPreferenceAdmin(admin.ModelAdmin):
 
 @admin.register(Collection)
 class CollectionAdmin(admin.ModelAdmin):
-    list_display = ['name', 'user', 'is_default', 'created_at']
+    list_display = ['name', 'user', 'is_default', 'joke_count', 'created_at']
     list_filter = ['is_default', 'created_at']
     search_fields = ['name', 'user__email']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['joke_count', 'created_at', 'updated_at']
 
 
 @admin.register(SavedJoke)
@@ -123,3 +124,34 @@ class ShareEventAdmin(admin.ModelAdmin):
     def joke_preview(self, obj):
         return obj.joke.text[:50] + '...' if len(obj.joke.text) > 50 else obj.joke.text
     joke_preview.short_description = 'Joke'
+
+
+@admin.register(CatalogSnapshot)
+class CatalogSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['language', 'age_rating', 'joke_count', 'size', 'change_token', 'built_at']
+    list_filter = ['language', 'age_rating']
+    readonly_fields = ['language', 'age_rating', 'file_name', 'sha256', 'size', 'joke_count', 'change_token', 'built_at']
+
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ['user_id', 'status', 'attempts', 'requested_at', 'started_at', 'updated_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['=user_id']
+    readonly_fields = ['user_id', 'status', 'progress', 'error', 'attempts', 'requested_at', 'started_at', 'updated_at', 'finished_at']
+    actions = ['retry_deletions']
+
+    @admin.action(description='Retry selected deletions')
+    def retry_deletions(self, request, queryset):
+        """Queue unfinished deletions again (completed ones are skipped)."""
+        count = retry_account_deletions(queryset)
+        self.message_user(request, f'Queued {count} deletion(s) again.')
+
+
+@admin.register(DataExport)
+class DataExportAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'size', 'requested_at', 'finished_at', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['status', 'file_name', 'size', 'row_counts', 'error', 'requested_at', 'finished_at', 'expires_at']
@@ -0,0 +1,111 @@
+"""
+JWT cookie authentication with a short-lived cache of the user.
+
+JWTCookieAuthentication loads the User row on every authenticated request,
+and most endpoints then read request.user.preference with a second query.
+CachedJWTCookieAuthentication keeps the user - with the preference row
+attached - in the cache for AUTH_USER_CACHE_TIMEOUT seconds under
+auth_user:<id>:<version>.
+
+The per-user version is bumped (after commit) when the user or preference
+is saved or deleted, a refresh token is blacklisted (logout), the user
+logs out or the account is deactivated, so stale entries are never read
+again. The is_active and password-revocation checks still run on every
+request.
+"""
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_auth import SimpleJWTCookieScheme
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+AUTH_USER_CACHE_KEY = 'auth_user:{user_id}:{version}'
+AUTH_USER_VERSION_KEY = 'auth_user:{user_id}:version'
+
+# Seconds a cached user is served
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Outlives any cached entry, so an expired counter never revives one
+AUTH_USER_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def get_auth_user_version(user_id):
+    """Return the user's cache version."""
+    key = AUTH_USER_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=AUTH_USER_VERSION_TIMEOUT)
+        version = cache.get(key, 1)
+    return version
+
+
+def _incr_auth_user_version(user_id):
+    key = AUTH_USER_VERSION_KEY.format(user_id=user_id)
+    cache.add(key, 1, timeout=AUTH_USER_VERSION_TIMEOUT)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=AUTH_USER_VERSION_TIMEOUT)
+
+
+def bump_auth_user_version(user_id):
+    """
+    Invalidate the cached user once the current transaction commits.
+
+    Bumping before commit would let a concurrent request cache the old
+    row under the new version.
+    """
+    transaction.on_commit(lambda: _incr_auth_user_version(user_id))
+
+
+def cache_auth_user(user, version):
+    """Cache a user loaded under `version`, with its preference attached."""
+    from .models import UserPreference
+
+    try:
+        # Populates the relation cache, which is pickled with the user
+        user.preference
+    except UserPreference.DoesNotExist:
+        pass
+    cache.set(
+        AUTH_USER_CACHE_KEY.format(user_id=user.pk, version=version),
+        user,
+        timeout=AUTH_USER_CACHE_TIMEOUT,
+    )
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    """JWTCookieAuthentication serving users from the auth user cache."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        # Read before the database so a concurrent bump is not overwritten
+        version = get_auth_user_version(user_id)
+        user = cache.get(AUTH_USER_CACHE_KEY.format(user_id=user_id, version=version))
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_auth_user(user, version)
+            return user
+
+        # Same checks as JWTAuthentication.get_user()
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
+        return user
+
+
+class CachedJWTCookieScheme(SimpleJWTCookieScheme):
+    """OpenAPI security schemes for CachedJWTCookieAuthentication (same as the parent's)."""
+
+    target_class = 'jokes.authentication.CachedJWTCookieAuthentication'
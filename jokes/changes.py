@@ -0,0 +1,125 @@
+"""
+Joke change feed (delta sync for offline clients).
+
+Every joke create/update, tag edit, share card change and delete appends
+a JokeChange row in the same transaction. A sync reads only the entries
+after the client's token, so its cost is proportional to the changes, not
+the catalog.
+
+Row ids are allocated at insert, not at commit, so a slow transaction can
+commit a lower id after a higher one was already served. The token is
+therefore commit_seq: readers number committed entries in the order they
+become visible (sequence_joke_changes(), one numbering run at a time), so
+an entry that commits late is numbered after everything served before it.
+
+- record_joke_changes(): Append upsert/delete entries
+- sequence_joke_changes(): Number entries committed since the last run
+- get_joke_changes(): Read one page of the feed after a token
+- get_change_token(): The newest token clients can safely resume from
+- compact_change_log(): Drop entries superseded by a later one
+"""
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+
+from .models import JokeChange
+
+
+# Entries per feed page
+CHANGE_FEED_PAGE_SIZE = 500
+
+# Entries numbered per sequence_joke_changes() call
+CHANGE_FEED_SEQUENCE_BATCH = 10000
+
+# pg advisory lock key serializing numbering runs ('joke' in ASCII)
+CHANGE_FEED_LOCK_KEY = 0x6A6F6B65
+
+# Numbers unsequenced entries in id order; nextval follows the sorted subquery
+SEQUENCE_CHANGES_SQL = """
+UPDATE jokes_jokechange AS change
+SET commit_seq = numbered.seq
+FROM (
+    SELECT pending.id, nextval('jokes_jokechange_commit_seq') AS seq
+    FROM (
+        SELECT id FROM jokes_jokechange
+        WHERE commit_seq IS NULL
+        ORDER BY id
+        LIMIT %s
+    ) AS pending
+) AS numbered
+WHERE change.id = numbered.id
+"""
+
+
+def record_joke_changes(joke_ids, action=JokeChange.UPSERT):
+    """Append one change entry per joke id."""
+    JokeChange.objects.bulk_create(
+        [JokeChange(joke_id=joke_id, action=action) for joke_id in joke_ids]
+    )
+
+
+def sequence_joke_changes(limit=CHANGE_FEED_SEQUENCE_BATCH):
+    """
+    Give committed entries without a commit_seq the next numbers.
+
+    Only committed rows are visible to the UPDATE, and runs are serialized
+    by a transaction-level advisory lock, so each run numbers after every
+    entry a reader could already have seen. When another run holds the
+    lock this returns at once. Returns the number of entries numbered.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [CHANGE_FEED_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute(SEQUENCE_CHANGES_SQL, [limit])
+        return cursor.rowcount
+
+
+def get_change_token():
+    """
+    Return the newest commit_seq (0 for an empty log).
+
+    Numbered entries are committed, so data read after this call includes
+    every change up to the token and a snapshot tagged with it can be
+    continued from the change feed.
+    """
+    sequence_joke_changes()
+    return JokeChange.objects.aggregate(token=Max('commit_seq'))['token'] or 0
+
+
+def get_joke_changes(since, limit=CHANGE_FEED_PAGE_SIZE):
+    """
+    Return (upserted ids, deleted ids, next token, has_more) after `since`.
+
+    Entries are collapsed per joke to the latest action, so a joke that was
+    edited and then deleted within the page only appears as deleted.
+    """
+    sequence_joke_changes()
+    entries = list(
+        JokeChange.objects.filter(commit_seq__gt=since)
+        .order_by('commit_seq')
+        .values_list('commit_seq', 'joke_id', 'action')[:limit]
+    )
+
+    latest = {}
+    for _, joke_id, action in entries:
+        latest.pop(joke_id, None)
+        latest[joke_id] = action
+
+    upserted = [joke_id for joke_id, action in latest.items() if action == JokeChange.UPSERT]
+    deleted = [joke_id for joke_id, action in latest.items() if action == JokeChange.DELETE]
+    next_token = entries[-1][0] if entries else since
+    return upserted, deleted, next_token, len(entries) == limit
+
+
+def compact_change_log():
+    """
+    Delete entries superseded by a later entry for the same joke.
+
+    Safe for every client token: whoever would have read the older entry
+    reads the newer one instead. Returns the number of deleted entries.
+    """
+    newer = JokeChange.objects.filter(
+        joke_id=OuterRef('joke_id'), commit_seq__gt=OuterRef('commit_seq')
+    )
+    deleted, _ = JokeChange.objects.filter(commit_seq__isnull=False).filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,134 @@
+"""
+HTTP conditional requests and Cache-Control for read-only API endpoints.
+
+Validators come from cheap sources - version counters in the cache or
+updated_at columns - so a matching If-None-Match / If-Modified-Since is
+answered with 304 before the endpoint's query or serializer runs.
+
+- Catalog version: bumped (after commit) on any joke, joke tag or lookup change
+- ConditionalViewMixin: Viewset mixin evaluating validators per action
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    """Return the catalog version (bumped whenever public joke data changes)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def _incr_catalog_version():
+    cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 2, timeout=None)
+
+
+def bump_catalog_version():
+    """
+    Change the catalog version once the current transaction commits.
+
+    Bumping before commit would let a client fetch the old data under the
+    new validator and keep it indefinitely.
+    """
+    transaction.on_commit(_incr_catalog_version)
+
+
+def make_etag(*parts):
+    """Return a weak ETag over the given parts."""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+class NotModified(Exception):
+    """Raised from initial() to short-circuit the handler with a 304."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalViewMixin:
+    """
+    Viewset mixin adding ETag/Last-Modified and Cache-Control per action.
+
+    Viewsets override get_etag() and/or get_last_modified(); both run after
+    authentication, throttling and content negotiation but before the
+    handler, and must not run the endpoint's query. cache_control maps
+    action names to patch_cache_control() kwargs; cached responses also
+    get Vary: Accept, since JSON and MessagePack share a URL.
+
+    The browsable API is left alone: its HTML shows the signed-in user, so
+    it must not be revalidated or cached as a shared representation.
+    """
+
+    # Action name -> patch_cache_control kwargs (e.g. {'list': {'public': True, 'max_age': 60}})
+    cache_control = {}
+
+    def get_etag(self):
+        """Return the ETag for the current action, or None."""
+        return None
+
+    def get_last_modified(self):
+        """Return a datetime for the current action, or None."""
+        return None
+
+    def _is_cacheable_request(self, request):
+        renderer = getattr(request, 'accepted_renderer', None)
+        return request.method in ('GET', 'HEAD') and getattr(renderer, 'format', None) != 'api'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = (None, None)
+        if not self._is_cacheable_request(request):
+            return
+
+        etag = self.get_etag()
+        last_modified = self.get_last_modified()
+        self._validators = (etag, last_modified)
+        if etag is None and last_modified is None:
+            return
+
+        response = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None and response.status_code == status.HTTP_304_NOT_MODIFIED:
+            raise NotModified(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if not self._is_cacheable_request(request) or response.status_code not in (200, 304):
+            return response
+
+        etag, last_modified = getattr(self, '_validators', (None, None))
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+        cache_control = self.cache_control.get(getattr(self, 'action', None))
+        if cache_control:
+            patch_cache_control(response, **cache_control)
+            # The body (and ETag) depend on the negotiated renderer
+            patch_vary_headers(response, ['Accept'])
+        return response
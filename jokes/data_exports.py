@@ -0,0 +1,201 @@
+"""
+Personal data exports.
+
+build_data_export() writes a user's saved jokes, collections, ratings,
+daily joke history, shares, preferences and account details into a zip
+of NDJSON files (one object per line). Each file is streamed from a
+server-side cursor into its zip member, so memory stays bounded however
+large the account; the zip is built in a temporary file and then saved
+to storage. Runs in the jokes.export_user_data Celery task.
+
+request_data_export() queues at most one export per user at a time. A
+pending or running export gets DATA_EXPORT_TIMEOUT to finish (its
+expires_at until then); past it, the export is marked failed so the user
+can request a new one, and the record is purged like any expired export.
+"""
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Collection, DailyJoke, DataExport, JokeRating, SavedJoke, ShareEvent, UserPreference
+from .renderers import ORJSONRenderer
+
+
+# Storage directory for export zips
+DATA_EXPORT_DIR = 'data-exports'
+
+# How long a finished export stays downloadable
+DATA_EXPORT_RETENTION = timedelta(days=7)
+
+# How long a requested export may take before it counts as failed
+DATA_EXPORT_TIMEOUT = timedelta(hours=1)
+
+# Rows fetched per server-side cursor round trip
+DATA_EXPORT_CHUNK_SIZE = 2000
+
+
+def fail_timed_out_data_exports(exports):
+    """Mark pending/running exports past their deadline failed. Returns the count."""
+    return exports.filter(
+        status__in=DataExport.ACTIVE_STATUSES, expires_at__lte=timezone.now()
+    ).update(status=DataExport.FAILED, error='Timed out.')
+
+
+def request_data_export(user):
+    """
+    Queue a data export unless one is already in progress.
+
+    The one-active-export constraint settles concurrent requests. Returns
+    (export, created); the task is queued after commit.
+    """
+    from .tasks import export_user_data
+
+    exports = DataExport.objects.filter(user=user)
+    fail_timed_out_data_exports(exports)
+
+    export = exports.filter(status__in=DataExport.ACTIVE_STATUSES).first()
+    if export is not None:
+        return export, False
+
+    try:
+        with transaction.atomic():
+            export = DataExport.objects.create(
+                user=user, expires_at=timezone.now() + DATA_EXPORT_TIMEOUT
+            )
+            transaction.on_commit(lambda: export_user_data.delay(export.pk))
+    except IntegrityError:
+        # A concurrent request won; it may even have finished by now
+        return exports.order_by('-requested_at').first(), False
+
+    return export, True
+
+
+def get_export_sections(user):
+    """Return [(member name, values() queryset)] for one user's data."""
+    return [
+        ('saved_jokes.ndjson', SavedJoke.objects.filter(user=user).order_by('pk').values(
+            'id', 'joke_id', 'note', 'created_at',
+            joke_text=F('joke__text'),
+            collection_name=F('collection__name'),
+        )),
+        ('collections.ndjson', Collection.objects.filter(user=user).order_by('pk').values(
+            'id', 'name', 'description', 'is_default', 'joke_count', 'created_at', 'updated_at',
+        )),
+        ('ratings.ndjson', JokeRating.objects.filter(user=user).order_by('pk').values(
+            'joke_id', 'rating', 'created_at', 'updated_at',
+            joke_text=F('joke__text'),
+        )),
+        ('daily_jokes.ndjson', DailyJoke.objects.filter(user=user).order_by('pk').values(
+            'date', 'joke_id', 'delivered_at',
+            joke_text=F('joke__text'),
+        )),
+        ('shares.ndjson', ShareEvent.objects.filter(user=user).order_by('pk').values(
+            'joke_id', 'platform', 'created_at',
+        )),
+    ]
+
+
+def get_preference_record(user):
+    """Return the user's preferences with lookups as slugs (or None)."""
+    preference = UserPreference.objects.filter(user=user).select_related(
+        'preferred_age_rating', 'preferred_language'
+    ).prefetch_related('preferred_tones', 'preferred_contexts').first()
+    if preference is None:
+        return None
+    return {
+        'preferred_tones': [tone.slug for tone in preference.preferred_tones.all()],
+        'preferred_contexts': [tag.slug for tag in preference.preferred_contexts.all()],
+        'preferred_age_rating': getattr(preference.preferred_age_rating, 'slug', None),
+        'preferred_language': getattr(preference.preferred_language, 'code', None),
+        'notification_enabled': preference.notification_enabled,
+        'notification_time': preference.notification_time,
+        'onboarding_completed': preference.onboarding_completed,
+        'created_at': preference.created_at,
+        'updated_at': preference.updated_at,
+    }
+
+
+def write_ndjson_member(archive, name, records, renderer):
+    """Stream records into a new zip member as NDJSON. Returns the row count."""
+    count = 0
+    with archive.open(name, 'w', force_zip64=True) as member:
+        for record in records:
+            member.write(renderer.render(record) + b'\n')
+            count += 1
+    return count
+
+
+def build_data_export(export):
+    """
+    Build the zip for a DataExport and mark it completed.
+
+    An export that timed out (or was purged) meanwhile keeps its status
+    and the new file is discarded. Returns the updated DataExport.
+    """
+    user = export.user
+    renderer = ORJSONRenderer()
+    row_counts = {}
+
+    with tempfile.TemporaryDirectory(prefix='data-export-') as tmp_dir:
+        zip_path = os.path.join(tmp_dir, 'export.zip')
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            row_counts['account.ndjson'] = write_ndjson_member(archive, 'account.ndjson', [{
+                'id': user.pk,
+                'email': user.email,
+                'date_joined': user.date_joined,
+                'last_login': user.last_login,
+            }], renderer)
+
+            preference = get_preference_record(user)
+            row_counts['preferences.ndjson'] = write_ndjson_member(
+                archive, 'preferences.ndjson', [preference] if preference else [], renderer
+            )
+
+            for name, queryset in get_export_sections(user):
+                row_counts[name] = write_ndjson_member(
+                    archive, name, queryset.iterator(chunk_size=DATA_EXPORT_CHUNK_SIZE), renderer
+                )
+
+        with open(zip_path, 'rb') as f:
+            file_name = default_storage.save(
+                f'{DATA_EXPORT_DIR}/user-{user.pk}-export-{export.pk}.zip', File(f)
+            )
+        size = os.path.getsize(zip_path)
+
+    now = timezone.now()
+    completed = {
+        'status': DataExport.COMPLETED,
+        'file_name': file_name,
+        'size': size,
+        'row_counts': row_counts,
+        'finished_at': now,
+        'expires_at': now + DATA_EXPORT_RETENTION,
+    }
+    if not DataExport.objects.filter(pk=export.pk, status=DataExport.RUNNING).update(**completed):
+        default_storage.delete(file_name)
+        export.status = DataExport.FAILED
+        return export
+
+    for name, value in completed.items():
+        setattr(export, name, value)
+    return export
+
+
+def purge_expired_data_exports():
+    """
+    Delete expired export files and records. Returns the number purged.
+
+    Exports that never finished expire at their build deadline.
+    """
+    fail_timed_out_data_exports(DataExport.objects.all())
+    expired = list(DataExport.objects.filter(expires_at__lt=timezone.now()))
+    for export in expired:
+        export.delete()
+    return len(expired)
@@ -0,0 +1,108 @@
+"""
+Precomputed JokeSerializer documents.
+
+A joke's JokeSerializer payload only changes when the joke, its tags, its
+share card or a lookup row changes, yet detail, random and daily-joke
+responses rebuild it from 8 tables each time. Rendered JSON bytes are kept
+in the cache per joke (one entry holding the relative-URL document and each
+scheme/host variant) and spliced into responses as RawJSON.
+
+Invalidation:
+- Joke save/delete, tag m2m changes, share card changes: per-joke delete
+- Lookup model edits (Format, Tone, ...): global version bump
+
+Both run once the current transaction commits; invalidating earlier would
+let a reader rebuild the document from the old row and cache it.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Joke
+from .prefetch import apply_prefetch_plan
+from .renderers import ORJSONRenderer, RawJSON
+from .serializers import JokeSerializer
+
+
+DOCUMENT_CACHE_KEY = 'joke_doc:{pk}'
+DOCUMENT_VERSION_KEY = 'joke_doc:version'
+DOCUMENT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_document_version():
+    """Return the current document version (bumped on lookup edits)."""
+    version = cache.get(DOCUMENT_VERSION_KEY)
+    if version is None:
+        cache.add(DOCUMENT_VERSION_KEY, 1, timeout=None)
+        version = cache.get(DOCUMENT_VERSION_KEY, 1)
+    return version
+
+
+def get_joke_documents(joke_ids, request=None):
+    """
+    Return {joke_id: RawJSON} of JokeSerializer payloads.
+
+    With a request, share_image_url is absolute (as in retrieve); without
+    one it is relative (as in random and daily jokes). Cached documents are
+    read in one round trip; misses are rendered from one planned query.
+    Ids of jokes that do not exist are omitted.
+    """
+    variant = request.build_absolute_uri('/')[:-1] if request else ''
+    version = get_document_version()
+
+    keys = {pk: DOCUMENT_CACHE_KEY.format(pk=pk) for pk in joke_ids}
+    cached = cache.get_many(keys.values())
+
+    documents = {}
+    missing = []
+    for pk, key in keys.items():
+        entry = cached.get(key)
+        if entry and entry['version'] == version and variant in entry['variants']:
+            documents[pk] = RawJSON(entry['variants'][variant])
+        else:
+            missing.append(pk)
+
+    if not missing:
+        return documents
+
+    context = {'request': request} if request else {}
+    serializer = JokeSerializer(context=context)
+    jokes = apply_prefetch_plan(Joke.objects.filter(pk__in=missing), serializer)
+    renderer = ORJSONRenderer()
+
+    updates = {}
+    for joke in jokes:
+        body = renderer.render(JokeSerializer(joke, context=context).data)
+        key = keys[joke.pk]
+        entry = cached.get(key)
+        if not entry or entry['version'] != version:
+            entry = {'version': version, 'variants': {}}
+        entry['variants'][variant] = body
+        updates[key] = entry
+        documents[joke.pk] = RawJSON(body)
+
+    cache.set_many(updates, DOCUMENT_CACHE_TIMEOUT)
+    return documents
+
+
+def invalidate_joke_document(pk):
+    """Drop the cached documents for one joke once the transaction commits."""
+    invalidate_joke_documents([pk])
+
+
+def invalidate_joke_documents(joke_ids):
+    """Drop the cached documents for several jokes once the transaction commits."""
+    keys = [DOCUMENT_CACHE_KEY.format(pk=pk) for pk in joke_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def bump_document_version():
+    """Invalidate every cached document once the transaction commits (lookup rows appear in all)."""
+    transaction.on_commit(_incr_document_version)
+
+
+def _incr_document_version():
+    cache.add(DOCUMENT_VERSION_KEY, 1, timeout=None)
+    try:
+        cache.incr(DOCUMENT_VERSION_KEY)
+    except ValueError:
+        cache.set(DOCUMENT_VERSION_KEY, 2, timeout=None)
@@ -0,0 +1,333 @@
+"""
+Bulk joke ingestion for fixtures and partner dumps.
+
+- iter_json_array(): Stream items of a top-level JSON array without
+  loading the whole file
+- bulk_load_jokes(): Insert jokes and their tag rows in batches
+- iter_joke_record_batches() / upsert_joke_records(): Portable joke records
+  (lookups as slugs, keyed by Joke.uuid) for export_jokes/import_jokes and
+  the partner export endpoint
+
+Jokes are inserted with bulk_create (the search vector is filled by the
+database trigger) and tag rows go straight into the through tables.
+Joke.save() is bypassed, so share cards are queued per batch to the
+jokes.generate_share_cards Celery task instead of rendered inline, and
+change feed entries are appended per batch.
+"""
+import itertools
+import json
+import re
+
+from django.db import transaction
+
+from .changes import record_joke_changes
+from .conditional import bump_catalog_version
+from .documents import invalidate_joke_documents
+from .models import AgeRating, ContextTag, CultureTag, Format, Joke, Language, Source, Tone
+from .share_pages import invalidate_share_pages
+from .tasks import generate_share_cards
+
+
+# Bytes read from the file per refill when streaming a JSON array
+READ_SIZE = 1 << 16
+
+# Characters that may continue a number decoded at the end of the buffer
+NUMBER_TAIL_RE = re.compile(r'[0-9.eE+-]*\Z')
+
+# Joke columns and relations taken from fixture "fields"
+TEXT_FIELDS = ('text', 'setup', 'punchline')
+FOREIGN_KEY_FIELDS = ('format', 'age_rating', 'language', 'source')
+TAG_FIELDS = ('tones', 'context_tags', 'culture_tags')
+
+# Relation -> (model, natural key column) used in portable records
+RECORD_LOOKUPS = {
+    'format': (Format, 'slug'),
+    'age_rating': (AgeRating, 'slug'),
+    'language': (Language, 'code'),
+    'tones': (Tone, 'slug'),
+    'context_tags': (ContextTag, 'slug'),
+    'culture_tags': (CultureTag, 'slug'),
+}
+
+
+def iter_json_array(fp, read_size=READ_SIZE):
+    """
+    Yield the items of a JSON array read incrementally from a text file.
+
+    Memory stays proportional to one item plus one read, so multi-GB
+    fixtures can be loaded. Raises ValueError on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    buffer = fp.read(read_size)
+    pos = 0
+    eof = not buffer
+
+    def peek():
+        """Return the next non-whitespace character ('' at end of input)."""
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            buffer, pos = fp.read(read_size), 0
+            eof = not buffer
+
+    if peek() != '[':
+        raise ValueError('Expected a JSON array')
+    pos += 1
+    if peek() == ']':
+        return
+
+    while True:
+        # Decode one item, reading more until it is complete. A number
+        # cut by the buffer end decodes as its prefix ('-0.' as -0, '1e'
+        # as 1), so an item followed only by number characters is retried
+        peek()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                if eof or not NUMBER_TAIL_RE.match(buffer, end):
+                    break
+            chunk = fp.read(read_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        pos = end
+        yield item
+
+        separator = peek()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError('Expected "," or "]" after array item')
+        pos += 1
+
+
+def iter_batches(iterable, size):
+    """Yield lists of up to size items from an iterable."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def build_joke(fields):
+    """Return an unsaved Joke from fixture-style fields (FKs as ids)."""
+    return Joke(
+        **{name: fields.get(name, '') for name in TEXT_FIELDS},
+        **{f'{name}_id': fields.get(name) for name in FOREIGN_KEY_FIELDS},
+    )
+
+
+def build_tag_rows(joke_id, fields):
+    """Return unsaved through-table rows for a joke's tone/context/culture tags."""
+    rows = []
+    for name in TAG_FIELDS:
+        field = Joke._meta.get_field(name)
+        through = field.remote_field.through
+        target_column = f'{field.m2m_reverse_field_name()}_id'
+        # dict.fromkeys drops duplicate ids while keeping order
+        for tag_id in dict.fromkeys(fields.get(name) or []):
+            rows.append((through, through(joke_id=joke_id, **{target_column: tag_id})))
+    return rows
+
+
+def bulk_load_jokes(entries, batch_size=1000, share_cards=True, on_batch=None):
+    """
+    Insert jokes from an iterable of fixture-style field dicts.
+
+    Each batch is one transaction: a bulk INSERT of jokes, then one bulk
+    INSERT per through table. With share_cards, the batch's ids are queued
+    to jokes.generate_share_cards after commit.
+
+    on_batch(loaded_so_far) is called after each committed batch.
+    Returns the number of jokes loaded.
+    """
+    loaded = 0
+    for batch in iter_batches(entries, batch_size):
+        with transaction.atomic():
+            jokes = Joke.objects.bulk_create([build_joke(fields) for fields in batch])
+
+            tag_rows = {}
+            for joke, fields in zip(jokes, batch):
+                for through, row in build_tag_rows(joke.pk, fields):
+                    tag_rows.setdefault(through, []).append(row)
+            for through, rows in tag_rows.items():
+                through.objects.bulk_create(rows)
+
+            joke_ids = [joke.pk for joke in jokes]
+            record_joke_changes(joke_ids)
+            if share_cards:
+                transaction.on_commit(lambda ids=joke_ids: generate_share_cards.delay(ids))
+            bump_catalog_version()
+
+        loaded += len(jokes)
+        if on_batch:
+            on_batch(loaded)
+
+    return loaded
+
+
+def iter_joke_record_batches(queryset=None, start_after=0, batch_size=1000):
+    """
+    Stream portable joke records in id order from a server-side cursor.
+
+    Yields (last joke id, [record, ...]) per batch. Lookup and source ids
+    are mapped to natural keys from in-memory tables read once; tag ids
+    come from one through-table query per tag relation per batch, so
+    memory stays constant. `queryset` narrows the export (default: all).
+    """
+    queryset = Joke.objects.all() if queryset is None else queryset
+    keys = {
+        name: dict(model.objects.values_list('pk', key))
+        for name, (model, key) in RECORD_LOOKUPS.items()
+    }
+    sources = {
+        pk: {'name': name, 'url': url}
+        for pk, name, url in Source.objects.values_list('pk', 'name', 'url')
+    }
+
+    rows = queryset.filter(pk__gt=start_after).order_by('pk').values_list(
+        'pk', 'uuid', 'text', 'setup', 'punchline',
+        'format_id', 'age_rating_id', 'language_id', 'source_id',
+    ).iterator(chunk_size=batch_size)
+
+    for batch in iter_batches(rows, batch_size):
+        joke_ids = [row[0] for row in batch]
+        tag_ids = {name: _get_tag_ids(name, joke_ids) for name in TAG_FIELDS}
+
+        records = []
+        for pk, uid, text, setup, punchline, format_id, age_rating_id, language_id, source_id in batch:
+            records.append({
+                'id': pk,
+                'uuid': str(uid),
+                'text': text,
+                'setup': setup,
+                'punchline': punchline,
+                'format': keys['format'][format_id],
+                'age_rating': keys['age_rating'][age_rating_id],
+                'language': keys['language'][language_id],
+                'source': sources.get(source_id),
+                **{
+                    name: [keys[name][tag_id] for tag_id in tag_ids[name].get(pk, [])]
+                    for name in TAG_FIELDS
+                },
+            })
+        yield batch[-1][0], records
+
+
+def _get_tag_ids(name, joke_ids):
+    """Return {joke_id: [tag ids]} for one tag relation, from the through table only."""
+    field = Joke._meta.get_field(name)
+    target_column = f'{field.m2m_reverse_field_name()}_id'
+
+    tag_ids = {}
+    rows = field.remote_field.through.objects.filter(joke_id__in=joke_ids).order_by(
+        'joke_id', target_column
+    ).values_list('joke_id', target_column)
+    for joke_id, tag_id in rows:
+        tag_ids.setdefault(joke_id, []).append(tag_id)
+    return tag_ids
+
+
+class RecordResolver:
+    """
+    Map natural keys in portable records to local ids.
+
+    Lookup tables are small and read once; sources are matched by
+    (name, url) and created when missing.
+    """
+
+    def __init__(self):
+        self.ids = {
+            name: dict(model.objects.values_list(key, 'pk'))
+            for name, (model, key) in RECORD_LOOKUPS.items()
+        }
+        self.source_ids = {
+            (name, url): pk for pk, name, url in Source.objects.values_list('pk', 'name', 'url')
+        }
+
+    def resolve(self, name, value, record):
+        try:
+            return self.ids[name][value]
+        except KeyError:
+            raise ValueError(f'Unknown {name} "{value}" in joke {record.get("uuid")}')
+
+    def resolve_source(self, source):
+        if not source:
+            return None
+        source_key = (source['name'], source.get('url') or '')
+        if source_key not in self.source_ids:
+            self.source_ids[source_key] = Source.objects.create(
+                name=source_key[0], url=source_key[1]
+            ).pk
+        return self.source_ids[source_key]
+
+    def to_fields(self, record):
+        """Return fixture-style fields (ids) for a portable record."""
+        return {
+            'text': record['text'],
+            'setup': record.get('setup', ''),
+            'punchline': record.get('punchline', ''),
+            **{
+                name: self.resolve(name, record[name], record)
+                for name in FOREIGN_KEY_FIELDS if name != 'source'
+            },
+            'source': self.resolve_source(record.get('source')),
+            **{
+                name: [self.resolve(name, value, record) for value in record.get(name) or []]
+                for name in TAG_FIELDS
+            },
+        }
+
+
+def upsert_joke_records(records, resolver, share_cards=True):
+    """
+    Insert or update a batch of portable records keyed by uuid.
+
+    One INSERT ... ON CONFLICT (uuid) DO UPDATE for the jokes, then the
+    batch's tag rows are replaced. Cached payloads are invalidated and
+    share cards queued after commit. Returns the number of records.
+    """
+    # Last record wins for uuids repeated within the batch
+    by_uuid = {record['uuid']: record for record in records}
+
+    with transaction.atomic():
+        jokes = []
+        fields_list = []
+        for uid, record in by_uuid.items():
+            fields = resolver.to_fields(record)
+            joke = build_joke(fields)
+            joke.uuid = uid
+            jokes.append(joke)
+            fields_list.append(fields)
+
+        Joke.objects.bulk_create(
+            jokes,
+            update_conflicts=True,
+            unique_fields=['uuid'],
+            update_fields=['text', 'setup', 'punchline', 'format', 'age_rating',
+                           'language', 'source', 'updated_at'],
+        )
+        joke_ids = [joke.pk for joke in jokes]
+
+        tag_rows = {}
+        for joke, fields in zip(jokes, fields_list):
+            for through, row in build_tag_rows(joke.pk, fields):
+                tag_rows.setdefault(through, []).append(row)
+        for name in TAG_FIELDS:
+            through = Joke._meta.get_field(name).remote_field.through
+            through.objects.filter(joke_id__in=joke_ids).delete()
+            through.objects.bulk_create(tag_rows.get(through, []))
+        record_joke_changes(joke_ids)
+        invalidate_joke_documents(joke_ids)
+        invalidate_share_pages(joke_ids)
+        if share_cards:
+            transaction.on_commit(lambda: generate_share_cards.delay(joke_ids))
+        bump_catalog_version()
+
+    return len(jokes)
@@ -0,0 +1,127 @@
+"""
+Process-local registry of lookup tables.
+
+Formats, age ratings, tones, context tags, languages and culture tags
+change almost never, so each worker loads them once and serves them from
+memory. A shared version counter in the cache is bumped (after commit)
+whenever a lookup row is saved or deleted; workers compare it at most every
+LOOKUP_VERSION_CHECK_INTERVAL seconds and reload on change.
+
+- get_lookup_registry(): The worker's LookupRegistry
+- bump_lookup_version(): Invalidate every worker's copy
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import AgeRating, ContextTag, CultureTag, Format, Language, Tone
+from .serializers import (
+    AgeRatingSerializer,
+    ContextTagSerializer,
+    CultureTagSerializer,
+    FormatSerializer,
+    LanguageSerializer,
+    ToneSerializer,
+)
+
+
+# Table name -> (model, serializer, ordering); ordering matches the viewsets
+LOOKUP_TABLES = {
+    'formats': (Format, FormatSerializer, ('name',)),
+    'age_ratings': (AgeRating, AgeRatingSerializer, ('min_age', 'name')),
+    'tones': (Tone, ToneSerializer, ('name',)),
+    'context_tags': (ContextTag, ContextTagSerializer, ('name',)),
+    'languages': (Language, LanguageSerializer, ('name',)),
+    'culture_tags': (CultureTag, CultureTagSerializer, ('name',)),
+}
+
+LOOKUP_VERSION_KEY = 'lookups:version'
+
+# Seconds a worker trusts its copy before re-reading the shared version
+LOOKUP_VERSION_CHECK_INTERVAL = 5
+
+
+def get_lookup_version():
+    """Return the shared lookup version (bumped on lookup edits)."""
+    version = cache.get(LOOKUP_VERSION_KEY)
+    if version is None:
+        cache.add(LOOKUP_VERSION_KEY, 1, timeout=None)
+        version = cache.get(LOOKUP_VERSION_KEY, 1)
+    return version
+
+
+def bump_lookup_version():
+    """Invalidate every worker's lookup tables."""
+    cache.add(LOOKUP_VERSION_KEY, 1, timeout=None)
+    try:
+        cache.incr(LOOKUP_VERSION_KEY)
+    except ValueError:
+        cache.set(LOOKUP_VERSION_KEY, 2, timeout=None)
+    _registry.mark_stale()
+
+
+class LookupRegistry:
+    """
+    In-memory copy of the serialized lookup tables for one worker.
+
+    Tables hold the same dicts the lookup viewsets return; the bootstrap
+    payload bundles all of them with an ETag over its JSON encoding.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        # (version, tables, etag), swapped as one object so readers never mix
+        self._state = (None, {}, None)
+
+    def mark_stale(self):
+        """Force a version check on the next access."""
+        self._checked_at = 0.0
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._state[0] is not None and now - self._checked_at < LOOKUP_VERSION_CHECK_INTERVAL:
+            return self._state
+
+        with self._lock:
+            if self._state[0] is not None and now - self._checked_at < LOOKUP_VERSION_CHECK_INTERVAL:
+                return self._state
+            version = get_lookup_version()
+            if version != self._state[0]:
+                self._state = self._load(version)
+            self._checked_at = now
+            return self._state
+
+    def _load(self, version):
+        tables = {}
+        for name, (model, serializer_class, ordering) in LOOKUP_TABLES.items():
+            rows = model.objects.order_by(*ordering)
+            tables[name] = [dict(row) for row in serializer_class(rows, many=True).data]
+
+        encoded = json.dumps(tables, sort_keys=True, separators=(',', ':'))
+        etag = '"%s"' % hashlib.md5(encoded.encode('utf-8')).hexdigest()
+        return version, tables, etag
+
+    def get_table(self, name):
+        """Return the serialized rows of one lookup table."""
+        return self._ensure_loaded()[1][name]
+
+    def get_row(self, name, pk):
+        """Return one serialized row by id, or None."""
+        return next((row for row in self.get_table(name) if row['id'] == pk), None)
+
+    def get_bootstrap(self):
+        """Return (tables, etag) for the bootstrap endpoint."""
+        _, tables, etag = self._ensure_loaded()
+        return tables, etag
+
+
+_registry = LookupRegistry()
+
+
+def get_lookup_registry():
+    """Return this worker's LookupRegistry."""
+    return _registry
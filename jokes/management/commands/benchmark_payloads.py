@@ -0,0 +1,88 @@
+import gzip
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from jokes.middleware import BROTLI_QUALITY, brotli
+from jokes.models import Joke
+from jokes.prefetch import apply_prefetch_plan
+from jokes.renderers import JSONStream, ORJSONRenderer
+from jokes.serializers import JokeListSerializer
+from jokes.views import STREAMING_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Measure response bytes (raw/gzip/brotli) and peak memory of full vs streamed rendering'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1000,
+            help='Number of jokes in the payload (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        ids = list(Joke.objects.order_by('pk').values_list('pk', flat=True)[:options['count']])
+        if not ids:
+            raise CommandError('No jokes in the database. Run seed_jokes first.')
+
+        request = RequestFactory().get('/api/v1/saved-jokes/', HTTP_HOST='localhost')
+        context = {'request': request}
+        jokes = list(apply_prefetch_plan(
+            Joke.objects.filter(pk__in=ids).order_by('pk'), JokeListSerializer()
+        ))
+        renderer = ORJSONRenderer()
+
+        def envelope(results):
+            return {'count': len(jokes), 'next': None, 'previous': None, 'results': results}
+
+        def render_full():
+            data = JokeListSerializer(jokes, many=True, context=context).data
+            return renderer.render(envelope(data))
+
+        def render_streamed():
+            chunks = (
+                JokeListSerializer(jokes[start:start + STREAMING_CHUNK_SIZE], many=True, context=context).data
+                for start in range(0, len(jokes), STREAMING_CHUNK_SIZE)
+            )
+            size = 0
+            for piece in renderer.iter_render(envelope(JSONStream(chunks))):
+                size += len(piece)
+            return size
+
+        body = render_full()
+        self.stdout.write(f'Payload: {len(jokes)} jokes (JokeListSerializer, paginated envelope)')
+        self.stdout.write(f'  {"raw JSON":<24} {len(body):>12,} bytes')
+        gzipped = gzip.compress(body, compresslevel=6)
+        self.stdout.write(
+            f'  {"gzip (level 6)":<24} {len(gzipped):>12,} bytes  ({len(gzipped) / len(body):.1%})'
+        )
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            self.stdout.write(
+                f'  {f"brotli (quality {BROTLI_QUALITY})":<24} {len(compressed):>12,} bytes  '
+                f'({len(compressed) / len(body):.1%})'
+            )
+        else:
+            self.stdout.write('  brotli                   (brotli not installed)')
+
+        full_peak, full_time = self._measure(render_full)
+        streamed_peak, streamed_time = self._measure(render_streamed)
+        self.stdout.write('Rendering (peak traced memory, wall time):')
+        self.stdout.write(f'  {"full render":<24} {full_peak / 1024:>10,.0f} KiB  {full_time * 1000:8.1f} ms')
+        self.stdout.write(f'  {"streamed render":<24} {streamed_peak / 1024:>10,.0f} KiB  {streamed_time * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Streaming saved {(full_peak - streamed_peak) / 1024:,.0f} KiB of peak memory'
+        ))
+
+    def _measure(self, func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, elapsed
@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from jokes.models import Joke
+from jokes.prefetch import apply_prefetch_plan
+from jokes.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from jokes.serializers import JokeListFastSerializer, JokeListSerializer, JokeSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark joke list serialization and rendering (time per 1,000 jokes) and payload sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1000,
+            help='Number of jokes per run (default: 1000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the best run is reported (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        repeat = options['repeat']
+
+        ids = list(Joke.objects.order_by('pk').values_list('pk', flat=True)[:count])
+        if not ids:
+            raise CommandError('No jokes in the database. Run seed_jokes first.')
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+        request = RequestFactory().get('/api/v1/jokes/', HTTP_HOST=host)
+        context = {'request': request}
+        queryset = Joke.objects.filter(pk__in=ids).order_by('pk')
+        per_1000 = 1000 / len(ids)
+
+        def drf_data():
+            jokes = apply_prefetch_plan(queryset, JokeListSerializer())
+            return JokeListSerializer(jokes, many=True, context=context).data
+
+        def fast_data():
+            rows = JokeListFastSerializer.get_queryset(queryset)
+            return JokeListFastSerializer(rows, context=context).data
+
+        drf_result = drf_data()
+        fast_result = fast_data()
+        json_renderer = JSONRenderer()
+        orjson_renderer = ORJSONRenderer()
+
+        if json_renderer.render(drf_result) != json_renderer.render(fast_result):
+            raise CommandError('Fast serializer output differs from JokeListSerializer.')
+
+        self.stdout.write(f'Jokes per run: {len(ids)} (best of {repeat}, ms per 1,000 jokes)')
+        rows = [
+            ('JokeListSerializer (query + serialize)', drf_data),
+            ('JokeListFastSerializer (query + serialize)', fast_data),
+            ('JSONRenderer', lambda: json_renderer.render(drf_result)),
+            ('ORJSONRenderer' + ('' if orjson else ' (orjson not installed)'),
+             lambda: orjson_renderer.render(drf_result)),
+            ('JokeListSerializer + JSONRenderer',
+             lambda: json_renderer.render(drf_data())),
+            ('JokeListFastSerializer + ORJSONRenderer',
+             lambda: orjson_renderer.render(fast_data())),
+        ]
+        if msgpack is not None:
+            msgpack_renderer = MessagePackRenderer()
+            rows.append(('MessagePackRenderer', lambda: msgpack_renderer.render(drf_result)))
+        for label, func in rows:
+            best = self._best_of(func, repeat)
+            self.stdout.write(f'  {label:<48} {best * 1000 * per_1000:9.2f} ms')
+
+        self._write_payload_sizes(queryset, context, json_renderer, drf_result)
+
+        self.stdout.write(self.style.SUCCESS('Fast serializer output is byte-identical'))
+
+    def _write_payload_sizes(self, queryset, context, json_renderer, list_data):
+        """Compare JSON and MessagePack payload sizes for list and detail data."""
+        if msgpack is None:
+            self.stdout.write('Payload size: msgpack not installed, MessagePack skipped')
+            return
+
+        jokes = apply_prefetch_plan(queryset, JokeSerializer())
+        detail_data = JokeSerializer(jokes, many=True, context=context).data
+        msgpack_renderer = MessagePackRenderer()
+
+        self.stdout.write('Payload size (JSON vs MessagePack):')
+        for label, data in (('JokeListSerializer', list_data), ('JokeSerializer', detail_data)):
+            json_size = len(json_renderer.render(data))
+            msgpack_size = len(msgpack_renderer.render(data))
+            self.stdout.write(
+                f'  {label:<24} {json_size:>12,} B  {msgpack_size:>12,} B  ({msgpack_size / json_size:.1%})'
+            )
+
+    def _best_of(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jokes.ingest import iter_joke_record_batches
+
+
+class Command(BaseCommand):
+    help = 'Export the joke catalog as NDJSON (tags as slugs, keyed by uuid), resumable'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Output file; a .gz suffix writes gzip'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Jokes per database batch and checkpoint (default: 1000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress (default: <output>.checkpoint.json)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted export from the checkpoint'
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint'] or f'{output}.checkpoint.json'
+        compress = output.endswith('.gz')
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        start_after = offset = 0
+        if options['resume']:
+            start_after, offset = self._read_checkpoint(checkpoint_path)
+            self.stdout.write(f'Resuming after joke id {start_after}')
+
+        exported = 0
+        started = time.monotonic()
+
+        with open(output, 'r+b' if options['resume'] else 'wb') as f:
+            # Drop anything written after the last checkpoint
+            f.truncate(offset)
+            f.seek(offset)
+
+            for last_joke_id, records in iter_joke_record_batches(start_after=start_after, batch_size=batch_size):
+                data = ''.join(
+                    json.dumps(record, ensure_ascii=False) + '\n' for record in records
+                ).encode('utf-8')
+                if compress:
+                    # One gzip member per batch keeps every checkpoint a valid cut point
+                    data = gzip.compress(data, mtime=0)
+
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                self._write_checkpoint(checkpoint_path, last_joke_id, f.tell())
+
+                exported += len(records)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'{exported} jokes - {exported / elapsed:.0f} rows/sec')
+
+        elapsed = time.monotonic() - started
+        rate = exported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(f'Exported {exported} jokes to {output} in {elapsed:.1f}s - {rate:.0f} rows/sec')
+        )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _read_checkpoint(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'Checkpoint file not found: {path}')
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        return checkpoint['last_joke_id'], checkpoint['offset']
+
+    def _write_checkpoint(self, path, last_joke_id, offset):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_joke_id': last_joke_id, 'offset': offset}, f)
+        os.replace(tmp_path, path)
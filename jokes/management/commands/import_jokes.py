@@ -0,0 +1,111 @@
+import gzip
+import itertools
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jokes.ingest import RecordResolver, iter_batches, upsert_joke_records
+
+
+class Command(BaseCommand):
+    help = 'Import an NDJSON joke export, upserting on uuid; resumable'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input',
+            help='NDJSON file written by export_jokes (plain or gzip)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Records per upsert transaction and checkpoint (default: 1000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress (default: <input>.checkpoint.json)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the lines already imported according to the checkpoint'
+        )
+        parser.add_argument(
+            '--no-share-cards',
+            action='store_true',
+            help='Do not queue share card rendering (run regenerate_share_cards later)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['input']
+        batch_size = options['batch_size']
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint.json'
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+        if not os.path.exists(path):
+            raise CommandError(f'Input file not found: {path}')
+
+        skip_lines = 0
+        if options['resume']:
+            skip_lines = self._read_checkpoint(checkpoint_path)
+            self.stdout.write(f'Resuming after line {skip_lines}')
+
+        resolver = RecordResolver()
+        imported = 0
+        line_number = skip_lines
+        started = time.monotonic()
+
+        with self._open(path) as f:
+            lines = enumerate(itertools.islice(f, skip_lines, None), start=skip_lines + 1)
+            for batch in iter_batches(lines, batch_size):
+                records = []
+                for line_number, line in batch:
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError as exc:
+                        raise CommandError(f'Line {line_number}: invalid JSON ({exc})')
+
+                try:
+                    imported += upsert_joke_records(
+                        records, resolver, share_cards=not options['no_share_cards']
+                    )
+                except (KeyError, ValueError) as exc:
+                    raise CommandError(f'Lines {batch[0][0]}-{line_number}: {exc}')
+
+                self._write_checkpoint(checkpoint_path, line_number)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'{imported} jokes - {imported / elapsed:.0f} rows/sec')
+
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(f'Imported {imported} jokes from {path} in {elapsed:.1f}s - {rate:.0f} rows/sec')
+        )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _open(self, path):
+        """Open plain or gzip NDJSON (detected by magic bytes) as text."""
+        with open(path, 'rb') as f:
+            is_gzip = f.read(2) == b'\x1f\x8b'
+        if is_gzip:
+            return gzip.open(path, 'rt', encoding='utf-8')
+        return open(path, 'r', encoding='utf-8')
+
+    def _read_checkpoint(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'Checkpoint file not found: {path}')
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['lines']
+
+    def _write_checkpoint(self, path, lines):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'lines': lines}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from jokes.changes import record_joke_changes
+from jokes.conditional import bump_catalog_version
+from jokes.documents import invalidate_joke_documents
+from jokes.models import Joke, Tone
+from jokes.share_cards import (
+    DEFAULT_TEMPLATE,
+    TONE_TEMPLATES,
+    get_card_inputs_for_tone,
+    get_primary_tone_ids,
+    get_template_version,
+    store_share_card,
+)
+from jokes.share_pages import invalidate_share_pages
+
+
+def _init_worker():
+    """Prepare a pool worker: Django apps, warm templates and Cairo."""
+    if not django.apps.apps.ready:
+        django.setup()
+
+    import cairosvg  # noqa: F401
+
+    for template_name in [DEFAULT_TEMPLATE, *TONE_TEMPLATES.values()]:
+        get_template_version(template_name)
+
+
+def _render_card(job):
+    """Render and store one card. Returns (joke_id, storage name, rendered)."""
+    joke_id, template_name, joke_text, badge_text = job
+    name, rendered = store_share_card(template_name, joke_text, badge_text)
+    return joke_id, name, rendered
+
+
+class Command(BaseCommand):
+    help = 'Regenerate share card images for all jokes using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of render processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Jokes per database batch and UPDATE (default: 500)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default='regenerate_share_cards.checkpoint.json',
+            help='File recording the last completed joke id'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue after the joke id recorded in the checkpoint'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        workers = options['workers']
+        checkpoint_path = options['checkpoint']
+
+        if batch_size < 1 or workers < 1:
+            raise CommandError('--workers and --batch-size must be positive')
+
+        start_after = 0
+        if options['resume']:
+            start_after = self._read_checkpoint(checkpoint_path)
+            self.stdout.write(f'Resuming after joke id {start_after}')
+
+        tones = {tone.pk: tone for tone in Tone.objects.all()}
+
+        # Forked workers must not inherit open connections
+        connections.close_all()
+
+        processed = rendered = 0
+        started = time.monotonic()
+
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            for batch in self._iter_batches(start_after, batch_size):
+                jobs = self._build_jobs(batch, tones)
+                results = pool.map(_render_card, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+                changed = [
+                    Joke(pk=joke_id, share_image=name)
+                    for joke_id, name, _ in results
+                    if batch[joke_id][1] != name
+                ]
+                if changed:
+                    self._save_changed(changed, batch_size)
+
+                processed += len(results)
+                rendered += sum(1 for _, _, was_rendered in results if was_rendered)
+                self._write_checkpoint(checkpoint_path, max(batch))
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{processed} cards ({rendered} rendered) '
+                    f'- {processed / elapsed:.1f} cards/sec'
+                )
+
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Regenerated {processed} share cards ({rendered} rendered, '
+                f'{processed - rendered} reused) in {elapsed:.1f}s - {rate:.1f} cards/sec'
+            )
+        )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _save_changed(self, changed, batch_size):
+        """
+        Re-point changed jokes at their new cards in one transaction.
+
+        Cached documents and share pages still name the old cards, which
+        cleanup_share_cards deletes after its grace period, so they are
+        dropped after commit along with the catalog version.
+        """
+        joke_ids = [joke.pk for joke in changed]
+
+        with transaction.atomic():
+            Joke.objects.bulk_update(changed, ['share_image'], batch_size=batch_size)
+            record_joke_changes(joke_ids)
+            invalidate_joke_documents(joke_ids)
+            invalidate_share_pages(joke_ids)
+            bump_catalog_version()
+
+    def _iter_batches(self, start_after, batch_size):
+        """
+        Stream jokes in id order from a server-side cursor.
+
+        Yields dicts of {joke_id: (text, share_image)} with batch_size entries.
+        """
+        rows = Joke.objects.filter(pk__gt=start_after).order_by('pk').values_list(
+            'pk', 'text', 'share_image'
+        ).iterator(chunk_size=batch_size)
+
+        batch = {}
+        for pk, text, share_image in rows:
+            batch[pk] = (text, share_image)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = {}
+        if batch:
+            yield batch
+
+    def _build_jobs(self, batch, tones):
+        """Resolve each joke's primary tone (lowest tone id) in one query."""
+        primary_tone_ids = get_primary_tone_ids(batch.keys())
+
+        jobs = []
+        for joke_id, (text, _) in batch.items():
+            tone = tones.get(primary_tone_ids.get(joke_id))
+            template_name, badge_text = get_card_inputs_for_tone(tone)
+            jobs.append((joke_id, template_name, text, badge_text))
+        return jobs
+
+    def _read_checkpoint(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'Checkpoint file not found: {path}')
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['last_joke_id']
+
+    def _write_checkpoint(self, path, last_joke_id):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_joke_id': last_joke_id}, f)
+        os.replace(tmp_path, path)
@@ -1,31 +1,50 @@
-import json
+import itertools
 import os
+import time
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
 
+from jokes.ingest import bulk_load_jokes, iter_json_array
 from jokes.models import (
     Joke, Format, AgeRating, Tone, ContextTag, Language, CultureTag, Source
 )
 
 
 class Command(BaseCommand):
-    help = 'Seed jokes from the jokes.json fixture file'
+    help = 'Seed jokes from the jokes.json fixture file (or a partner dump in the same format)'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--count',
             type=int,
             default=150,
-            help='Maximum number of jokes to load (default: 150)'
+            help='Maximum number of jokes to load (default: 150; 0 for all)'
         )
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Delete all existing jokes before loading'
         )
+        parser.add_argument(
+            '--file',
+            help='Fixture file to load (default: jokes/fixtures/jokes.json)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Jokes per INSERT batch and transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--no-share-cards',
+            action='store_true',
+            help='Do not queue share card rendering (run regenerate_share_cards later)'
+        )
 
     def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
         # Check lookup tables are populated
         self._validate_lookup_tables()
 
@@ -38,7 +57,7 @@ class Command(BaseCommand):
             )
 
         # Load jokes from fixture
-        fixture_path = os.path.join(
+        fixture_path = options['file'] or os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             'fixtures',
             'jokes.json'
@@ -53,25 +72,48 @@ class Command(BaseCommand):
             )
             return
 
+        started = time.monotonic()
+
+        def report(loaded):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{loaded} jokes - {loaded / elapsed:.0f} rows/sec')
+
         with open(fixture_path, 'r', encoding='utf-8') as f:
-            jokes_data = json.load(f)
+            entries = (
+                entry.get('fields', {})
+                for entry in iter_json_array(f)
+                if entry.get('model') == 'jokes.joke'
+            )
 
-        if not jokes_data:
+            # Limit to requested count
+            if options['count']:
+                entries = itertools.islice(entries, options['count'])
+
+            try:
+                loaded_count = bulk_load_jokes(
+                    entries,
+                    batch_size=options['batch_size'],
+                    share_cards=not options['no_share_cards'],
+                    on_batch=report,
+                )
+            except ValueError as exc:
+                raise CommandError(f'Invalid fixture file {fixture_path}: {exc}')
+
+        if not loaded_count:
             self.stdout.write(
                 self.style.WARNING('Fixture file is empty\n0 jokes loaded')
             )
             return
 
-        # Limit to requested count
-        max_count = options['count']
-        jokes_data = jokes_data[:max_count]
-
-        # Load jokes with M2M relationships
-        loaded_count = self._load_jokes(jokes_data)
-
+        elapsed = time.monotonic() - started
+        rate = loaded_count / elapsed if elapsed else 0
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully loaded {loaded_count} jokes')
+            self.style.SUCCESS(
+                f'Successfully loaded {loaded_count} jokes in {elapsed:.1f}s - {rate:.0f} rows/sec'
+            )
         )
+        if not options['no_share_cards']:
+            self.stdout.write('Share cards queued to the jokes.generate_share_cards task')
 
     def _validate_lookup_tables(self):
         """Ensure all lookup tables have data."""
@@ -95,42 +137,3 @@ class Command(BaseCommand):
                 f'Missing lookup data. Empty tables: {", ".join(missing)}. '
                 'Run "python manage.py loaddata lookup_data" first.'
             )
-
-    @transaction.atomic
-    def _load_jokes(self, jokes_data):
-        """Load jokes from fixture data, handling M2M relationships."""
-        loaded_count = 0
-
-        for joke_entry in jokes_data:
-            if joke_entry.get('model') != 'jokes.joke':
-                continue
-
-            fields = joke_entry.get('fields', {})
-
-            # Extract M2M fields before creating joke
-            tones_pks = fields.pop('tones', [])
-            context_tags_pks = fields.pop('context_tags', [])
-            culture_tags_pks = fields.pop('culture_tags', [])
-
-            # Create the joke object
-            joke = Joke.objects.create(
-                text=fields.get('text', ''),
-                setup=fields.get('setup', ''),
-                punchline=fields.get('punchline', ''),
-                format_id=fields.get('format'),
-                age_rating_id=fields.get('age_rating'),
-                language_id=fields.get('language'),
-                source_id=fields.get('source'),
-            )
-
-            # Set M2M relationships
-            if tones_pks:
-                joke.tones.set(tones_pks)
-            if context_tags_pks:
-                joke.context_tags.set(context_tags_pks)
-            if culture_tags_pks:
-                joke.culture_tags.set(culture_tags_pks)
-
-            loaded_count += 1
-
-        return loaded_count
@@ -1,5 +1,15 @@
 from django.contrib.postgres.search import SearchQuery, SearchRank
-from django.db import models
+from django.db import connection, models
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+
+# Inserts saves, skipping rows the (user, joke, collection) index already has
+INSERT_SAVED_JOKES_SQL = """
+INSERT INTO jokes_savedjoke (user_id, joke_id, collection_id, note, created_at)
+SELECT %s, joke_id, %s, %s, %s FROM unnest(%s::bigint[]) AS joke_id
+ON CONFLICT DO NOTHING
+"""
 
 
 class JokeManager(models.Manager):
@@ -53,3 +63,72 @@ class JokeManager(models.Manager):
             qs = qs.order_by('-created_at')
 
         return qs.distinct()
+
+
+class SavedJokeQuerySet(models.QuerySet):
+    """QuerySet for SavedJoke with search scoped to the rows already selected."""
+
+    def insert_saves(self, user, joke_ids, collection=None, note=''):
+        """
+        Save jokes for a user in one INSERT. Returns the number of rows added.
+
+        Rows a concurrent request inserted first are skipped by ON CONFLICT
+        and not counted (bulk_create(ignore_conflicts=True) cannot tell).
+        NULL collections never conflict, so callers filter out existing
+        saves first. No signals are sent.
+        """
+        if not joke_ids:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_SAVED_JOKES_SQL, [
+                user.pk, collection.pk if collection else None, note, timezone.now(), list(joke_ids),
+            ])
+            return cursor.rowcount
+
+    def search(self, query_text=None, filters=None):
+        """
+        Full-text search and filters over the saved jokes in this queryset.
+
+        Same query syntax and filters as JokeManager.search(), but the
+        tsquery and filters are applied to the joined jokes of these rows
+        only. Scoped by user first (the (user, joke, collection) unique
+        index), a search costs O(saved jokes) instead of a ranked search
+        of the whole catalog. Tag filters are EXISTS subqueries, so no
+        distinct() is needed.
+
+        Returns:
+            QuerySet ordered by relevance (if searching) or saved date
+        """
+        from .models import Joke
+
+        qs = self
+        searching = bool(query_text and query_text.strip())
+
+        if searching:
+            query = SearchQuery(query_text.strip(), search_type='websearch')
+            # F() keeps the stored vector (a plain name would be re-parsed as text)
+            qs = qs.annotate(
+                rank=SearchRank(F('joke__search_vector'), query)
+            ).filter(joke__search_vector=query)
+
+        if filters:
+            if filters.get('format'):
+                qs = qs.filter(joke__format__slug=filters['format'])
+            if filters.get('age_rating'):
+                qs = qs.filter(joke__age_rating__slug=filters['age_rating'])
+            if filters.get('language'):
+                qs = qs.filter(joke__language__code=filters['language'])
+            for name in ('tones', 'context_tags', 'culture_tags'):
+                if filters.get(name):
+                    field = Joke._meta.get_field(name)
+                    qs = qs.filter(Exists(field.remote_field.through.objects.filter(
+                        joke_id=OuterRef('joke_id'),
+                        **{f'{field.m2m_reverse_field_name()}__slug__in': filters[name]},
+                    )))
+
+        if searching:
+            return qs.order_by('-rank', '-created_at')
+        return qs.order_by('-created_at')
+
+
+SavedJokeManager = models.Manager.from_queryset(SavedJokeQuerySet)
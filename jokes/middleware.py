@@ -0,0 +1,126 @@
+"""
+Response compression for the Jokes API.
+
+CompressionMiddleware negotiates brotli (when the optional `brotli` package
+is installed) or gzip from Accept-Encoding q-values. It only compresses
+text-like content types - share card PNG/WebP files are already compressed -
+and skips bodies smaller than settings.COMPRESSION_MIN_SIZE. Streaming
+responses are compressed chunk by chunk.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# Content types worth compressing (prefix match, parameters ignored)
+COMPRESSIBLE_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/x-ndjson',
+    'application/vnd.oai.openapi',
+    'image/svg+xml',
+)
+
+# Brotli quality for dynamic responses (11 is too slow for per-request use)
+BROTLI_QUALITY = 5
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} from an Accept-Encoding header."""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header):
+    """Return 'br', 'gzip' or None for an Accept-Encoding header."""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def brotli_compress_sequence(sequence):
+    """Brotli-compress an iterator of bytes, yielding compressed chunks."""
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+        # Flush so each rendered chunk reaches the client promptly
+        data = compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Content-negotiated brotli/gzip compression with a size threshold.
+
+    gzip responses go through Django's GZipMiddleware (including its
+    BREACH-mitigating random filename padding).
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding != 'br':
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Async streams (not used by this project) are sent as-is
+                return response
+            response.streaming_content = brotli_compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.10 on 2026-10-19 04:32
+
+import pgtrigger.compiler
+import pgtrigger.migrations
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0009_shareevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='joke_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Denormalized count of saved jokes, maintained by database triggers'),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name='savedjoke',
+            trigger=pgtrigger.compiler.Trigger(name='savedjoke_collection_count_insert', sql=pgtrigger.compiler.UpsertTriggerSql(condition='WHEN (NEW."collection_id" IS NOT NULL)', func='UPDATE jokes_collection SET joke_count = joke_count + 1 WHERE id = NEW.collection_id; RETURN NULL;', hash='f82aba7cf26dcd4085c9f60e48e01fda78b85c8d', operation='INSERT', pgid='pgtrigger_savedjoke_collection_count_insert_9fd30', table='jokes_savedjoke', when='AFTER')),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name='savedjoke',
+            trigger=pgtrigger.compiler.Trigger(name='savedjoke_collection_count_delete', sql=pgtrigger.compiler.UpsertTriggerSql(condition='WHEN (OLD."collection_id" IS NOT NULL)', func='UPDATE jokes_collection SET joke_count = GREATEST(joke_count - 1, 0) WHERE id = OLD.collection_id; RETURN NULL;', hash='0174435ca4d7c430811422757da54e5f828761fb', operation='DELETE', pgid='pgtrigger_savedjoke_collection_count_delete_4ec8a', table='jokes_savedjoke', when='AFTER')),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name='savedjoke',
+            trigger=pgtrigger.compiler.Trigger(name='savedjoke_collection_count_move', sql=pgtrigger.compiler.UpsertTriggerSql(condition='WHEN (OLD."collection_id" IS DISTINCT FROM (NEW."collection_id"))', func='UPDATE jokes_collection SET joke_count = GREATEST(joke_count - 1, 0) WHERE id = OLD.collection_id; UPDATE jokes_collection SET joke_count = joke_count + 1 WHERE id = NEW.collection_id; RETURN NULL;', hash='06ca589639f03ca95a336f15b050c6875e4f6014', operation='UPDATE', pgid='pgtrigger_savedjoke_collection_count_move_63172', table='jokes_savedjoke', when='AFTER')),
+        ),
+        # Backfill after the triggers exist so concurrent saves are not lost
+        migrations.RunSQL(
+            sql=(
+                'UPDATE jokes_collection c SET joke_count = '
+                '(SELECT COUNT(*) FROM jokes_savedjoke s WHERE s.collection_id = c.id)'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-19 04:44
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0010_collection_joke_count'),
+    ]
+
+    operations = [
+        # Nullable first so existing rows get distinct values below
+        migrations.AddField(
+            model_name='joke',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql='UPDATE jokes_joke SET uuid = gen_random_uuid() WHERE uuid IS NULL',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='joke',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
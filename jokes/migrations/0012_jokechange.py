@@ -0,0 +1,34 @@
+# Generated by Django 5.2.10 on 2026-10-19 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0011_joke_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JokeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joke_id', models.BigIntegerField(db_index=True)),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], default='upsert', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        # Seed the log with every existing joke so a sync from token 0
+        # returns the full catalog
+        migrations.RunSQL(
+            sql=(
+                "INSERT INTO jokes_jokechange (joke_id, action, created_at) "
+                "SELECT id, 'upsert', NOW() FROM jokes_joke ORDER BY id"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.10 on 2026-10-19 04:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0012_jokechange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(help_text='Storage name of the .sqlite.gz file', max_length=255)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveBigIntegerField(help_text='Compressed size in bytes')),
+                ('joke_count', models.PositiveIntegerField()),
+                ('change_token', models.BigIntegerField()),
+                ('built_at', models.DateTimeField()),
+                ('age_rating', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_snapshots', to='jokes.agerating')),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_snapshots', to='jokes.language')),
+            ],
+            options={
+                'ordering': ['language__code', 'age_rating__min_age'],
+                'unique_together': {('language', 'age_rating')},
+            },
+        ),
+    ]
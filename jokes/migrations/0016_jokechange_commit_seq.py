@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-19 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0015_dataexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jokechange',
+            name='commit_seq',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Position in commit order, assigned once the entry is committed', null=True, unique=True),
+        ),
+        # Existing entries keep their id as token, so stored client tokens
+        # stay valid; new entries are numbered after them
+        migrations.RunSQL(
+            sql=[
+                'CREATE SEQUENCE jokes_jokechange_commit_seq OWNED BY jokes_jokechange.commit_seq',
+                'UPDATE jokes_jokechange SET commit_seq = id',
+                "SELECT setval('jokes_jokechange_commit_seq', "
+                "COALESCE((SELECT MAX(id) FROM jokes_jokechange), 0) + 1, false)",
+            ],
+            reverse_sql='DROP SEQUENCE jokes_jokechange_commit_seq',
+        ),
+        migrations.AddIndex(
+            model_name='jokechange',
+            index=models.Index(condition=models.Q(('commit_seq__isnull', True)), fields=['id'], name='jokechange_unsequenced_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0016_jokechange_commit_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountdeletion',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Failed runs so far'),
+        ),
+        migrations.AddField(
+            model_name='accountdeletion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
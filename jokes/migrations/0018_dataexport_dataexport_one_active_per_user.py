@@ -0,0 +1,41 @@
+# Generated by Django 5.2.10 on 2026-10-19 09:40
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_stale_exports(apps, schema_editor):
+    """Give unfinished exports a deadline and keep one active export per user."""
+    DataExport = apps.get_model('jokes', 'DataExport')
+    active = DataExport.objects.filter(status__in=['pending', 'running'])
+
+    for export in DataExport.objects.filter(expires_at__isnull=True):
+        export.expires_at = export.requested_at + timedelta(hours=1)
+        export.save(update_fields=['expires_at'])
+
+    active.filter(expires_at__lte=timezone.now()).update(status='failed', error='Timed out.')
+
+    seen_users = set()
+    for export in active.order_by('user_id', '-requested_at'):
+        if export.user_id in seen_users:
+            DataExport.objects.filter(pk=export.pk).update(status='failed', error='Superseded.')
+        seen_users.add(export.user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jokes', '0017_accountdeletion_attempts_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_stale_exports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dataexport',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('user',), name='dataexport_one_active_per_user'),
+        ),
+    ]
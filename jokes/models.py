@@ -1,11 +1,12 @@
+import uuid
+
 from django.conf import settings
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
-from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 import pgtrigger
 
-from .managers import JokeManager
+from .managers import JokeManager, SavedJokeManager
 
 
 class Format(models.Model):
@@ -91,6 +92,9 @@ class Joke(models.Model):
     # Manager
     objects = JokeManager()
 
+    # Natural key, stable across environments (export_jokes/import_jokes)
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+
     # Content
     text = models.TextField(help_text="Full joke text for one-liners or complete jokes")
     setup = models.TextField(blank=True, help_text="Setup for two-part jokes")
@@ -117,9 +121,6 @@ class Joke(models.Model):
         help_text='Auto-generated share card image for social media'
     )
 
-    # Track original text for change detection
-    _original_text = None
-
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -130,43 +131,40 @@ class Joke(models.Model):
             GinIndex(fields=['search_vector'], name='joke_search_vector_idx'),
         ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._original_text = self.text if self.pk else None
-
     def save(self, *args, **kwargs):
-        # Check if we need to regenerate share image
-        regenerate = False
-        if self.pk:
-            # Existing joke - check if text changed
-            if self._original_text != self.text:
-                regenerate = True
-        else:
-            # New joke - always generate
-            regenerate = True
-
-        # Generate share image if needed (after first save to ensure pk exists)
-        if not regenerate and not self.share_image:
-            regenerate = True
-
-        # Save first to ensure pk exists
-        super().save(*args, **kwargs)
-
-        # Generate share image after save
-        if regenerate:
-            self._generate_share_image()
-            # Save again with the image (avoid recursion by using update)
-            Joke.objects.filter(pk=self.pk).update(share_image=self.share_image.name)
-
-        self._original_text = self.text
-
-    def _generate_share_image(self):
-        """Generate themed share card PNG."""
-        from .share_cards import generate_share_card_png
-
-        png_buffer = generate_share_card_png(self)
-        filename = f'joke-{self.pk}.png'
-        self.share_image.save(filename, ContentFile(png_buffer.read()), save=False)
+        # Save first to ensure pk exists; the post_save change feed entry
+        # commits together with the card update
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.refresh_share_image(record_change=False)
+
+    def refresh_share_image(self, record_change=True):
+        """
+        Point share_image at the card for the joke's current content.
+
+        Cards are content-addressed (template, text, badge, size), so an
+        unchanged joke reuses its stored PNG and any input change - tone
+        included - resolves to a new card that is rendered once.
+
+        record_change=False skips the change feed entry for callers that
+        record one themselves (save() and the tag signals).
+        """
+        from .changes import record_joke_changes
+        from .conditional import bump_catalog_version
+        from .documents import invalidate_joke_document
+        from .share_cards import get_or_create_share_card
+        from .share_pages import invalidate_share_page
+
+        name = get_or_create_share_card(self)
+        if self.share_image.name != name:
+            self.share_image.name = name
+            # Avoid recursion by using update
+            Joke.objects.filter(pk=self.pk).update(share_image=name)
+            invalidate_share_page(self.pk)
+            invalidate_joke_document(self.pk)
+            bump_catalog_version()
+            if record_change:
+                record_joke_changes([self.pk])
 
     def __str__(self):
         return self.text[:50] + ('...' if len(self.text) > 50 else '')
@@ -231,6 +229,11 @@ class Collection(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     is_default = models.BooleanField(default=False)
+    joke_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Denormalized count of saved jokes, maintained by database triggers'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -238,10 +241,54 @@ class Collection(models.Model):
         ordering = ['-is_default', 'name']
         unique_together = [['user', 'name']]
 
+    def save(self, *args, **kwargs):
+        # joke_count belongs to the SavedJoke triggers; writing back the value
+        # read with this instance would undo their changes since then
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'joke_count']
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.user.email})"
 
 
+@pgtrigger.register(
+    pgtrigger.Trigger(
+        name='savedjoke_collection_count_insert',
+        operation=pgtrigger.Insert,
+        when=pgtrigger.After,
+        condition=pgtrigger.Q(new__collection__isnull=False),
+        func=(
+            'UPDATE jokes_collection SET joke_count = joke_count + 1 '
+            'WHERE id = NEW.collection_id; RETURN NULL;'
+        ),
+    ),
+    pgtrigger.Trigger(
+        name='savedjoke_collection_count_delete',
+        operation=pgtrigger.Delete,
+        when=pgtrigger.After,
+        condition=pgtrigger.Q(old__collection__isnull=False),
+        func=(
+            'UPDATE jokes_collection SET joke_count = GREATEST(joke_count - 1, 0) '
+            'WHERE id = OLD.collection_id; RETURN NULL;'
+        ),
+    ),
+    pgtrigger.Trigger(
+        name='savedjoke_collection_count_move',
+        operation=pgtrigger.Update,
+        when=pgtrigger.After,
+        condition=pgtrigger.Q(old__collection__df=pgtrigger.F('new__collection')),
+        func=(
+            'UPDATE jokes_collection SET joke_count = GREATEST(joke_count - 1, 0) '
+            'WHERE id = OLD.collection_id; '
+            'UPDATE jokes_collection SET joke_count = joke_count + 1 '
+            'WHERE id = NEW.collection_id; RETURN NULL;'
+        ),
+    ),
+)
 class SavedJoke(models.Model):
     """A joke saved by a user, optionally in a collection"""
     user = models.ForeignKey(
@@ -264,6 +311,8 @@ class SavedJoke(models.Model):
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SavedJokeManager()
+
     class Meta:
         ordering = ['-created_at']
         unique_together = [['user', 'joke', 'collection']]
@@ -372,3 +421,172 @@ class ShareEvent(models.Model):
     def __str__(self):
         user_str = self.user.email if self.user else 'anonymous'
         return f"{user_str} shared joke {self.joke_id} via {self.platform}"
+
+
+class JokeChange(models.Model):
+    """
+    Append-only change log behind the joke change feed.
+
+    One row per joke create/update/tag change or delete. commit_seq numbers
+    entries in the order they became visible (see jokes.changes) and is the
+    client's sync token. joke_id is a plain column (not a foreign key) so
+    tombstones outlive the joke.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (UPSERT, 'Created or updated'),
+        (DELETE, 'Deleted'),
+    ]
+
+    joke_id = models.BigIntegerField(db_index=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=UPSERT)
+    commit_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text='Position in commit order, assigned once the entry is committed'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(commit_seq__isnull=True),
+                name='jokechange_unsequenced_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.action} joke {self.joke_id} (#{self.pk})"
+
+
+class CatalogSnapshot(models.Model):
+    """
+    Offline catalog bundle for one language and age rating.
+
+    A gzipped SQLite file (jokes, lookups, tag tables and a prebuilt FTS5
+    index) built by the jokes.build_catalog_snapshots task. Files are
+    content-addressed by sha256; change_token is the change feed token the
+    bundle is current to, so clients continue with /jokes/changes/.
+    """
+    language = models.ForeignKey(
+        Language,
+        on_delete=models.CASCADE,
+        related_name='catalog_snapshots'
+    )
+    age_rating = models.ForeignKey(
+        AgeRating,
+        on_delete=models.CASCADE,
+        related_name='catalog_snapshots'
+    )
+    file_name = models.CharField(max_length=255, help_text='Storage name of the .sqlite.gz file')
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField(help_text='Compressed size in bytes')
+    joke_count = models.PositiveIntegerField()
+    change_token = models.BigIntegerField()
+    built_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['language__code', 'age_rating__min_age']
+        unique_together = [['language', 'age_rating']]
+
+    def __str__(self):
+        return f"{self.language.code}/{self.age_rating.slug} snapshot ({self.joke_count} jokes)"
+
+
+class AccountDeletion(models.Model):
+    """
+    Status record of an asynchronous account deletion.
+
+    The account is deactivated when the deletion is requested; the
+    jokes.delete_account_data task then removes the user's rows in
+    bounded batches and finally the user. user_id is a plain column so
+    the record outlives the user.
+
+    updated_at moves with every batch; unfinished deletions that stop
+    moving (killed worker, failed run) are re-queued by
+    jokes.retry_stalled_account_deletions.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    user_id = models.BigIntegerField(db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.JSONField(default=dict, blank=True, help_text='Rows processed per step')
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0, help_text='Failed runs so far')
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-requested_at']
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id} ({self.status})"
+
+
+class DataExport(models.Model):
+    """
+    A user's personal data export (zip of NDJSON files).
+
+    Built by the jokes.export_user_data task and downloadable by its
+    owner until expires_at; expired files are purged by
+    jokes.purge_expired_data_exports. Until it completes, expires_at is
+    the build deadline, after which the export counts as failed. A user
+    has at most one pending or running export.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [PENDING, RUNNING]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='data_exports'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    file_name = models.CharField(max_length=255, blank=True, help_text='Storage name of the zip file')
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    row_counts = models.JSONField(default=dict, blank=True, help_text='Rows written per file')
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['user', 'requested_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='dataexport_one_active_per_user',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Data export {self.pk} for user {self.user_id} ({self.status})"
@@ -0,0 +1,13 @@
+"""
+Pagination for the Jokes API.
+
+- StandardPagination: PageNumberPagination with a client ?page_size= override
+"""
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardPagination(PageNumberPagination):
+    """Page-number pagination (default 20) with ?page_size= up to 1000."""
+
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,26 @@
+"""
+Parsers for the Jokes API.
+
+- MessagePackParser: Request bodies sent as application/msgpack by mobile
+  clients; requires the optional msgpack package
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack request bodies (rating, share, saved-joke POSTs, ...)."""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Return the decoded request body; maps must have string keys."""
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError('MessagePack parse error - %s' % exc)
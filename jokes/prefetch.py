@@ -0,0 +1,74 @@
+"""
+Serializer-driven select_related/prefetch_related planning.
+
+Walks a serializer's readable fields and derives the minimal set of joins
+and prefetches needed to render it without per-row queries:
+- nested ModelSerializer / single RelatedField -> select_related
+- nested ModelSerializer(many=True) -> Prefetch with a recursively planned queryset
+- RelatedField(many=True) (e.g. SlugRelatedField) -> prefetch_related
+
+SerializerMethodFields are opaque and are not planned.
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def get_prefetch_plan(serializer, prefix=''):
+    """
+    Return (select_related paths, prefetch_related lookups) for a serializer.
+
+    Args:
+        serializer: Serializer instance whose fields are inspected
+        prefix: Lookup prefix for nested FK paths (e.g. 'joke__')
+    """
+    select_related = []
+    prefetch_related = []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+
+        path = prefix + field.source
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if isinstance(child, serializers.ModelSerializer):
+                queryset = apply_prefetch_plan(child.Meta.model._default_manager.all(), child)
+                prefetch_related.append(Prefetch(path, queryset=queryset))
+        elif isinstance(field, serializers.ModelSerializer):
+            select_related.append(path)
+            nested_select, nested_prefetch = get_prefetch_plan(field, prefix=f'{path}__')
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch_related.append(path)
+        elif isinstance(field, serializers.RelatedField):
+            # PrimaryKeyRelatedField reads the local <field>_id column
+            if not field.use_pk_only_optimization():
+                select_related.append(path)
+
+    return select_related, prefetch_related
+
+
+def apply_prefetch_plan(queryset, serializer):
+    """Apply the serializer's select_related/prefetch_related plan to a queryset."""
+    select_related, prefetch_related = get_prefetch_plan(serializer)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class PrefetchPlanMixin:
+    """
+    Viewset mixin adding plan_queryset() for serializer-driven prefetching.
+
+    Viewsets call plan_queryset() for the actions that render querysets,
+    so write-only actions do not pay for joins they never read.
+    """
+
+    def plan_queryset(self, queryset, serializer_class=None):
+        """Apply the prefetch plan of serializer_class (default: active serializer)."""
+        serializer_class = serializer_class or self.get_serializer_class()
+        return apply_prefetch_plan(queryset, serializer_class(context=self.get_serializer_context()))
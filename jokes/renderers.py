@@ -0,0 +1,194 @@
+"""
+Renderers for the Jokes API.
+
+- RawJSON: Pre-rendered JSON spliced into responses without deserializing
+- JSONStream: JSON array rendered lazily, chunk by chunk
+- ORJSONRenderer: Drop-in JSONRenderer using orjson when it is installed;
+  iter_render() yields large payloads incrementally
+- MessagePackRenderer: Compact binary alternative (application/msgpack)
+  for mobile clients; requires the optional msgpack package
+- NDJSONRenderer: application/x-ndjson for streamed exports
+"""
+import json
+import uuid
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class RawJSON:
+    """
+    Already-rendered JSON (bytes) to embed in response data as-is.
+
+    ORJSONRenderer splices the bytes into its output directly; other
+    renderers fall back to the decoded value via loads().
+    """
+
+    __slots__ = ('body',)
+
+    def __init__(self, body):
+        self.body = body
+
+    def loads(self):
+        return json.loads(self.body)
+
+
+class JSONStream:
+    """
+    A JSON array whose items are produced lazily, one chunk at a time.
+
+    `chunks` yields lists of already-serialized items (e.g. one serializer
+    `.data` per batch of model instances). ORJSONRenderer.iter_render()
+    renders and sends each chunk before the next one is produced.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+
+def _replace_stream(data, placeholder):
+    """Return (data with the JSONStream swapped for placeholder, stream)."""
+    if isinstance(data, JSONStream):
+        return placeholder, data
+    if isinstance(data, dict):
+        for key, value in data.items():
+            replaced, stream = _replace_stream(value, placeholder)
+            if stream is not None:
+                return {**data, key: replaced}, stream
+    return data, None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """DRF JSON encoder that decodes RawJSON fragments."""
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return obj.loads()
+        return super().default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, producing the same bytes as JSONRenderer.
+
+    Types orjson would encode differently (datetimes, dates, times) are passed
+    through to DRF's encoder. Falls back to JSONRenderer when orjson is not
+    installed, or when indented/non-compact/ASCII-escaped output is requested.
+    RawJSON fragments are spliced in without being decoded.
+    """
+
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+        token = uuid.uuid4().hex
+        fragments = []
+
+        def default(obj):
+            # Emit a unique placeholder string, replaced by the raw bytes below
+            if isinstance(obj, RawJSON):
+                fragments.append(obj.body)
+                return f'{token}:{len(fragments) - 1}'
+            return encoder.default(obj)
+
+        ret = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+
+        # Match JSONRenderer: escape U+2028/U+2029 for strict JavaScript
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+        for index, body in enumerate(fragments):
+            ret = ret.replace(f'"{token}:{index}"'.encode(), body, 1)
+        return ret
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render `data` into JSON incrementally, yielding bytestrings.
+
+        A JSONStream anywhere in `data` (top level or a dict value, e.g. a
+        paginated envelope's results) is emitted chunk by chunk; everything
+        else is rendered once. The concatenated output is byte-identical to
+        render() of the equivalent fully built data.
+        """
+        token = uuid.uuid4().hex
+        data, stream = _replace_stream(data, RawJSON(f'"{token}"'.encode()))
+        if stream is None:
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+
+        envelope = self.render(data, accepted_media_type, renderer_context)
+        prefix, _, suffix = envelope.partition(f'"{token}"'.encode())
+
+        yield prefix + b'['
+        first = True
+        for chunk in stream.chunks:
+            body = self.render(list(chunk), accepted_media_type, renderer_context)
+            if body == b'[]':
+                continue
+            yield body[1:-1] if first else b',' + body[1:-1]
+            first = False
+        yield b']' + suffix
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack renderer, selected with `Accept: application/msgpack`.
+
+    Carries the same data as the JSON renderers: values MessagePack has no
+    type for (datetimes, decimals, UUIDs, lazy strings) are converted as
+    DRF's JSON encoder does, and RawJSON documents are decoded.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into MessagePack bytes."""
+        if data is None:
+            return b''
+
+        encoder = JSONEncoder()
+        return msgpack.packb(data, default=encoder.default, use_bin_type=True)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON (application/x-ndjson) for streamed exports.
+
+    Export views stream their lines directly; this renderer lets clients
+    negotiate the type and formats non-streamed responses (errors) as a
+    single JSON line.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` as one JSON line."""
+        if data is None:
+            return b''
+        return ORJSONRenderer().render(data) + b'\n'
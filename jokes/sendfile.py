@@ -0,0 +1,141 @@
+"""
+File responses that hand the byte transfer to the front proxy.
+
+Django authorizes and resolves the file, then either streams it itself
+(default) or returns an empty response carrying an X-Accel-Redirect (nginx)
+or X-Sendfile (Apache/lighttpd) header so the proxy serves the bytes and the
+WSGI worker is released immediately.
+
+When Django streams the file itself, a single-range Range request (with
+an optional If-Range) is answered with 206 Partial Content; the proxies
+handle ranges natively.
+
+Settings:
+- SENDFILE_MODE: '' (Django streams), 'x-accel-redirect' or 'x-sendfile'
+- SENDFILE_ACCEL_PREFIX: internal nginx location mapped to MEDIA_ROOT
+"""
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+
+
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+# Bytes read per chunk when streaming a range
+RANGE_CHUNK_SIZE = 1 << 16
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single 'bytes=' range, or None.
+
+    None means serve the whole file (no header, a unit other than bytes,
+    multiple ranges or a malformed value). Raises ValueError when the
+    range is unsatisfiable.
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+
+    first, _, last = ranges.strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+
+    if start > end and first and last:
+        return None
+    if start >= size or end < start:
+        raise ValueError('Unsatisfiable range')
+    return start, min(end, size - 1)
+
+
+def _iter_range(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _range_response(request, storage, name, content_type, etag):
+    """Return a 206/416 response for a Range request, or None to send the whole file."""
+    header = request.headers.get('Range')
+    if not header:
+        return None
+
+    if_range = request.headers.get('If-Range')
+    if if_range and (not etag or etag not in parse_etags(if_range)):
+        return None
+
+    size = storage.size(name)
+    try:
+        byte_range = parse_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return None
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        _iter_range(storage.open(name, 'rb'), start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
+
+
+def sendfile_response(storage, name, content_type, request=None, etag=None):
+    """
+    Return a response serving a stored file.
+
+    Falls back to streaming through Django when the storage has no local
+    path (e.g. remote object storage) or no proxy mode is configured.
+    With a request, ranges are honoured (If-Range is checked against the
+    strong etag); the caller still sets the ETag header itself.
+    """
+    mode = getattr(settings, 'SENDFILE_MODE', '')
+
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        path = None
+
+    if mode == X_ACCEL_REDIRECT and path:
+        response = HttpResponse(content_type=content_type)
+        prefix = settings.SENDFILE_ACCEL_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = f'{prefix}/{quote(name)}'
+        return response
+
+    if mode == X_SENDFILE and path:
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+
+    if request is not None:
+        response = _range_response(request, storage, name, content_type, etag)
+        if response is not None:
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+    if request is not None:
+        response['Accept-Ranges'] = 'bytes'
+    return response
@@ -5,7 +5,14 @@ Provides serializers for all 8 models:
 - Lookup serializers: Format, AgeRating, Tone, ContextTag, Language, CultureTag, Source
 - JokeSerializer: Nested detail view with all related models
 - JokeListSerializer: Compact list view with slugs only
+- JokeListFastSerializer: values()-based fast path for JokeListSerializer output
+- SparseFieldsetMixin: ?fields= / ?expand= support for nested serializers
+- CatalogSnapshotSerializer: Offline bundle manifest entries
+- DataExportSerializer: Personal data export status and download link
 """
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import iri_to_uri
 from rest_framework import serializers
 
 from .models import (
@@ -23,9 +30,98 @@ from .models import (
     DailyJoke,
     JokeRating,
     ShareEvent,
+    CatalogSnapshot,
+    DataExport,
 )
 
 
+# =============================================================================
+# Sparse Fieldsets
+# =============================================================================
+
+def parse_field_paths(value):
+    """
+    Parse a ?fields= value into a nested dict of field names.
+
+    'id,text,joke.id' -> {'id': {}, 'text': {}, 'joke': {'id': {}}}
+    Returns None when the parameter was not given.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def parse_expand_paths(value):
+    """
+    Parse a ?expand= value into a set of dotted relation paths.
+
+    Returns None when the parameter was not given (everything expanded).
+    """
+    if value is None:
+        return None
+    return {path.strip() for path in value.split(',') if path.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin pruning and collapsing fields from context.
+
+    Context keys (see parse_field_paths / parse_expand_paths):
+    - fields: nested dict of field names to keep (None keeps all)
+    - expand: set of dotted relation paths to render nested (None expands
+      all). Relations listed in collapsed_fields and not expanded are
+      rendered compactly (slug, code or id).
+
+    Nested serializers resolve their dotted path from their parents, so
+    ?fields=joke.id,joke.text and ?expand=joke.tones work through nesting.
+    """
+
+    # Field name -> (compact field class, kwargs) used when not expanded
+    collapsed_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        path = self._get_field_path()
+
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name, (field_class, kwargs) in self.collapsed_fields.items():
+                if name in fields and '.'.join(path + [name]) not in expand:
+                    fields[name] = field_class(read_only=True, **kwargs)
+
+        selected = self._get_selected_fields(path)
+        if selected:
+            fields = {name: field for name, field in fields.items() if name in selected}
+        return fields
+
+    def _get_field_path(self):
+        """Return field names from the root serializer down to this one."""
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.insert(0, node.field_name)
+            node = node.parent
+        return path
+
+    def _get_selected_fields(self, path):
+        """Return the requested field names at this path, or None for all."""
+        tree = self.context.get('fields')
+        for part in path:
+            if tree is None:
+                break
+            tree = tree.get(part)
+        return tree or None
+
+
 # =============================================================================
 # Lookup Model Serializers
 # =============================================================================
@@ -90,14 +186,25 @@ class SourceSerializer(serializers.ModelSerializer):
 # Joke Serializers
 # =============================================================================
 
-class JokeSerializer(serializers.ModelSerializer):
+class JokeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Full joke serializer with nested related models.
 
     Use for detail views where complete information is needed.
     Excludes search_vector (internal only).
+    Supports ?fields= and ?expand= (relations collapse to slugs/codes/ids).
     """
 
+    collapsed_fields = {
+        'format': (serializers.SlugRelatedField, {'slug_field': 'slug'}),
+        'age_rating': (serializers.SlugRelatedField, {'slug_field': 'slug'}),
+        'language': (serializers.SlugRelatedField, {'slug_field': 'code'}),
+        'source': (serializers.PrimaryKeyRelatedField, {}),
+        'tones': (serializers.SlugRelatedField, {'slug_field': 'slug', 'many': True}),
+        'context_tags': (serializers.SlugRelatedField, {'slug_field': 'slug', 'many': True}),
+        'culture_tags': (serializers.SlugRelatedField, {'slug_field': 'slug', 'many': True}),
+    }
+
     # Nested serializers for related models (read_only)
     format = FormatSerializer(read_only=True)
     age_rating = AgeRatingSerializer(read_only=True)
@@ -140,12 +247,13 @@ class JokeSerializer(serializers.ModelSerializer):
         return None
 
 
-class JokeListSerializer(serializers.ModelSerializer):
+class JokeListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Compact joke serializer for list views.
 
     Shows truncated text and slugs only for related models.
     Optimized for bandwidth when displaying many jokes.
+    Supports ?fields= (relations are already compact).
     """
 
     # Truncated text via SerializerMethodField
@@ -192,6 +300,104 @@ class JokeListSerializer(serializers.ModelSerializer):
         return None
 
 
+class JokeListFastSerializer:
+    """
+    Fast path for JokeListSerializer output on list endpoints.
+
+    Builds dicts straight from values() rows plus one tone-slug query per
+    page, bypassing per-field DRF machinery. Produces the same JSON as
+    JokeListSerializer (same keys, order and values), honouring ?fields=
+    via context['fields'] by selecting only the needed columns.
+
+    Usage:
+        rows = paginate(JokeListFastSerializer.get_queryset(queryset))
+        data = JokeListFastSerializer(rows, context={'request': request}).data
+    """
+
+    # Output field -> values() column (tones come from a separate query)
+    field_columns = {
+        'id': 'id',
+        'text': 'text',
+        'format': 'format__slug',
+        'age_rating': 'age_rating__slug',
+        'tones': None,
+        'share_image_url': 'share_image',
+    }
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @classmethod
+    def get_field_names(cls, context=None):
+        """Return output field names, pruned by context['fields'] if given."""
+        selected = (context or {}).get('fields')
+        if not selected:
+            return list(cls.field_columns)
+        return [name for name in cls.field_columns if name in selected]
+
+    @classmethod
+    def get_queryset(cls, queryset, context=None):
+        """Reduce a Joke queryset to the columns the list payload needs."""
+        columns = ['id']
+        for name in cls.get_field_names(context):
+            column = cls.field_columns[name]
+            if column and column not in columns:
+                columns.append(column)
+        return queryset.values(*columns)
+
+    def get_tone_slugs(self, joke_ids):
+        """Map joke id -> list of tone slugs with a single query."""
+        tone_slugs = {joke_id: [] for joke_id in joke_ids}
+        rows = Tone.objects.filter(jokes__in=joke_ids).values_list('jokes', 'slug')
+        for joke_id, slug in rows:
+            tone_slugs[joke_id].append(slug)
+        return tone_slugs
+
+    def get_share_image_url_builder(self):
+        """Return a function mapping a share_image name to JokeListSerializer's URL."""
+        storage = Joke._meta.get_field('share_image').storage
+        request = self.context.get('request')
+        if request is None:
+            return storage.url
+
+        # build_absolute_uri() on a path only prefixes scheme and host
+        scheme_host = request.build_absolute_uri('/')[:-1]
+
+        def build(name):
+            url = storage.url(name)
+            if url.startswith('/') and not url.startswith('//'):
+                return iri_to_uri(scheme_host + url)
+            return request.build_absolute_uri(url)
+
+        return build
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        field_names = self.get_field_names(self.context)
+        if 'tones' in field_names:
+            tone_slugs = self.get_tone_slugs([row['id'] for row in rows])
+        share_image_url = self.get_share_image_url_builder()
+
+        data = []
+        for row in rows:
+            item = {}
+            for name in field_names:
+                if name == 'text':
+                    text = row['text']
+                    item['text'] = text[:100] + '...' if len(text) > 100 else text
+                elif name == 'tones':
+                    item['tones'] = tone_slugs[row['id']]
+                elif name == 'share_image_url':
+                    image_name = row['share_image']
+                    item['share_image_url'] = share_image_url(image_name) if image_name else None
+                else:
+                    item[name] = row[self.field_columns[name]]
+            data.append(item)
+        return data
+
+
 # =============================================================================
 # UserPreference Serializers
 # =============================================================================
@@ -291,14 +497,15 @@ class UserPreferenceUpdateSerializer(serializers.ModelSerializer):
 # Collection and SavedJoke Serializers
 # =============================================================================
 
-class CollectionSerializer(serializers.ModelSerializer):
+class CollectionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Read-only serializer for collections with joke count.
 
     Use for GET requests to display collection details.
+    joke_count is a denormalized column maintained by database triggers.
     """
 
-    joke_count = serializers.SerializerMethodField()
+    joke_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Collection
@@ -313,10 +520,6 @@ class CollectionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'is_default', 'created_at', 'updated_at']
 
-    def get_joke_count(self, obj):
-        """Return the number of jokes in this collection."""
-        return obj.saved_jokes.count()
-
 
 class CollectionCreateSerializer(serializers.ModelSerializer):
     """
@@ -347,13 +550,19 @@ class CollectionCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class SavedJokeSerializer(serializers.ModelSerializer):
+class SavedJokeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Read-only serializer for saved jokes with nested joke and collection.
 
     Use for GET requests to display saved joke details.
+    Supports ?fields= and ?expand= (joke/collection collapse to ids).
     """
 
+    collapsed_fields = {
+        'joke': (serializers.PrimaryKeyRelatedField, {}),
+        'collection': (serializers.PrimaryKeyRelatedField, {}),
+    }
+
     joke = JokeListSerializer(read_only=True)
     collection = CollectionSerializer(read_only=True)
 
@@ -421,17 +630,110 @@ class SavedJokeCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+# Most items accepted by one bulk saved-joke request
+SAVED_JOKE_BULK_LIMIT = 500
+
+
+class UserCollectionField(serializers.PrimaryKeyRelatedField):
+    """Nullable collection id that must belong to the requesting user."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Collection.objects.all())
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        return Collection.objects.filter(user=self.context['request'].user)
+
+
+def validate_unique_ids(value, queryset, label):
+    """
+    Deduplicate ids and check they all exist in queryset, in one query.
+
+    Returns the ids in request order.
+    """
+    ids = list(dict.fromkeys(value))
+    found = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        raise serializers.ValidationError(f'Unknown {label}: {missing}')
+    return ids
+
+
+class SavedJokeBulkSaveSerializer(serializers.Serializer):
+    """
+    Save many jokes to one collection (or none).
+
+    Use for POST /saved-jokes/bulk-save/. Joke ids and collection
+    ownership are validated with one query each.
+    """
+
+    joke_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=SAVED_JOKE_BULK_LIMIT,
+    )
+    collection = UserCollectionField()
+    note = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_joke_ids(self, value):
+        return validate_unique_ids(value, Joke.objects.all(), 'joke ids')
+
+
+class SavedJokeBulkMoveSerializer(serializers.Serializer):
+    """
+    Move many of the user's saved jokes to one collection (or none).
+
+    Use for POST /saved-jokes/bulk-move/.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=SAVED_JOKE_BULK_LIMIT,
+    )
+    collection = UserCollectionField()
+
+    def validate_ids(self, value):
+        user = self.context['request'].user
+        return validate_unique_ids(value, SavedJoke.objects.filter(user=user), 'saved joke ids')
+
+
+class SavedJokeBulkRemoveSerializer(serializers.Serializer):
+    """
+    Remove many of the user's saved jokes.
+
+    Use for POST /saved-jokes/bulk-remove/.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=SAVED_JOKE_BULK_LIMIT,
+    )
+
+    def validate_ids(self, value):
+        user = self.context['request'].user
+        return validate_unique_ids(value, SavedJoke.objects.filter(user=user), 'saved joke ids')
+
+
 # =============================================================================
 # DailyJoke Serializers
 # =============================================================================
 
-class DailyJokeSerializer(serializers.ModelSerializer):
+class DailyJokeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for daily jokes with nested joke details.
 
     Use for displaying today's personalized joke and joke history.
+    Supports ?fields= and ?expand= (joke collapses to its id).
     """
 
+    collapsed_fields = {
+        'joke': (serializers.PrimaryKeyRelatedField, {}),
+    }
+
     joke = JokeSerializer(read_only=True)
 
     class Meta:
@@ -472,3 +774,74 @@ class ShareEventSerializer(serializers.ModelSerializer):
         model = ShareEvent
         fields = ['id', 'joke', 'platform', 'created_at']
         read_only_fields = ['id', 'created_at']
+
+
+# =============================================================================
+# CatalogSnapshot Serializers
+# =============================================================================
+
+class CatalogSnapshotSerializer(serializers.ModelSerializer):
+    """
+    Serializer for offline catalog bundles.
+
+    url points at the gzipped SQLite file (immutable, range requests
+    supported); change_token is the ?since= value to resume the change
+    feed from after importing it.
+    """
+    language = serializers.SlugRelatedField(slug_field='code', read_only=True)
+    age_rating = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    url = serializers.SerializerMethodField()
+    change_token = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = CatalogSnapshot
+        fields = [
+            'language',
+            'age_rating',
+            'url',
+            'sha256',
+            'size',
+            'joke_count',
+            'change_token',
+            'built_at',
+        ]
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        url = reverse('catalog-snapshot-file', args=[obj.file_name.rsplit('/', 1)[-1]])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+# =============================================================================
+# DataExport Serializers
+# =============================================================================
+
+class DataExportSerializer(serializers.ModelSerializer):
+    """
+    Serializer for personal data exports.
+
+    download_url is set once the export is completed and until it expires.
+    """
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DataExport
+        fields = [
+            'id',
+            'status',
+            'size',
+            'row_counts',
+            'download_url',
+            'requested_at',
+            'finished_at',
+            'expires_at',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != DataExport.COMPLETED or obj.expires_at <= timezone.now():
+            return None
+        url = reverse('data-export-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
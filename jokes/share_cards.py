@@ -1,8 +1,16 @@
 """Share card generation using SVG templates and CairoSVG."""
+import hashlib
 import io
+import re
+from datetime import timedelta
+from functools import lru_cache
 
 import cairosvg
-from django.template.loader import render_to_string
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
 
 
 # Tone slug to template mapping
@@ -13,6 +21,38 @@ TONE_TEMPLATES = {
 }
 DEFAULT_TEMPLATE = 'jokes/share_cards/base_card.svg'
 
+# Default output size (Open Graph recommended 1.91:1)
+DEFAULT_SIZE = (1200, 630)
+
+# Preset variant sizes served by the card endpoint (name -> width, height)
+CARD_SIZES = {
+    'large': DEFAULT_SIZE,
+    'medium': (600, 315),
+    'small': (400, 210),
+    'thumb': (200, 105),
+}
+
+# Variant output formats (extension -> content type)
+CARD_FORMATS = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+WEBP_QUALITY = 80
+
+# Storage directory for rendered cards (matches Joke.share_image upload_to)
+SHARE_CARD_DIR = 'share-cards'
+
+# Base card names produced by get_card_name() ('share-cards/<sha256>.png')
+CARD_NAME_RE = re.compile(rf'^{SHARE_CARD_DIR}/[0-9a-f]{{64}}\.png$')
+
+# Stored card files: base '<key>.png' or variant '<key>-<size>.<fmt>'
+CARD_FILENAME_RE = re.compile(r'^[0-9a-f]{64}(-[a-z]+)?\.(png|webp)$')
+LEGACY_CARD_FILENAME_RE = re.compile(r'^joke-\d+(_\w+)?\.png$')
+
+# Cache keys for hit-rate counters
+STATS_HITS_KEY = 'share_cards:hits'
+STATS_MISSES_KEY = 'share_cards:misses'
+
 
 def get_template_for_joke(joke):
     """Get the appropriate SVG template based on joke's primary tone."""
@@ -28,28 +68,322 @@ def get_badge_text(joke):
     return tone.name if tone else 'Joke'
 
 
-def generate_share_card_png(joke):
+def get_card_inputs(joke):
     """
-    Generate share card PNG for a joke.
+    Resolve template name and badge text for a joke with a single tone query.
 
-    Returns BytesIO buffer containing PNG data.
+    Returns (template_name, badge_text) tuple.
     """
-    template_name = get_template_for_joke(joke)
-    badge_text = get_badge_text(joke)
+    return get_card_inputs_for_tone(joke.tones.first())
+
+
+def get_card_inputs_for_tone(tone):
+    """Return (template_name, badge_text) for a primary tone (or None)."""
+    if tone:
+        return TONE_TEMPLATES.get(tone.slug, DEFAULT_TEMPLATE), tone.name
+    return DEFAULT_TEMPLATE, 'Joke'
 
-    # Render SVG with joke data
+
+@lru_cache(maxsize=None)
+def get_template_version(template_name):
+    """
+    Return a short hash of the template source.
+
+    Editing an SVG template changes its version, which changes every
+    card key rendered from it. Cached per process.
+    """
+    source = get_template(template_name).template.source
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+
+
+def get_card_key(template_name, joke_text, badge_text, size=DEFAULT_SIZE):
+    """
+    Content hash identifying a rendered share card.
+
+    Covers every input that affects the output pixels: template name,
+    template version, joke text, badge text and output size.
+    """
+    width, height = size
+    parts = [
+        template_name,
+        get_template_version(template_name),
+        joke_text,
+        badge_text,
+        f'{width}x{height}',
+    ]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_card_name(key, fmt='png'):
+    """Return the storage name for a card key."""
+    return f'{SHARE_CARD_DIR}/{key}.{fmt}'
+
+
+def render_share_card_png(template_name, joke_text, badge_text, size=DEFAULT_SIZE):
+    """Render SVG template to PNG bytes."""
     svg_content = render_to_string(template_name, {
-        'joke_text': joke.text,
+        'joke_text': joke_text,
         'badge_text': badge_text,
     })
 
-    # Convert to PNG
+    width, height = size
     png_buffer = io.BytesIO()
     cairosvg.svg2png(
         bytestring=svg_content.encode('utf-8'),
         write_to=png_buffer,
-        output_width=1200,
-        output_height=630
+        output_width=width,
+        output_height=height
     )
-    png_buffer.seek(0)
-    return png_buffer
+    return png_buffer.getvalue()
+
+
+def render_share_card(template_name, joke_text, badge_text, size=DEFAULT_SIZE, fmt='png'):
+    """Render SVG template to PNG or WebP bytes."""
+    png_bytes = render_share_card_png(template_name, joke_text, badge_text, size)
+    if fmt == 'png':
+        return png_bytes
+
+    # CairoSVG only emits PNG - transcode with Pillow
+    output = io.BytesIO()
+    with Image.open(io.BytesIO(png_bytes)) as image:
+        image.save(output, format='WEBP', quality=WEBP_QUALITY, method=6)
+    return output.getvalue()
+
+
+def generate_share_card_png(joke):
+    """
+    Generate share card PNG for a joke.
+
+    Returns BytesIO buffer containing PNG data.
+    """
+    template_name, badge_text = get_card_inputs(joke)
+    return io.BytesIO(render_share_card_png(template_name, joke.text, badge_text))
+
+
+def get_share_card_storage():
+    """Return the storage backend used by Joke.share_image."""
+    from .models import Joke
+    return Joke._meta.get_field('share_image').storage
+
+
+def get_or_create_share_card(joke, size=DEFAULT_SIZE):
+    """
+    Return the storage name of the share card for a joke's current content.
+
+    Reuses a stored PNG when one with the same content hash exists,
+    otherwise renders and stores it. Records hit/miss counters.
+    """
+    template_name, badge_text = get_card_inputs(joke)
+    name, _ = store_share_card(template_name, joke.text, badge_text, size)
+    return name
+
+
+def store_share_card(template_name, joke_text, badge_text, size=DEFAULT_SIZE):
+    """
+    Render and store a share card unless an identical one is already stored.
+
+    Returns (storage name, rendered) tuple.
+    """
+    key = get_card_key(template_name, joke_text, badge_text, size)
+    name = get_card_name(key)
+
+    storage = get_share_card_storage()
+    if storage.exists(name):
+        _incr_stat(STATS_HITS_KEY)
+        return name, False
+
+    _incr_stat(STATS_MISSES_KEY)
+    png_bytes = render_share_card_png(template_name, joke_text, badge_text, size)
+    saved_name = storage.save(name, ContentFile(png_bytes))
+    if saved_name != name:
+        # Another worker stored the same card concurrently - keep theirs
+        storage.delete(saved_name)
+    return name, True
+
+
+def get_primary_tone_ids(joke_ids):
+    """
+    Return {joke_id: tone_id} of each joke's primary tone in one query.
+
+    The primary tone is the lowest tone id, as joke.tones.first() picks.
+    """
+    from .models import Joke
+
+    primary_tone_ids = {}
+    through_rows = Joke.tones.through.objects.filter(
+        joke_id__in=joke_ids
+    ).order_by('joke_id', 'tone_id').values_list('joke_id', 'tone_id')
+    for joke_id, tone_id in through_rows:
+        primary_tone_ids.setdefault(joke_id, tone_id)
+    return primary_tone_ids
+
+
+def refresh_share_cards(joke_ids):
+    """
+    Point share_image at the current card for many jokes at once.
+
+    Like Joke.refresh_share_image() for a batch: two queries to resolve
+    inputs, one bulk UPDATE for changed rows. Used for jokes inserted
+    without Joke.save() (bulk loads). Returns the ids whose card changed.
+    """
+    from .models import Joke, Tone
+
+    jokes = Joke.objects.filter(pk__in=joke_ids).only('text', 'share_image')
+    primary_tone_ids = get_primary_tone_ids(joke_ids)
+    tones = Tone.objects.in_bulk(set(primary_tone_ids.values()))
+
+    changed = []
+    for joke in jokes:
+        template_name, badge_text = get_card_inputs_for_tone(
+            tones.get(primary_tone_ids.get(joke.pk))
+        )
+        name, _ = store_share_card(template_name, joke.text, badge_text)
+        if joke.share_image.name != name:
+            joke.share_image.name = name
+            changed.append(joke)
+
+    if changed:
+        Joke.objects.bulk_update(changed, ['share_image'])
+    return [joke.pk for joke in changed]
+
+
+def get_card_key_from_name(name):
+    """Return the content key embedded in a share card storage name."""
+    return name.rsplit('/', 1)[-1].split('.', 1)[0].split('-', 1)[0]
+
+
+def ensure_share_card(joke):
+    """
+    Make sure a joke points at a content-addressed base card.
+
+    Returns the base card's content key.
+    """
+    if not CARD_NAME_RE.match(joke.share_image.name or ''):
+        # Missing or legacy 'joke-<pk>.png' card - content-address it first
+        joke.refresh_share_image()
+    return get_card_key_from_name(joke.share_image.name)
+
+
+def get_variant_name(base_name, size_name, fmt):
+    """
+    Return the storage name of a card variant.
+
+    Variants derive from the base card's content key, so they change
+    whenever the base card does and can be cached forever.
+    """
+    return f'{SHARE_CARD_DIR}/{get_card_key_from_name(base_name)}-{size_name}.{fmt}'
+
+
+def get_or_create_share_card_variant(joke, size_name, fmt):
+    """
+    Return the storage name of a size/format variant of a joke's share card.
+
+    Renders from the same SVG on first request and stores the result;
+    later calls only check storage. The full-size PNG is the base card.
+    """
+    ensure_share_card(joke)
+
+    if size_name == 'large' and fmt == 'png':
+        return joke.share_image.name
+
+    name = get_variant_name(joke.share_image.name, size_name, fmt)
+    storage = get_share_card_storage()
+    if storage.exists(name):
+        _incr_stat(STATS_HITS_KEY)
+        return name
+
+    _incr_stat(STATS_MISSES_KEY)
+    template_name, badge_text = get_card_inputs(joke)
+    image_bytes = render_share_card(
+        template_name, joke.text, badge_text, CARD_SIZES[size_name], fmt
+    )
+    saved_name = storage.save(name, ContentFile(image_bytes))
+    if saved_name != name:
+        storage.delete(saved_name)
+    return name
+
+
+def _incr_stat(key):
+    """Increment a hit-rate counter in the shared cache."""
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def get_share_card_stats():
+    """
+    Return share card cache counters.
+
+    Returns dict with hits, misses and hit_rate (0.0-1.0, None if no lookups).
+    """
+    hits = cache.get(STATS_HITS_KEY, 0)
+    misses = cache.get(STATS_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else None,
+    }
+
+
+def reset_share_card_stats():
+    """Reset share card cache counters."""
+    cache.delete_many([STATS_HITS_KEY, STATS_MISSES_KEY])
+
+
+def collect_unreferenced_share_cards(grace_period=timedelta(hours=1), dry_run=False):
+    """
+    Delete stored share cards no joke references.
+
+    Files modified within grace_period are kept, so a card rendered by a
+    save that has not yet updated its joke row is never removed.
+
+    Returns dict with scanned, deleted and kept counts.
+    """
+    from .models import Joke
+
+    storage = get_share_card_storage()
+    stats = {'scanned': 0, 'deleted': 0, 'kept': 0}
+
+    try:
+        _, files = storage.listdir(SHARE_CARD_DIR)
+    except FileNotFoundError:
+        return stats
+
+    referenced = set(
+        Joke.objects.exclude(share_image='').values_list('share_image', flat=True)
+    )
+    referenced_keys = {get_card_key_from_name(name) for name in referenced}
+    cutoff = timezone.now() - grace_period
+
+    for filename in files:
+        stats['scanned'] += 1
+        name = f'{SHARE_CARD_DIR}/{filename}'
+        if name in referenced or _is_referenced_variant(filename, referenced_keys):
+            stats['kept'] += 1
+            continue
+
+        try:
+            if storage.get_modified_time(name) > cutoff:
+                stats['kept'] += 1
+                continue
+        except NotImplementedError:
+            pass
+
+        if not dry_run:
+            storage.delete(name)
+        stats['deleted'] += 1
+
+    return stats
+
+
+def _is_referenced_variant(filename, referenced_keys):
+    """Check whether a '<key>-<size>.<fmt>' file belongs to a referenced card."""
+    stem = filename.split('.', 1)[0]
+    if '-' not in stem:
+        return False
+    key, size_name = stem.split('-', 1)
+    return size_name in CARD_SIZES and key in referenced_keys
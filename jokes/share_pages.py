@@ -0,0 +1,75 @@
+"""
+Cached rendering of the public joke share page.
+
+Share pages are hit by social media crawlers at huge fan-out when a joke
+goes viral. Rendered HTML is cached per joke (one entry holding every
+host/scheme variant) and invalidated whenever the joke, its tones or its
+share card change, once the change commits.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
+from django.template.loader import render_to_string
+
+from .models import Joke, Tone
+
+
+SHARE_PAGE_CACHE_KEY = 'share_page:{pk}'
+SHARE_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_share_page(request, pk):
+    """
+    Return (html, etag, last_modified) for a joke's share page.
+
+    Served from cache when possible; otherwise costs a single query.
+    Raises Http404 if the joke does not exist.
+    """
+    cache_key = SHARE_PAGE_CACHE_KEY.format(pk=pk)
+    canonical_url = request.build_absolute_uri(request.path)
+
+    variants = cache.get(cache_key) or {}
+    if canonical_url in variants:
+        return variants[canonical_url]
+
+    # Primary tone (lowest id, as share cards use) resolved in the same query
+    primary_tone = Tone.objects.filter(jokes=OuterRef('pk')).order_by('pk')
+    joke = Joke.objects.only('text', 'share_image', 'updated_at').annotate(
+        badge_text=Subquery(primary_tone.values('name')[:1])
+    ).filter(pk=pk).first()
+    if joke is None:
+        raise Http404('No Joke matches the given query.')
+
+    share_image_url = ''
+    if joke.share_image:
+        share_image_url = request.build_absolute_uri(joke.share_image.url)
+
+    html = render_to_string('jokes/share.html', {
+        'joke': joke,
+        'share_image_url': share_image_url,
+        'canonical_url': canonical_url,
+        'badge_text': joke.badge_text,
+    }, request=request)
+
+    # ETag covers the rendered bytes, so tone/card changes that leave
+    # updated_at untouched still produce a new validator
+    etag = '"%s"' % hashlib.md5(html.encode('utf-8')).hexdigest()
+    page = (html, etag, joke.updated_at)
+
+    variants[canonical_url] = page
+    cache.set(cache_key, variants, SHARE_PAGE_CACHE_TIMEOUT)
+    return page
+
+
+def invalidate_share_page(pk):
+    """Drop all cached share page variants for a joke once the transaction commits."""
+    invalidate_share_pages([pk])
+
+
+def invalidate_share_pages(pks):
+    """Drop cached share pages for several jokes once the transaction commits."""
+    keys = [SHARE_PAGE_CACHE_KEY.format(pk=pk) for pk in pks]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 
@@ -21,3 +22,228 @@ def create_default_collection(sender, instance, created, **kwargs):
             name='Favorites',
             is_default=True
         )
+
+
+@receiver(m2m_changed, sender='jokes.Joke_tones')
+def refresh_share_image_on_tone_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-point share cards when a joke's tones change (tone picks the template and badge)."""
+    from .models import Joke
+
+    if reverse and action == 'pre_clear':
+        # pk_set is None on post_clear - remember affected jokes now
+        instance._share_card_joke_ids = list(instance.jokes.values_list('pk', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    # record_joke_change_on_tag_change records the change feed entries
+    if not reverse:
+        instance.refresh_share_image(record_change=False)
+        return
+
+    if action == 'post_clear':
+        joke_ids = getattr(instance, '_share_card_joke_ids', [])
+    else:
+        joke_ids = pk_set or []
+
+    for joke in Joke.objects.filter(pk__in=joke_ids):
+        joke.refresh_share_image(record_change=False)
+
+
+@receiver(post_save, sender='jokes.Tone')
+def refresh_share_images_on_tone_save(sender, instance, created, **kwargs):
+    """
+    Re-point share cards of tagged jokes when a tone is renamed (badge text).
+
+    A tone can tag thousands of jokes, so rendering is queued in batches
+    to jokes.generate_share_cards after commit instead of run in the request.
+    """
+    if created:
+        return
+    from django.db import transaction
+    from .ingest import iter_batches
+    from .tasks import generate_share_cards
+
+    joke_ids = instance.jokes.values_list('pk', flat=True).iterator()
+    for batch in iter_batches(joke_ids, 1000):
+        transaction.on_commit(lambda ids=batch: generate_share_cards.delay(ids))
+
+
+@receiver([post_save, post_delete], sender='jokes.Joke')
+def invalidate_share_page_on_joke_change(sender, instance, **kwargs):
+    """Drop the cached public share page when a joke is edited or deleted."""
+    from .share_pages import invalidate_share_page
+    invalidate_share_page(instance.pk)
+
+
+@receiver([post_save, post_delete], sender='jokes.Joke')
+def invalidate_joke_document_on_joke_change(sender, instance, **kwargs):
+    """Drop the precomputed JokeSerializer document when a joke changes."""
+    from .documents import invalidate_joke_document
+    invalidate_joke_document(instance.pk)
+
+
+@receiver(m2m_changed, sender='jokes.Joke_tones')
+@receiver(m2m_changed, sender='jokes.Joke_context_tags')
+@receiver(m2m_changed, sender='jokes.Joke_culture_tags')
+def invalidate_joke_document_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop precomputed documents when joke tags change (from either side)."""
+    from .documents import (
+        bump_document_version,
+        invalidate_joke_document,
+        invalidate_joke_documents,
+    )
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        invalidate_joke_document(instance.pk)
+    elif action == 'post_clear':
+        # Affected jokes are unknown after a reverse clear
+        bump_document_version()
+    else:
+        invalidate_joke_documents(pk_set or [])
+
+
+def invalidate_joke_documents_on_lookup_change(sender, **kwargs):
+    """Lookup rows are embedded in every document - invalidate them all."""
+    from .documents import bump_document_version
+    bump_document_version()
+
+
+for _lookup_model in ('Format', 'AgeRating', 'Language', 'Source', 'Tone', 'ContextTag', 'CultureTag'):
+    post_save.connect(invalidate_joke_documents_on_lookup_change, sender=f'jokes.{_lookup_model}')
+    post_delete.connect(invalidate_joke_documents_on_lookup_change, sender=f'jokes.{_lookup_model}')
+
+
+def invalidate_lookup_registry_on_lookup_change(sender, **kwargs):
+    """Reload lookup tables in every worker once the edit is committed."""
+    from django.db import transaction
+    from .lookups import bump_lookup_version
+    transaction.on_commit(bump_lookup_version)
+
+
+for _lookup_model in ('Format', 'AgeRating', 'Language', 'Tone', 'ContextTag', 'CultureTag'):
+    post_save.connect(invalidate_lookup_registry_on_lookup_change, sender=f'jokes.{_lookup_model}')
+    post_delete.connect(invalidate_lookup_registry_on_lookup_change, sender=f'jokes.{_lookup_model}')
+
+
+def bump_catalog_version_on_change(sender, **kwargs):
+    """Change API validators (ETags) when public joke data changes."""
+    from .conditional import bump_catalog_version
+    if kwargs.get('action', 'post_').startswith('post_'):
+        bump_catalog_version()
+
+
+for _catalog_model in ('Joke', 'Format', 'AgeRating', 'Language', 'Source', 'Tone', 'ContextTag', 'CultureTag'):
+    post_save.connect(bump_catalog_version_on_change, sender=f'jokes.{_catalog_model}')
+    post_delete.connect(bump_catalog_version_on_change, sender=f'jokes.{_catalog_model}')
+
+for _through in ('Joke_tones', 'Joke_context_tags', 'Joke_culture_tags'):
+    m2m_changed.connect(bump_catalog_version_on_change, sender=f'jokes.{_through}')
+
+
+@receiver(post_save, sender='jokes.Joke')
+def record_joke_change_on_save(sender, instance, **kwargs):
+    """Append a change feed entry for a created or edited joke."""
+    from .changes import record_joke_changes
+    record_joke_changes([instance.pk])
+
+
+@receiver(post_delete, sender='jokes.Joke')
+def record_joke_change_on_delete(sender, instance, **kwargs):
+    """Append a change feed tombstone for a deleted joke."""
+    from .changes import record_joke_changes
+    from .models import JokeChange
+    record_joke_changes([instance.pk], action=JokeChange.DELETE)
+
+
+@receiver(m2m_changed, sender='jokes.Joke_tones')
+@receiver(m2m_changed, sender='jokes.Joke_context_tags')
+@receiver(m2m_changed, sender='jokes.Joke_culture_tags')
+def record_joke_change_on_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Append change feed entries for tag edits (they leave updated_at alone)."""
+    from .changes import record_joke_changes
+
+    if reverse and action == 'pre_clear':
+        # pk_set is None on post_clear - remember affected jokes now
+        instance._change_feed_joke_ids = list(
+            instance.jokes.values_list('pk', flat=True)
+        )
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        record_joke_changes([instance.pk])
+    elif action == 'post_clear':
+        record_joke_changes(getattr(instance, '_change_feed_joke_ids', []))
+    else:
+        record_joke_changes(pk_set or [])
+
+
+def record_joke_changes_on_lookup_save(sender, instance, created, **kwargs):
+    """Jokes embed their lookup rows - an edited lookup changes each of them."""
+    from .changes import record_joke_changes
+    if not created:
+        record_joke_changes(instance.jokes.values_list('pk', flat=True))
+
+
+def remember_jokes_on_lookup_delete(sender, instance, **kwargs):
+    """Capture affected jokes before tag rows cascade or source ids are nulled."""
+    instance._change_feed_joke_ids = list(instance.jokes.values_list('pk', flat=True))
+
+
+def record_joke_changes_on_lookup_delete(sender, instance, **kwargs):
+    from .changes import record_joke_changes
+    record_joke_changes(getattr(instance, '_change_feed_joke_ids', []))
+
+
+for _lookup_model in ('Format', 'AgeRating', 'Language', 'Source', 'Tone', 'ContextTag', 'CultureTag'):
+    post_save.connect(record_joke_changes_on_lookup_save, sender=f'jokes.{_lookup_model}')
+    pre_delete.connect(remember_jokes_on_lookup_delete, sender=f'jokes.{_lookup_model}')
+    post_delete.connect(record_joke_changes_on_lookup_delete, sender=f'jokes.{_lookup_model}')
+
+
+@receiver(post_delete, sender='jokes.DataExport')
+def delete_data_export_file(sender, instance, **kwargs):
+    """Remove an export's zip from storage once its record is gone."""
+    if instance.file_name:
+        from django.core.files.storage import default_storage
+        from django.db import transaction
+        transaction.on_commit(lambda: default_storage.delete(instance.file_name))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_auth_user_on_user_change(sender, instance, **kwargs):
+    """Drop the cached auth user when the user row changes."""
+    from .authentication import bump_auth_user_version
+    bump_auth_user_version(instance.pk)
+
+
+@receiver(post_save, sender='jokes.UserPreference')
+@receiver(post_delete, sender='jokes.UserPreference')
+def invalidate_auth_user_on_preference_change(sender, instance, **kwargs):
+    """Drop the cached auth user (which carries the preference) on preference changes."""
+    from .authentication import bump_auth_user_version
+    bump_auth_user_version(instance.user_id)
+
+
+@receiver(post_save, sender='token_blacklist.BlacklistedToken')
+def invalidate_auth_user_on_token_blacklist(sender, instance, created, **kwargs):
+    """Drop the cached auth user on logout (refresh token blacklisted)."""
+    if created and instance.token.user_id:
+        from .authentication import bump_auth_user_version
+        bump_auth_user_version(instance.token.user_id)
+
+
+@receiver(user_logged_out)
+def invalidate_auth_user_on_logout(sender, request, user, **kwargs):
+    """Drop the cached auth user on session logout."""
+    if user is not None and user.pk:
+        from .authentication import bump_auth_user_version
+        bump_auth_user_version(user.pk)
@@ -0,0 +1,303 @@
+"""
+Offline catalog snapshots for mobile clients.
+
+One bundle per language and age rating: a gzipped SQLite database with
+the jokes, lookup tables, tag tables and a prebuilt FTS5 index, so the app
+can browse and search without the API. A bundle for an age rating holds
+jokes of every rating with the same or lower min_age (no min_age counts
+as 0), matching what a user of that rating may see.
+
+Bundles are content-addressed (sha256 in the file name) and recorded as
+CatalogSnapshot rows with the change feed token they are current to;
+clients download a bundle once and continue with /jokes/changes/. The
+token is kept out of the file, so a rebuild with unchanged content keeps
+the same file and only advances the row's token. A superseded file stays
+downloadable (and resumable) for SNAPSHOT_FILE_GRACE_PERIOD before it is
+deleted.
+
+- build_catalog_snapshots(): Rebuild bundles that are behind the change feed
+- build_snapshot_file(): Write one SQLite bundle to a local path
+"""
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .changes import get_change_token
+from .ingest import TAG_FIELDS, iter_batches
+from .models import AgeRating, CatalogSnapshot, ContextTag, CultureTag, Format, Joke, Language, Tone
+from .tasks import delete_catalog_snapshot_file
+
+
+# Storage directory for bundle files
+SNAPSHOT_DIR = 'catalog-snapshots'
+
+# <language>-<age rating>-<sha256 prefix>.sqlite.gz
+SNAPSHOT_FILENAME_RE = re.compile(r'^[\w-]+-[0-9a-f]{16}\.sqlite\.gz$')
+
+# How long a superseded or removed bundle file is still served
+SNAPSHOT_FILE_GRACE_PERIOD = timedelta(days=1)
+
+# Bumped when the SQLite schema changes; stored in the bundle's meta table
+SNAPSHOT_SCHEMA_VERSION = 1
+
+# Rows fetched and inserted per batch
+SNAPSHOT_BATCH_SIZE = 2000
+
+SNAPSHOT_SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE formats (id INTEGER PRIMARY KEY, slug TEXT NOT NULL, name TEXT NOT NULL, description TEXT NOT NULL);
+CREATE TABLE age_ratings (id INTEGER PRIMARY KEY, slug TEXT NOT NULL, name TEXT NOT NULL, description TEXT NOT NULL, min_age INTEGER);
+CREATE TABLE languages (id INTEGER PRIMARY KEY, code TEXT NOT NULL, name TEXT NOT NULL);
+CREATE TABLE tones (id INTEGER PRIMARY KEY, slug TEXT NOT NULL, name TEXT NOT NULL, description TEXT NOT NULL);
+CREATE TABLE context_tags (id INTEGER PRIMARY KEY, slug TEXT NOT NULL, name TEXT NOT NULL, description TEXT NOT NULL);
+CREATE TABLE culture_tags (id INTEGER PRIMARY KEY, slug TEXT NOT NULL, name TEXT NOT NULL, description TEXT NOT NULL);
+CREATE TABLE jokes (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    text TEXT NOT NULL,
+    setup TEXT NOT NULL,
+    punchline TEXT NOT NULL,
+    format_id INTEGER NOT NULL,
+    age_rating_id INTEGER NOT NULL,
+    language_id INTEGER NOT NULL,
+    source_name TEXT,
+    source_url TEXT,
+    share_image_url TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE joke_tones (joke_id INTEGER NOT NULL, tone_id INTEGER NOT NULL, PRIMARY KEY (joke_id, tone_id)) WITHOUT ROWID;
+CREATE TABLE joke_context_tags (joke_id INTEGER NOT NULL, context_tag_id INTEGER NOT NULL, PRIMARY KEY (joke_id, context_tag_id)) WITHOUT ROWID;
+CREATE TABLE joke_culture_tags (joke_id INTEGER NOT NULL, culture_tag_id INTEGER NOT NULL, PRIMARY KEY (joke_id, culture_tag_id)) WITHOUT ROWID;
+CREATE INDEX joke_tones_tone_idx ON joke_tones (tone_id);
+CREATE INDEX joke_context_tags_tag_idx ON joke_context_tags (context_tag_id);
+CREATE INDEX joke_culture_tags_tag_idx ON joke_culture_tags (culture_tag_id);
+CREATE VIRTUAL TABLE jokes_fts USING fts5(
+    text, setup, punchline,
+    content='jokes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+'''
+
+# SQLite table -> (model, columns) for lookup tables copied in full
+SNAPSHOT_LOOKUPS = {
+    'formats': (Format, ('id', 'slug', 'name', 'description')),
+    'age_ratings': (AgeRating, ('id', 'slug', 'name', 'description', 'min_age')),
+    'languages': (Language, ('id', 'code', 'name')),
+    'tones': (Tone, ('id', 'slug', 'name', 'description')),
+    'context_tags': (ContextTag, ('id', 'slug', 'name', 'description')),
+    'culture_tags': (CultureTag, ('id', 'slug', 'name', 'description')),
+}
+
+
+def get_snapshot_jokes(language, age_rating):
+    """Return the jokes queryset bundled for a language and age rating."""
+    max_age = age_rating.min_age or 0
+    return Joke.objects.filter(language=language).annotate(
+        rating_min_age=Coalesce('age_rating__min_age', 0)
+    ).filter(rating_min_age__lte=max_age)
+
+
+def build_snapshot_file(path, jokes, meta):
+    """
+    Write a SQLite bundle of `jokes` to path. Returns the joke count.
+
+    meta is a dict stored in the bundle's meta table (with schema_version
+    and joke_count added).
+
+    Rows are streamed from server-side cursors in batches; the FTS index
+    is rebuilt and optimized once all jokes are in.
+    """
+    share_image_storage = Joke._meta.get_field('share_image').storage
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SNAPSHOT_SCHEMA)
+
+        for table, (model, columns) in SNAPSHOT_LOOKUPS.items():
+            conn.executemany(
+                f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                model.objects.order_by('pk').values_list(*columns),
+            )
+
+        rows = jokes.order_by('pk').values_list(
+            'pk', 'uuid', 'text', 'setup', 'punchline',
+            'format_id', 'age_rating_id', 'language_id',
+            'source__name', 'source__url', 'share_image', 'created_at', 'updated_at',
+        ).iterator(chunk_size=SNAPSHOT_BATCH_SIZE)
+
+        joke_count = 0
+        for batch in iter_batches(rows, SNAPSHOT_BATCH_SIZE):
+            conn.executemany(
+                'INSERT INTO jokes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        pk, str(uid), text, setup, punchline,
+                        format_id, age_rating_id, language_id,
+                        source_name, source_url,
+                        share_image_storage.url(share_image) if share_image else None,
+                        created_at.isoformat(), updated_at.isoformat(),
+                    )
+                    for (pk, uid, text, setup, punchline, format_id, age_rating_id, language_id,
+                         source_name, source_url, share_image, created_at, updated_at) in batch
+                ],
+            )
+            joke_count += len(batch)
+
+        for name in TAG_FIELDS:
+            field = Joke._meta.get_field(name)
+            target_column = f'{field.m2m_reverse_field_name()}_id'
+            tag_rows = field.remote_field.through.objects.filter(
+                joke__in=jokes.values('pk')
+            ).order_by('joke_id', target_column).values_list(
+                'joke_id', target_column
+            ).iterator(chunk_size=SNAPSHOT_BATCH_SIZE)
+            for batch in iter_batches(tag_rows, SNAPSHOT_BATCH_SIZE):
+                conn.executemany(f'INSERT INTO joke_{name} VALUES (?, ?)', batch)
+
+        conn.execute("INSERT INTO jokes_fts(jokes_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO jokes_fts(jokes_fts) VALUES ('optimize')")
+        meta = {**meta, 'schema_version': SNAPSHOT_SCHEMA_VERSION, 'joke_count': joke_count}
+        conn.executemany(
+            'INSERT INTO meta VALUES (?, ?)',
+            [(key, str(value)) for key, value in meta.items()],
+        )
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    return joke_count
+
+
+def _gzip_file(source_path, target_path):
+    """Gzip a file (mtime 0, so equal content gives equal bytes). Returns the sha256."""
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=target, mtime=0) as compressed:
+            shutil.copyfileobj(source, compressed)
+    with open(target_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_catalog_snapshot(language, age_rating, change_token):
+    """
+    Build and store the bundle for one language and age rating.
+
+    Returns the saved CatalogSnapshot, or None when there are no jokes
+    (an existing snapshot for the pair is then removed).
+    """
+    existing = CatalogSnapshot.objects.filter(language=language, age_rating=age_rating).first()
+
+    with tempfile.TemporaryDirectory(prefix='catalog-snapshot-') as tmp_dir:
+        sqlite_path = os.path.join(tmp_dir, 'catalog.sqlite')
+        gzip_path = f'{sqlite_path}.gz'
+
+        joke_count = build_snapshot_file(
+            sqlite_path,
+            get_snapshot_jokes(language, age_rating),
+            {'language': language.code, 'age_rating': age_rating.slug},
+        )
+        if not joke_count:
+            if existing:
+                existing.delete()
+                retire_snapshot_file(existing.file_name)
+            return None
+
+        sha256 = _gzip_file(sqlite_path, gzip_path)
+        label = re.sub(r'[^\w-]', '-', f'{language.code}-{age_rating.slug}'.lower())
+        file_name = f'{SNAPSHOT_DIR}/{label}-{sha256[:16]}.sqlite.gz'
+        if not default_storage.exists(file_name):
+            with open(gzip_path, 'rb') as f:
+                file_name = default_storage.save(file_name, File(f))
+        size = os.path.getsize(gzip_path)
+
+    snapshot, _ = CatalogSnapshot.objects.update_or_create(
+        language=language,
+        age_rating=age_rating,
+        defaults={
+            'file_name': file_name,
+            'sha256': sha256,
+            'size': size,
+            'joke_count': joke_count,
+            'change_token': change_token,
+            'built_at': timezone.now(),
+        },
+    )
+    if existing and existing.file_name != file_name:
+        retire_snapshot_file(existing.file_name)
+    return snapshot
+
+
+def retire_snapshot_file(file_name):
+    """
+    Delete a bundle file once SNAPSHOT_FILE_GRACE_PERIOD has passed.
+
+    Clients that fetched the snapshot list before the rebuild keep
+    downloading (or resuming) the old file until then.
+    """
+    transaction.on_commit(lambda: delete_catalog_snapshot_file.apply_async(
+        (file_name,), countdown=SNAPSHOT_FILE_GRACE_PERIOD.total_seconds()
+    ))
+
+
+def delete_unreferenced_snapshot_file(file_name):
+    """Delete a bundle file no snapshot refers to. Returns True if deleted."""
+    if CatalogSnapshot.objects.filter(file_name=file_name).exists():
+        return False
+    default_storage.delete(file_name)
+    return True
+
+
+def build_catalog_snapshots(force=False):
+    """
+    Rebuild bundles for every language with jokes and every age rating.
+
+    A bundle already at the current change token is skipped unless force.
+    Returns dict with built, skipped and removed counts.
+    """
+    change_token = get_change_token()
+    current = {
+        (language_id, age_rating_id): token
+        for language_id, age_rating_id, token in CatalogSnapshot.objects.values_list(
+            'language_id', 'age_rating_id', 'change_token'
+        )
+    }
+
+    languages = list(Language.objects.filter(
+        Exists(Joke.objects.filter(language=OuterRef('pk')))
+    ))
+    age_ratings = list(AgeRating.objects.all())
+
+    stats = {'built': 0, 'skipped': 0, 'removed': 0}
+    for language in languages:
+        for age_rating in age_ratings:
+            if not force and current.get((language.pk, age_rating.pk)) == change_token:
+                stats['skipped'] += 1
+                continue
+            if build_catalog_snapshot(language, age_rating, change_token):
+                stats['built'] += 1
+            elif (language.pk, age_rating.pk) in current:
+                stats['removed'] += 1
+
+    # Languages whose jokes are all gone
+    for snapshot in CatalogSnapshot.objects.exclude(language__in=languages):
+        snapshot.delete()
+        retire_snapshot_file(snapshot.file_name)
+        stats['removed'] += 1
+
+    return stats
@@ -1,9 +1,22 @@
 from celery import shared_task
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from .models import DailyJoke
+from .accounts import retry_stalled_account_deletions as retry_stalled_deletions, run_account_deletion
+from .changes import compact_change_log, record_joke_changes
+from .conditional import bump_catalog_version
+from .data_exports import build_data_export, purge_expired_data_exports as purge_data_exports
+from .documents import invalidate_joke_documents
+from .models import AccountDeletion, Collection, DailyJoke, DataExport, SavedJoke
 from .recommendations import get_personalized_joke, get_recently_shown_joke_ids
+from .share_cards import (
+    collect_unreferenced_share_cards,
+    get_share_card_stats,
+    refresh_share_cards,
+)
+from .share_pages import invalidate_share_page
 
 
 @shared_task(name='jokes.generate_daily_jokes')
@@ -29,6 +42,7 @@ def generate_daily_jokes():
 
     # Only generate for users who completed onboarding
     eligible_users = User.objects.filter(
+        is_active=True,
         preference__onboarding_completed=True
     ).select_related('preference')
 
@@ -96,3 +110,210 @@ def generate_daily_joke_for_user(user_id):
         return daily.joke_id
 
     return None
+
+
+@shared_task(name='jokes.cleanup_share_cards')
+def cleanup_share_cards():
+    """
+    Delete share card images no joke references anymore.
+
+    Cards are content-addressed, so every text/tone/template change leaves
+    the previous PNG behind. Run periodically (e.g., daily) via Celery Beat.
+
+    Returns dict with scanned/deleted/kept counts and cache hit-rate.
+    """
+    stats = collect_unreferenced_share_cards()
+    stats['cache'] = get_share_card_stats()
+    return stats
+
+
+@shared_task(name='jokes.generate_share_cards')
+def generate_share_cards(joke_ids):
+    """
+    Render share cards for jokes inserted without Joke.save().
+
+    Queued per batch by bulk loads (seed_jokes, import_jokes) so ingestion
+    does not wait on rendering. Cached payloads of jokes whose card changed
+    are invalidated.
+
+    Returns dict with processed and updated counts.
+    """
+    changed_ids = refresh_share_cards(joke_ids)
+    if changed_ids:
+        invalidate_joke_documents(changed_ids)
+        for joke_id in changed_ids:
+            invalidate_share_page(joke_id)
+        bump_catalog_version()
+        record_joke_changes(changed_ids)
+
+    return {
+        'processed': len(joke_ids),
+        'updated': len(changed_ids),
+    }
+
+
+@shared_task(name='jokes.repair_collection_joke_counts')
+def repair_collection_joke_counts():
+    """
+    Recompute Collection.joke_count where it drifted from the real count.
+
+    Counts are maintained by database triggers on SavedJoke; this repairs
+    drift from trigger-less restores or manual SQL. Run periodically
+    (e.g., weekly) via Celery Beat.
+
+    Returns dict with checked and repaired counts.
+    """
+    drifted_ids = list(
+        Collection.objects.annotate(
+            actual_count=Count('saved_jokes')
+        ).filter(
+            ~Q(joke_count=F('actual_count'))
+        ).values_list('id', flat=True)
+    )
+
+    if drifted_ids:
+        actual_count = SavedJoke.objects.filter(
+            collection=OuterRef('pk')
+        ).order_by().values('collection').annotate(c=Count('pk')).values('c')
+        Collection.objects.filter(id__in=drifted_ids).update(
+            joke_count=Coalesce(Subquery(actual_count), 0)
+        )
+
+    return {
+        'checked': Collection.objects.count(),
+        'repaired': len(drifted_ids),
+    }
+
+
+@shared_task(name='jokes.compact_joke_change_log')
+def compact_joke_change_log():
+    """
+    Drop change feed entries superseded by a later entry for the same joke.
+
+    Keeps the feed proportional to the number of jokes rather than the
+    number of edits. Run periodically (e.g., daily) via Celery Beat.
+
+    Returns dict with the deleted count.
+    """
+    return {
+        'deleted': compact_change_log(),
+    }
+
+
+@shared_task(name='jokes.build_catalog_snapshots')
+def build_catalog_snapshots(force=False):
+    """
+    Rebuild offline catalog bundles (gzipped SQLite with FTS index).
+
+    One bundle per language and age rating; bundles already current to
+    the change feed are skipped. Run periodically (e.g., hourly) via
+    Celery Beat.
+
+    Returns dict with built, skipped and removed counts.
+    """
+    # Imported here: snapshots -> ingest imports this module
+    from .snapshots import build_catalog_snapshots as build_snapshots
+    return build_snapshots(force=force)
+
+
+@shared_task(name='jokes.delete_catalog_snapshot_file')
+def delete_catalog_snapshot_file(file_name):
+    """
+    Delete a superseded catalog bundle file unless a snapshot uses it again.
+
+    Queued with a countdown when a rebuild or removal retires a file.
+
+    Returns dict with deleted flag.
+    """
+    from .snapshots import delete_unreferenced_snapshot_file
+    return {'deleted': delete_unreferenced_snapshot_file(file_name)}
+
+
+@shared_task(name='jokes.delete_account_data')
+def delete_account_data(deletion_id):
+    """
+    Remove a deactivated user's data in throttled batches, then the user.
+
+    Queued by account deletion requests. Each run works for a bounded
+    time and re-queues itself until done; progress is kept on the
+    AccountDeletion record.
+
+    Returns dict with status and per-step progress.
+    """
+    deletion = AccountDeletion.objects.get(pk=deletion_id)
+    if deletion.status == AccountDeletion.COMPLETED:
+        return {'status': deletion.status, 'progress': deletion.progress}
+
+    try:
+        done = run_account_deletion(deletion)
+    except Exception as exc:
+        AccountDeletion.objects.filter(pk=deletion_id).update(
+            status=AccountDeletion.FAILED,
+            error=repr(exc),
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now(),
+        )
+        raise
+
+    if not done:
+        delete_account_data.delay(deletion_id)
+
+    return {'status': deletion.status, 'progress': deletion.progress}
+
+
+@shared_task(name='jokes.retry_stalled_account_deletions')
+def retry_stalled_account_deletions():
+    """
+    Re-queue account deletions that stopped making progress.
+
+    Picks up deletions left RUNNING by a killed worker, PENDING ones whose
+    task was lost, and FAILED ones with attempts left. Run periodically
+    (e.g., every 15 minutes) via Celery Beat.
+
+    Returns dict with the requeued count.
+    """
+    return {
+        'requeued': retry_stalled_deletions(),
+    }
+
+
+@shared_task(name='jokes.export_user_data')
+def export_user_data(export_id):
+    """
+    Build a user's personal data export (zip of NDJSON files).
+
+    Queued by POST /api/v1/data-exports/; runs in the worker so large
+    accounts never block the web tier.
+
+    Returns dict with status and rows written per file.
+    """
+    export = DataExport.objects.select_related('user').get(pk=export_id)
+    # Timed out before a worker got to it: the user may have a new one
+    if not DataExport.objects.filter(pk=export_id, status=DataExport.PENDING).update(
+        status=DataExport.RUNNING
+    ):
+        return {'status': export.status, 'row_counts': export.row_counts}
+
+    try:
+        export = build_data_export(export)
+    except Exception as exc:
+        DataExport.objects.filter(pk=export_id).update(
+            status=DataExport.FAILED, error=repr(exc)
+        )
+        raise
+
+    return {'status': export.status, 'row_counts': export.row_counts}
+
+
+@shared_task(name='jokes.purge_expired_data_exports')
+def purge_expired_data_exports():
+    """
+    Delete expired personal data exports and their files.
+
+    Run periodically (e.g., daily) via Celery Beat.
+
+    Returns dict with the purged count.
+    """
+    return {
+        'purged': purge_data_exports(),
+    }
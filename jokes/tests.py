@@ -1,3 +1,1242 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.cache import has_vary_header
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import throttling
+from .accounts import ACCOUNT_DELETION_MAX_ATTEMPTS, ACCOUNT_DELETION_RETRY_AFTER, request_account_deletion
+from .authentication import AUTH_USER_CACHE_KEY, CachedJWTCookieAuthentication, cache_auth_user, get_auth_user_version
+from .changes import compact_change_log, get_change_token, get_joke_changes, record_joke_changes
+from .data_exports import DATA_EXPORT_TIMEOUT, purge_expired_data_exports, request_data_export
+from .documents import DOCUMENT_CACHE_KEY, get_joke_documents
+from .ingest import iter_json_array
+from .models import (
+    AccountDeletion,
+    AgeRating,
+    CatalogSnapshot,
+    Collection,
+    ContextTag,
+    CultureTag,
+    DailyJoke,
+    DataExport,
+    Format,
+    Joke,
+    JokeChange,
+    Language,
+    SavedJoke,
+    Source,
+    Tone,
+    UserPreference,
+)
+from .share_cards import SHARE_CARD_DIR
+from .snapshots import SNAPSHOT_FILE_GRACE_PERIOD, build_catalog_snapshots, delete_unreferenced_snapshot_file
+from .tasks import delete_account_data, export_user_data, retry_stalled_account_deletions
+from .views import SavedJokeViewSet, parse_joke_search_params
+
+
+NGINX_CONF = Path(settings.BASE_DIR) / 'deploy' / 'nginx' / 'jokesfor.conf'
+
+CARD_KEY = 'a' * 64
+
+# Database tests run without Redis: local cache, no throttles
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TEST_REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+
+
+class CatalogTestMixin:
+    """
+    Lookup rows and a joke factory shared by database tests.
+
+    Share cards rendered by Joke.save() go to a temporary MEDIA_ROOT.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        media_override.enable()
+        cls.addClassCleanup(media_override.disable)
+        super().setUpClass()
+
+    @classmethod
+    def create_lookups(cls):
+        cls.format = Format.objects.create(name='One-liner', slug='one-liner')
+        cls.age_rating = AgeRating.objects.create(name='All ages', slug='all-ages', min_age=0)
+        cls.language = Language.objects.create(code='en', name='English')
+        cls.source = Source.objects.create(name='Test source')
+        cls.tones = [
+            Tone.objects.create(name='Clean', slug='clean'),
+            Tone.objects.create(name='Dad jokes', slug='dad-jokes'),
+        ]
+        cls.context_tag = ContextTag.objects.create(name='Office', slug='office')
+        cls.culture_tag = CultureTag.objects.create(name='Universal', slug='universal')
+
+    @classmethod
+    def create_joke(cls, text):
+        joke = Joke.objects.create(
+            text=text,
+            format=cls.format,
+            age_rating=cls.age_rating,
+            language=cls.language,
+            source=cls.source,
+        )
+        joke.tones.set(cls.tones)
+        joke.context_tags.set([cls.context_tag])
+        joke.culture_tags.set([cls.culture_tag])
+        return joke
+
+
+class ShareImageSendfileTests(SimpleTestCase):
+    """share_image_file against the internal location in deploy/nginx/jokesfor.conf."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.name = f'{SHARE_CARD_DIR}/{CARD_KEY}.png'
+        path = Path(self.media_root) / self.name
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b'card-bytes')
+
+    def get_internal_location(self):
+        """Return (location, alias) of the nginx location marked internal."""
+        conf = NGINX_CONF.read_text()
+        match = re.search(r'location\s+(\S+)\s*\{[^}]*?\binternal;[^}]*?\balias\s+(\S+);', conf)
+        self.assertIsNotNone(match, 'No internal location with an alias in the nginx config')
+        return match.group(1), match.group(2)
+
+    @override_settings(SENDFILE_MODE='x-accel-redirect')
+    def test_x_accel_redirect_targets_internal_location(self):
+        response = self.client.get(f'/media/share-cards/{CARD_KEY}.png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], f'"{CARD_KEY}"')
+
+        location, alias = self.get_internal_location()
+        redirect = response['X-Accel-Redirect']
+        self.assertEqual(location, settings.SENDFILE_ACCEL_PREFIX)
+        self.assertTrue(redirect.startswith(location))
+        # nginx swaps the location prefix for the alias: the rest is the storage name
+        self.assertTrue(alias.endswith('/'))
+        self.assertEqual(redirect[len(location):], self.name)
+
+    @override_settings(SENDFILE_MODE='x-sendfile')
+    def test_x_sendfile_sends_storage_path(self):
+        response = self.client.get(f'/media/share-cards/{CARD_KEY}.png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Sendfile'], str(Path(self.media_root) / self.name))
+
+    @override_settings(SENDFILE_MODE='')
+    def test_default_mode_streams_file(self):
+        response = self.client.get(f'/media/share-cards/{CARD_KEY}.png')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), b'card-bytes')
+
+    @override_settings(SENDFILE_MODE='x-accel-redirect')
+    def test_unknown_file_is_not_redirected(self):
+        response = self.client.get('/media/share-cards/not-a-card.png')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class JokeEndpointQueryCountTests(CatalogTestMixin, TestCase):
+    """
+    Query counts of the planned (select_related/prefetch) endpoints.
+
+    Each endpoint is measured, then more rows are added and measured
+    again: the count must not grow with the number of rendered rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='secret'
+        )
+        cls.collection = Collection.objects.get(user=cls.user, is_default=True)
+        cls.jokes = [cls.create_joke(f'Joke number {i} about chickens') for i in range(3)]
+        for day, joke in enumerate(cls.jokes):
+            SavedJoke.objects.create(user=cls.user, joke=joke, collection=cls.collection)
+            DailyJoke.objects.create(
+                user=cls.user, joke=joke, date=timezone.now().date() - timezone.timedelta(days=day)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_rows(self, count=5):
+        """Add jokes that show up in every endpoint under test."""
+        for i in range(count):
+            joke = self.create_joke(f'Extra joke {i} about chickens')
+            SavedJoke.objects.create(user=self.user, joke=joke, collection=self.collection)
+            DailyJoke.objects.create(
+                user=self.user, joke=joke, date=timezone.now().date() - timezone.timedelta(days=10 + i)
+            )
+        cache.clear()
+
+    def assertFlatQueries(self, num, url):
+        """Assert url takes num queries, before and after more rows are added."""
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.add_rows()
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_joke_list(self):
+        # Count, page rows, tone slugs
+        self.assertFlatQueries(3, '/api/v1/jokes/')
+
+    def test_joke_list_search(self):
+        self.assertFlatQueries(3, '/api/v1/jokes/?q=chickens&tones=clean')
+
+    def test_joke_list_serializer_fields(self):
+        self.assertFlatQueries(3, '/api/v1/jokes/?fields=id,text,tones,format')
+
+    def test_joke_detail(self):
+        url = f'/api/v1/jokes/{self.jokes[0].pk}/'
+        # Joke, tones, context tags, culture tags
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        # Served from the document store once rendered
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_joke_detail_expanded(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/v1/jokes/{self.jokes[0].pk}/?expand=tones,context_tags')
+        self.assertEqual(response.status_code, 200)
+
+    def test_saved_joke_list(self):
+        # Count, saved jokes joined to jokes and lookups, tones
+        self.assertFlatQueries(3, '/api/v1/saved-jokes/')
+
+    def test_collection_jokes(self):
+        # Collection, then as the saved joke list
+        self.assertFlatQueries(4, f'/api/v1/collections/{self.collection.pk}/jokes/')
+
+    def test_daily_joke_history(self):
+        # Daily jokes, then the joke documents (joke and three tag prefetches)
+        self.assertFlatQueries(5, '/api/v1/daily-jokes/history/')
+
+    def test_daily_joke_history_fields(self):
+        self.assertFlatQueries(4, '/api/v1/daily-jokes/history/?fields=date,joke')
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class ConditionalCachingTests(CatalogTestMixin, TestCase):
+    """Publicly cacheable responses must vary on the negotiated format."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.joke = cls.create_joke('Cached joke')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertVariesOnAccept(self, response):
+        self.assertIn(response.status_code, (200, 304))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertTrue(has_vary_header(response, 'Accept'), response.get('Vary'))
+
+    def test_public_responses_vary_on_accept(self):
+        for url in ('/api/v1/jokes/', f'/api/v1/jokes/{self.joke.pk}/', '/api/v1/formats/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertVariesOnAccept(response)
+
+                not_modified = self.client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertVariesOnAccept(not_modified)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class CollectionJokeCountTests(CatalogTestMixin, TestCase):
+    """Collection saves must not overwrite the trigger-maintained joke_count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.user = get_user_model().objects.create_user(
+            username='collector', email='collector@example.com', password='secret'
+        )
+        cls.collection = Collection.objects.create(user=cls.user, name='Later')
+        cls.jokes = [cls.create_joke(f'Counted joke {i}') for i in range(3)]
+
+    def save_joke(self, joke):
+        SavedJoke.objects.create(user=self.user, joke=joke, collection=self.collection)
+
+    def test_triggers_maintain_count(self):
+        for joke in self.jokes:
+            self.save_joke(joke)
+        SavedJoke.objects.filter(joke=self.jokes[0]).delete()
+
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.joke_count, 2)
+
+    def test_stale_instance_save_keeps_count(self):
+        stale = Collection.objects.get(pk=self.collection.pk)
+        # Saved by another request after `stale` was read
+        self.save_joke(self.jokes[0])
+        self.save_joke(self.jokes[1])
+
+        stale.name = 'Read later'
+        stale.save()
+
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.name, 'Read later')
+        self.assertEqual(self.collection.joke_count, 2)
+
+    def test_stale_instance_save_with_update_fields_keeps_count(self):
+        stale = Collection.objects.get(pk=self.collection.pk)
+        self.save_joke(self.jokes[0])
+
+        stale.joke_count = 99
+        stale.description = 'Weekend reading'
+        stale.save(update_fields=['description', 'joke_count'])
+
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.description, 'Weekend reading')
+        self.assertEqual(self.collection.joke_count, 1)
+
+    def test_patch_keeps_count(self):
+        self.save_joke(self.jokes[0])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.patch(
+            f'/api/v1/collections/{self.collection.pk}/', {'name': 'Renamed'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.name, 'Renamed')
+        self.assertEqual(self.collection.joke_count, 1)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class ExportJokesCommandTests(CatalogTestMixin, TestCase):
+    """export_jokes writes NDJSON and resumes from its checkpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.jokes = [cls.create_joke(f'Exported joke {i}') for i in range(3)]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.output = str(Path(self.tmp_dir) / 'jokes.ndjson')
+
+    def export(self, *args):
+        call_command('export_jokes', self.output, '--batch-size', '1', *args, stdout=io.StringIO())
+        return Path(self.output).read_bytes()
+
+    def test_full_export(self):
+        lines = self.export().decode().splitlines()
+
+        self.assertEqual([json.loads(line)['id'] for line in lines], [joke.pk for joke in self.jokes])
+        self.assertFalse(Path(f'{self.output}.checkpoint.json').exists())
+
+    def test_resume_after_checkpoint(self):
+        full = self.export()
+        first_line = full.split(b'\n', 1)[0] + b'\n'
+
+        # Interrupted after the first batch, with a partly written second one
+        Path(self.output).write_bytes(first_line + b'{"id": ')
+        Path(f'{self.output}.checkpoint.json').write_text(
+            json.dumps({'last_joke_id': self.jokes[0].pk, 'offset': len(first_line)})
+        )
+
+        self.assertEqual(self.export('--resume'), full)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class SavedJokeBulkTests(CatalogTestMixin, TestCase):
+    """bulk-save, bulk-move and bulk-remove on /api/v1/saved-jokes/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        user_model = get_user_model()
+        cls.user = user_model.objects.create_user(
+            username='bulk', email='bulk@example.com', password='secret'
+        )
+        cls.other_user = user_model.objects.create_user(
+            username='bulk-other', email='bulk-other@example.com', password='secret'
+        )
+        cls.favorites = Collection.objects.get(user=cls.user, is_default=True)
+        cls.later = Collection.objects.create(user=cls.user, name='Later')
+        cls.other_collection = Collection.objects.get(user=cls.other_user, is_default=True)
+        cls.jokes = [cls.create_joke(f'Bulk joke {i}') for i in range(4)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, action, data):
+        return self.client.post(f'/api/v1/saved-jokes/{action}/', data, format='json')
+
+    def save(self, joke, collection=None):
+        return SavedJoke.objects.create(user=self.user, joke=joke, collection=collection)
+
+    def assertJokeCounts(self, **expected):
+        for name, count in expected.items():
+            collection = getattr(self, name)
+            collection.refresh_from_db()
+            self.assertEqual(collection.joke_count, count, name)
+            self.assertEqual(collection.saved_jokes.count(), count, name)
+
+    def test_bulk_save_skips_existing_null_collection_saves(self):
+        ids = [joke.pk for joke in self.jokes]
+        first = self.post('bulk-save', {'joke_ids': ids[:2], 'collection': None})
+        second = self.post('bulk-save', {'joke_ids': ids[:3], 'collection': None})
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.data, {'saved': 2, 'already_saved': 0})
+        self.assertEqual(second.data, {'saved': 1, 'already_saved': 2})
+        self.assertEqual(SavedJoke.objects.filter(user=self.user, collection=None).count(), 3)
+
+    def test_bulk_save_to_collection_updates_count(self):
+        self.save(self.jokes[0], self.later)
+
+        response = self.post('bulk-save', {
+            'joke_ids': [self.jokes[0].pk, self.jokes[1].pk, self.jokes[1].pk],
+            'collection': self.later.pk,
+            'note': 'weekend',
+        })
+
+        self.assertEqual(response.data, {'saved': 1, 'already_saved': 1})
+        self.assertEqual(SavedJoke.objects.get(joke=self.jokes[1]).note, 'weekend')
+        self.assertJokeCounts(later=2, favorites=0)
+
+    def test_insert_saves_counts_only_inserted_rows(self):
+        # Saved by a concurrent request after the existence check
+        self.save(self.jokes[0], self.later)
+
+        saved = SavedJoke.objects.insert_saves(
+            self.user, [self.jokes[0].pk, self.jokes[1].pk], collection=self.later
+        )
+
+        self.assertEqual(saved, 1)
+        self.assertJokeCounts(later=2)
+
+    def test_bulk_move_merges_duplicates_in_target(self):
+        in_later = self.save(self.jokes[0], self.later)
+        duplicate = self.save(self.jokes[0], self.favorites)
+        moved = self.save(self.jokes[1], self.favorites)
+
+        response = self.post('bulk-move', {'ids': [duplicate.pk, moved.pk], 'collection': self.later.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'moved': 1, 'merged': 1})
+        self.assertEqual(
+            set(self.later.saved_jokes.values_list('pk', flat=True)), {in_later.pk, moved.pk}
+        )
+        self.assertJokeCounts(later=2, favorites=0)
+
+    def test_bulk_move_merges_same_joke_from_two_collections(self):
+        first = self.save(self.jokes[0], self.favorites)
+        second = self.save(self.jokes[0], self.later)
+        self.save(self.jokes[1], self.later)
+
+        response = self.post('bulk-move', {'ids': [first.pk, second.pk], 'collection': None})
+
+        self.assertEqual(response.data, {'moved': 1, 'merged': 1})
+        self.assertEqual(
+            list(SavedJoke.objects.filter(user=self.user, collection=None).values_list('pk', flat=True)),
+            [first.pk],
+        )
+        self.assertJokeCounts(later=1, favorites=0)
+
+    def test_bulk_remove_updates_counts(self):
+        saves = [self.save(joke, self.later) for joke in self.jokes[:3]]
+
+        response = self.post('bulk-remove', {'ids': [saves[0].pk, saves[1].pk]})
+
+        self.assertEqual(response.data, {'removed': 2})
+        self.assertJokeCounts(later=1)
+
+    def test_other_users_rows_are_rejected(self):
+        mine = self.save(self.jokes[0], self.later)
+        theirs = SavedJoke.objects.create(
+            user=self.other_user, joke=self.jokes[1], collection=self.other_collection
+        )
+        cases = [
+            ('bulk-save', {'joke_ids': [self.jokes[2].pk], 'collection': self.other_collection.pk}),
+            ('bulk-save', {'joke_ids': [self.jokes[2].pk, 999999]}),
+            ('bulk-move', {'ids': [mine.pk, theirs.pk], 'collection': self.favorites.pk}),
+            ('bulk-move', {'ids': [mine.pk], 'collection': self.other_collection.pk}),
+            ('bulk-remove', {'ids': [mine.pk, theirs.pk]}),
+        ]
+
+        for action, data in cases:
+            with self.subTest(action=action, data=data):
+                self.assertEqual(self.post(action, data).status_code, 400)
+
+        self.assertEqual(SavedJoke.objects.filter(user=self.user).count(), 1)
+        self.assertJokeCounts(later=1, favorites=0)
+        self.other_collection.refresh_from_db()
+        self.assertEqual(self.other_collection.joke_count, 1)
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    """iter_json_array must match json.loads whatever the read size."""
+
+    def assertStreams(self, document):
+        expected = json.loads(document)
+        for read_size in range(1, 12):
+            with self.subTest(read_size=read_size):
+                items = list(iter_json_array(io.StringIO(document), read_size=read_size))
+                self.assertEqual(items, expected)
+
+    def test_numbers_split_across_reads(self):
+        self.assertStreams('[1e10, -0.5, true, null]')
+        self.assertStreams('[12345678901234567890, 1.25E+3, -7, 0]')
+
+    def test_nested_items(self):
+        self.assertStreams(
+            '[{"pk": 1, "fields": {"text": "a, b]", "tones": [1, 2]}}, {"pk": 2.5, "fields": {}}]'
+        )
+
+    def test_whitespace_and_empty(self):
+        self.assertStreams('  [ ]  ')
+        self.assertStreams('\n[\n  1 ,\n  "x"\n]\n')
+
+    def test_malformed_input(self):
+        for document in ('{"a": 1}', '[1 2]', '[1, ', '[1e]'):
+            for read_size in (1, 3, 64):
+                with self.subTest(document=document, read_size=read_size):
+                    with self.assertRaises(ValueError):
+                        list(iter_json_array(io.StringIO(document), read_size=read_size))
+
+
+class ChangeFeedOrderTests(TransactionTestCase):
+    """Tokens follow commit order, so a late commit is still delivered."""
+
+    def test_late_commit_is_served_after_token(self):
+        inserted = threading.Event()
+        release = threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    record_joke_changes([1])
+                    inserted.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        self.assertTrue(inserted.wait(10))
+
+        # Inserted after the slow writer's entry (higher id), committed first
+        record_joke_changes([2])
+        upserted, deleted, token, has_more = get_joke_changes(0)
+        self.assertEqual(upserted, [2])
+        self.assertEqual(token, get_change_token())
+
+        release.set()
+        writer.join(10)
+
+        upserted, deleted, next_token, has_more = get_joke_changes(token)
+        self.assertEqual(upserted, [1])
+        self.assertGreater(next_token, token)
+        self.assertFalse(has_more)
+
+
+class ChangeFeedTests(TestCase):
+
+    def test_latest_action_per_joke(self):
+        record_joke_changes([1, 2])
+        record_joke_changes([1], action=JokeChange.DELETE)
+
+        upserted, deleted, token, has_more = get_joke_changes(0)
+
+        self.assertEqual(upserted, [2])
+        self.assertEqual(deleted, [1])
+        self.assertEqual(token, get_change_token())
+        self.assertEqual(get_joke_changes(token)[:2], ([], []))
+
+    def test_pages(self):
+        record_joke_changes(range(1, 6))
+
+        upserted, _, token, has_more = get_joke_changes(0, limit=3)
+        self.assertEqual(upserted, [1, 2, 3])
+        self.assertTrue(has_more)
+
+        upserted, _, token, has_more = get_joke_changes(token, limit=3)
+        self.assertEqual(upserted, [4, 5])
+        self.assertFalse(has_more)
+
+    def test_compaction_keeps_latest_entry(self):
+        record_joke_changes([1, 2])
+        record_joke_changes([1], action=JokeChange.DELETE)
+        get_change_token()
+
+        self.assertEqual(compact_change_log(), 1)
+        self.assertEqual(get_joke_changes(0)[:2], ([2], [1]))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class JokeChangeRecordingTests(CatalogTestMixin, TestCase):
+    """Each joke edit appends exactly one change feed entry."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+
+    def test_create_records_one_entry(self):
+        joke = Joke.objects.create(
+            text='Fresh joke', format=self.format, age_rating=self.age_rating, language=self.language
+        )
+        self.assertTrue(joke.share_image.name)
+        self.assertEqual(JokeChange.objects.filter(joke_id=joke.pk).count(), 1)
+
+    def test_edit_records_one_entry(self):
+        joke = self.create_joke('Edited joke')
+        JokeChange.objects.all().delete()
+
+        joke.text = 'Edited joke, new card'
+        joke.save()
+
+        self.assertEqual(JokeChange.objects.filter(joke_id=joke.pk).count(), 1)
+
+    def test_tone_change_records_one_entry(self):
+        joke = self.create_joke('Retoned joke')
+        JokeChange.objects.all().delete()
+        card = Joke.objects.get(pk=joke.pk).share_image.name
+
+        joke.tones.set([self.tones[1]])
+
+        self.assertNotEqual(Joke.objects.get(pk=joke.pk).share_image.name, card)
+        self.assertEqual(JokeChange.objects.filter(joke_id=joke.pk).count(), 1)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class JokeDocumentInvalidationTests(CatalogTestMixin, TestCase):
+    """Cached documents are dropped after the edit commits, not before."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.joke = cls.create_joke('Original text')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_text(self):
+        return json.loads(self.client.get(f'/api/v1/jokes/{self.joke.pk}/').content)['text']
+
+    def test_document_rebuilt_before_commit_is_not_served(self):
+        self.assertEqual(self.get_text(), 'Original text')
+        key = DOCUMENT_CACHE_KEY.format(pk=self.joke.pk)
+        stale_entry = cache.get(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.joke.text = 'Edited text'
+            self.joke.save()
+            self.assertIsNotNone(cache.get(key))
+            # A reader that missed the cache before commit rebuilt the
+            # document from the committed (old) row
+            cache.set(key, stale_entry)
+
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(self.get_text(), 'Edited text')
+
+    def test_tag_change_invalidates_after_commit(self):
+        get_joke_documents([self.joke.pk])
+        key = DOCUMENT_CACHE_KEY.format(pk=self.joke.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.joke.context_tags.clear()
+            self.assertIsNotNone(cache.get(key))
+
+        self.assertIsNone(cache.get(key))
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class CatalogSnapshotTests(CatalogTestMixin, TestCase):
+    """Bundle files change only with their content and outlive a rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.other_language = Language.objects.create(code='de', name='German')
+        cls.joke = cls.create_joke('Snapshot joke')
+
+    def build(self):
+        with mock.patch('jokes.snapshots.delete_catalog_snapshot_file') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                stats = build_catalog_snapshots()
+        return stats, task.apply_async
+
+    def get_snapshot(self):
+        return CatalogSnapshot.objects.get(language=self.language, age_rating=self.age_rating)
+
+    def download(self, snapshot, **headers):
+        filename = snapshot.file_name.rsplit('/', 1)[-1]
+        return self.client.get(f'/media/catalog-snapshots/{filename}', headers=headers)
+
+    def test_token_is_not_in_bundle(self):
+        self.build()
+        snapshot = self.get_snapshot()
+
+        with default_storage.open(snapshot.file_name) as f, tempfile.NamedTemporaryFile() as db:
+            db.write(gzip.decompress(f.read()))
+            db.flush()
+            meta = dict(sqlite3.connect(db.name).execute('SELECT key, value FROM meta'))
+        self.assertNotIn('change_token', meta)
+        self.assertEqual(meta['joke_count'], '1')
+
+    def test_unrelated_change_keeps_file(self):
+        self.build()
+        before = self.get_snapshot()
+
+        # A change elsewhere in the catalog advances the global token
+        Joke.objects.create(
+            text='Ein Witz', format=self.format, age_rating=self.age_rating, language=self.other_language
+        )
+        stats, retire = self.build()
+
+        after = self.get_snapshot()
+        self.assertEqual(after.file_name, before.file_name)
+        self.assertEqual(after.sha256, before.sha256)
+        self.assertGreater(after.change_token, before.change_token)
+        retire.assert_not_called()
+
+    def test_superseded_file_is_served_until_retired(self):
+        self.build()
+        before = self.get_snapshot()
+        first = self.download(before)
+        etag = first['ETag']
+        self.assertEqual(first.status_code, 200)
+        b''.join(first.streaming_content)
+
+        self.joke.text = 'Snapshot joke, edited'
+        self.joke.save()
+        stats, retire = self.build()
+
+        after = self.get_snapshot()
+        self.assertNotEqual(after.file_name, before.file_name)
+        retire.assert_called_once_with(
+            (before.file_name,), countdown=SNAPSHOT_FILE_GRACE_PERIOD.total_seconds()
+        )
+
+        # Resuming the old download still works during the grace period
+        response = self.download(before, Range='bytes=10-', If_Range=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertTrue(delete_unreferenced_snapshot_file(before.file_name))
+        self.assertFalse(delete_unreferenced_snapshot_file(after.file_name))
+        self.assertEqual(self.download(before).status_code, 404)
+        self.assertEqual(self.download(after).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class SavedJokeSearchPlanTests(CatalogTestMixin, TestCase):
+    """
+    Saved-joke search must start from the user's saved rows.
+
+    The catalog and other users' saves are large and every joke matches
+    the query, so a plan driven by the search_vector index would have to
+    rank the whole catalog before finding this user's handful of rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        user_model = get_user_model()
+        cls.user = user_model.objects.create_user(
+            username='searcher', email='searcher@example.com', password='secret'
+        )
+        others = [
+            user_model.objects.create_user(username=f'other{i}', email=f'other{i}@example.com')
+            for i in range(4)
+        ]
+        jokes = Joke.objects.bulk_create(
+            Joke(
+                text=f'Why did chicken number {i} cross the road?',
+                format=cls.format,
+                age_rating=cls.age_rating,
+                language=cls.language,
+            )
+            for i in range(4000)
+        )
+        Joke.tones.through.objects.bulk_create(
+            Joke.tones.through(joke=joke, tone=tone) for joke in jokes for tone in cls.tones
+        )
+        SavedJoke.objects.bulk_create(
+            [SavedJoke(user=other, joke=joke) for other in others for joke in jokes[:1000]]
+            + [SavedJoke(user=cls.user, joke=joke) for joke in jokes[:5]]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE jokes_joke, jokes_savedjoke')
+
+    def get_search_queryset(self, **params):
+        request = Request(APIRequestFactory().get('/api/v1/saved-jokes/search/', params))
+        request.user = self.user
+        view = SavedJokeViewSet(action='search', request=request, format_kwarg=None)
+        query_text, filters = parse_joke_search_params(request.query_params)
+        return view.get_queryset().search(query_text=query_text, filters=filters)
+
+    def get_plan(self, queryset):
+        return json.loads(queryset.explain(format='json'))[0]['Plan']
+
+    def iter_nodes(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self.iter_nodes(child)
+
+    def assertPlanStartsFromUser(self, queryset):
+        self.assertNotIn('DISTINCT', str(queryset.query))
+        plan = self.get_plan(queryset)
+        scans = {}
+        for node in self.iter_nodes(plan):
+            if node.get('Alias') in ('jokes_savedjoke', 'jokes_joke'):
+                scans[node['Alias']] = node
+
+        # Saved rows come from the user index; jokes are fetched by primary key
+        saved, joke = scans['jokes_savedjoke'], scans['jokes_joke']
+        self.assertIn('user_id', saved.get('Index Cond', ''), plan)
+        self.assertEqual(joke.get('Index Name'), 'jokes_joke_pkey', plan)
+        self.assertIn('search_vector', joke.get('Filter', ''), plan)
+
+    def test_text_search_plan(self):
+        queryset = self.get_search_queryset(q='chicken road')
+        self.assertEqual(queryset.count(), 5)
+        self.assertPlanStartsFromUser(queryset)
+
+    def test_text_and_tag_search_plan(self):
+        queryset = self.get_search_queryset(q='chicken', tones='clean')
+        self.assertPlanStartsFromUser(queryset)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class AccountDeletionRetryTests(TestCase):
+    """Deletions that stop making progress are queued again."""
+
+    def create_deletion(self, status, age=ACCOUNT_DELETION_RETRY_AFTER * 2, **fields):
+        deletion = AccountDeletion.objects.create(user_id=1000 + AccountDeletion.objects.count(), **fields)
+        AccountDeletion.objects.filter(pk=deletion.pk).update(
+            status=status, updated_at=timezone.now() - age
+        )
+        return deletion
+
+    def sweep(self):
+        with mock.patch('jokes.tasks.delete_account_data.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                stats = retry_stalled_account_deletions()
+        return stats, sorted(call.args[0] for call in delay.call_args_list)
+
+    def test_stalled_deletions_are_requeued(self):
+        pending = self.create_deletion(AccountDeletion.PENDING)
+        killed = self.create_deletion(AccountDeletion.RUNNING)
+        failed = self.create_deletion(AccountDeletion.FAILED, attempts=1)
+
+        stats, queued = self.sweep()
+
+        self.assertEqual(stats, {'requeued': 3})
+        self.assertEqual(queued, sorted([pending.pk, killed.pk, failed.pk]))
+        self.assertEqual(
+            set(AccountDeletion.objects.values_list('status', flat=True)), {AccountDeletion.PENDING}
+        )
+
+    def test_live_finished_and_exhausted_deletions_are_left_alone(self):
+        self.create_deletion(AccountDeletion.RUNNING, age=timezone.timedelta(minutes=1))
+        self.create_deletion(AccountDeletion.COMPLETED)
+        self.create_deletion(AccountDeletion.FAILED, attempts=ACCOUNT_DELETION_MAX_ATTEMPTS)
+
+        self.assertEqual(self.sweep(), ({'requeued': 0}, []))
+
+    def test_failed_run_counts_attempt(self):
+        deletion = self.create_deletion(AccountDeletion.PENDING)
+
+        with mock.patch('jokes.tasks.run_account_deletion', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                delete_account_data(deletion.pk)
+
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, AccountDeletion.FAILED)
+        self.assertEqual(deletion.attempts, 1)
+        self.assertIn('boom', deletion.error)
+        # Recent failure: retried on a later sweep, not immediately
+        self.assertEqual(self.sweep(), ({'requeued': 0}, []))
+
+    def test_admin_retry_action(self):
+        failed = self.create_deletion(AccountDeletion.FAILED, attempts=ACCOUNT_DELETION_MAX_ATTEMPTS)
+        completed = self.create_deletion(AccountDeletion.COMPLETED)
+        admin_user = get_user_model().objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret'
+        )
+        self.client.force_login(admin_user)
+
+        with mock.patch('jokes.tasks.delete_account_data.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/admin/jokes/accountdeletion/', {
+                    'action': 'retry_deletions',
+                    '_selected_action': [failed.pk, completed.pk],
+                })
+
+        self.assertEqual(response.status_code, 302)
+        delay.assert_called_once_with(failed.pk)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, AccountDeletion.PENDING)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class DataExportRequestTests(CatalogTestMixin, TestCase):
+    """An export that never finishes must not block new requests forever."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='exporter', email='exporter@example.com', password='secret'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('jokes.tasks.export_user_data.delay')
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/v1/data-exports/')
+
+    def expire(self, export):
+        DataExport.objects.filter(pk=export['id']).update(
+            expires_at=timezone.now() - timezone.timedelta(seconds=1)
+        )
+
+    def test_request_sets_deadline(self):
+        before = timezone.now()
+        response = self.request_export()
+
+        self.assertEqual(response.status_code, 202)
+        export = DataExport.objects.get(pk=response.data['id'])
+        self.assertGreaterEqual(export.expires_at, before + DATA_EXPORT_TIMEOUT)
+        self.delay.assert_called_once_with(export.pk)
+
+    def test_in_progress_export_is_returned(self):
+        first = self.request_export()
+        second = self.request_export()
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(self.delay.call_count, 1)
+
+    def test_timed_out_export_is_replaced(self):
+        first = self.request_export().data
+        self.expire(first)
+
+        second = self.request_export()
+
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.data['id'], first['id'])
+        self.assertEqual(DataExport.objects.get(pk=first['id']).status, DataExport.FAILED)
+
+    def test_second_active_export_is_rejected_by_database(self):
+        self.request_export()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DataExport.objects.create(user=self.user, status=DataExport.RUNNING)
+
+    def test_concurrent_request_returns_winner(self):
+        winner = DataExport.objects.create(
+            user=self.user, expires_at=timezone.now() + DATA_EXPORT_TIMEOUT
+        )
+        calls = []
+        first = QuerySet.first
+
+        def miss_once(queryset):
+            # The duplicate check ran before the winner committed
+            calls.append(queryset)
+            return None if len(calls) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', autospec=True, side_effect=miss_once):
+            export, created = request_data_export(self.user)
+
+        self.assertFalse(created)
+        self.assertEqual(export, winner)
+
+    def test_late_worker_skips_timed_out_export(self):
+        first = self.request_export().data
+        self.expire(first)
+        self.request_export()
+
+        with mock.patch('jokes.tasks.build_data_export') as build:
+            stats = export_user_data(first['id'])
+
+        build.assert_not_called()
+        self.assertEqual(stats['status'], DataExport.FAILED)
+
+    def test_purge_removes_timed_out_exports(self):
+        first = self.request_export().data
+        self.expire(first)
+
+        self.assertEqual(purge_expired_data_exports(), 1)
+        self.assertFalse(DataExport.objects.filter(pk=first['id']).exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class JokeListThrottleTests(CatalogTestMixin, TestCase):
+    """Plain browsing is charged like any request; only ?q= pays for search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_lookups()
+        cls.create_joke('Throttled joke about chickens')
+        cls.user = get_user_model().objects.create_user(
+            username='browser', email='browser@example.com', password='secret'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_charges(self, url):
+        """Return {bucket scope: tokens taken} for one request."""
+        with mock.patch('jokes.throttling.take_tokens', return_value=(True, 0.0)) as take_tokens:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {call.args[0].split(':')[1]: call.args[3] for call in take_tokens.call_args_list}
+
+    def test_browsing_costs_one_token(self):
+        self.assertEqual(self.get_charges('/api/v1/jokes/'), {'user': 1})
+        self.assertEqual(self.get_charges('/api/v1/jokes/?q=&tones=clean'), {'user': 1})
+
+    def test_search_costs_search_tokens(self):
+        self.assertEqual(
+            self.get_charges('/api/v1/jokes/?q=chickens'),
+            {'user': settings.THROTTLE_SCOPE_COSTS['search'], 'search': 1},
+        )
+
+
+class TokenBucketScriptTests(SimpleTestCase):
+    """TOKEN_BUCKET_SCRIPT run against the throttle Redis."""
+
+    key = 'throttle:test:token-bucket'
+
+    def setUp(self):
+        self.reset_client()
+        self.addCleanup(self.reset_client)
+        try:
+            self.redis = redis.Redis.from_url(settings.THROTTLE_REDIS_URL, socket_connect_timeout=0.5)
+            self.redis.ping()
+        except redis.RedisError:
+            self.skipTest('Redis is not available')
+        self.redis.delete(self.key)
+        self.addCleanup(self.redis.delete, self.key)
+
+    def reset_client(self):
+        throttling._client = throttling._token_bucket = None
+
+    def rewind(self, seconds):
+        """Pretend the last call was `seconds` earlier."""
+        ts = float(self.redis.hget(self.key, 'ts'))
+        self.redis.hset(self.key, 'ts', str(ts - seconds))
+
+    def test_allows_capacity_then_denies_with_wait(self):
+        # 3 tokens, refilled at 3 per hour (one per 1200s)
+        for _ in range(3):
+            self.assertEqual(throttling.take_tokens(self.key, 3, 3600), (True, 0.0))
+
+        allowed, wait = throttling.take_tokens(self.key, 3, 3600)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1200, delta=1)
+        self.assertLessEqual(self.redis.pttl(self.key), 3600 * 1000)
+
+    def test_refills_with_elapsed_time(self):
+        for _ in range(3):
+            throttling.take_tokens(self.key, 3, 3600)
+
+        self.rewind(600)
+        allowed, wait = throttling.take_tokens(self.key, 3, 3600)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 600, delta=1)
+
+        self.rewind(600)
+        self.assertTrue(throttling.take_tokens(self.key, 3, 3600)[0])
+        self.assertFalse(throttling.take_tokens(self.key, 3, 3600)[0])
+
+    def test_refill_stops_at_capacity(self):
+        throttling.take_tokens(self.key, 3, 3600)
+        self.rewind(10 * 3600)
+
+        for _ in range(3):
+            self.assertTrue(throttling.take_tokens(self.key, 3, 3600)[0])
+        self.assertFalse(throttling.take_tokens(self.key, 3, 3600)[0])
+
+    def test_cost_takes_several_tokens(self):
+        # 10 tokens, one per second
+        self.assertTrue(throttling.take_tokens(self.key, 10, 10, cost=8)[0])
+
+        allowed, wait = throttling.take_tokens(self.key, 10, 10, cost=4)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 2, delta=0.1)
+        self.assertTrue(throttling.take_tokens(self.key, 10, 10, cost=2)[0])
+
+    def test_cost_above_capacity_is_capped(self):
+        self.assertTrue(throttling.take_tokens(self.key, 3, 3600, cost=20)[0])
+        self.assertFalse(throttling.take_tokens(self.key, 3, 3600)[0])
+
+    @override_settings(THROTTLE_REDIS_URL='redis://10.255.255.1:6379/0', THROTTLE_REDIS_TIMEOUT=0.2)
+    def test_unreachable_redis_fails_open_quickly(self):
+        self.reset_client()
+        throttle = throttling.UserRedisThrottle()
+        request = mock.Mock(user=mock.Mock(is_authenticated=True, pk=1))
+
+        started = time.monotonic()
+        with self.assertLogs('jokes.throttling', 'WARNING'):
+            self.assertTrue(throttle.allow_request(request, view=None))
+        self.assertLess(time.monotonic() - started, 2)
+
+        connection_kwargs = throttling._client.connection_pool.connection_kwargs
+        self.assertEqual(connection_kwargs['socket_connect_timeout'], 0.2)
+        self.assertEqual(connection_kwargs['socket_timeout'], 0.2)
+
+
+@override_settings(CACHES=TEST_CACHES, REST_FRAMEWORK=TEST_REST_FRAMEWORK)
+class CachedJWTAuthenticationTests(TestCase):
+    """Cached auth users are served without queries and never outlive a change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='cached', email='cached@example.com', password='secret'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.auth = CachedJWTCookieAuthentication()
+
+    def get_user(self, user=None):
+        return self.auth.get_user(AccessToken.for_user(user or self.user))
+
+    def prime(self):
+        """Load the user once so the next request can be served from cache."""
+        self.get_user()
+        with self.assertNumQueries(0):
+            self.get_user()
+
+    def assertReloads(self):
+        with self.assertNumQueries(2):  # user, then preference
+            return self.get_user()
+
+    def test_cached_user_served_without_queries(self):
+        with self.assertNumQueries(2):
+            self.get_user()
+
+        with self.assertNumQueries(0):
+            user = self.get_user()
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertFalse(user.preference.onboarding_completed)
+
+    def test_user_save_reloads(self):
+        self.prime()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Renamed'
+            self.user.save()
+
+        self.assertEqual(self.assertReloads().first_name, 'Renamed')
+
+    def test_preference_save_reloads(self):
+        self.prime()
+        with self.captureOnCommitCallbacks(execute=True):
+            preference = UserPreference.objects.get(user=self.user)
+            preference.onboarding_completed = True
+            preference.save()
+
+        self.assertTrue(self.assertReloads().preference.onboarding_completed)
+
+    def test_refresh_token_blacklist_reloads(self):
+        RefreshToken.for_user(self.user)
+        self.prime()
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+
+        self.assertReloads()
+
+    def test_account_deletion_rejects_cached_user(self):
+        self.prime()
+        with mock.patch('jokes.tasks.delete_account_data.delay'):
+            with self.captureOnCommitCallbacks(execute=True):
+                request_account_deletion(self.user)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user()
+
+    def cache_as(self, **fields):
+        """Replace the cached user with a copy carrying `fields`."""
+        self.prime()
+        cached = cache.get(AUTH_USER_CACHE_KEY.format(
+            user_id=self.user.pk, version=get_auth_user_version(self.user.pk)
+        ))
+        for name, value in fields.items():
+            setattr(cached, name, value)
+        cache_auth_user(cached, get_auth_user_version(self.user.pk))
+
+    def test_inactive_cached_user_rejected(self):
+        self.cache_as(is_active=False)
+
+        with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed) as raised:
+            self.get_user()
+        self.assertEqual(raised.exception.detail['code'], 'user_inactive')
+
+    def test_cached_user_with_changed_password_rejected(self):
+        with mock.patch.object(jwt_settings, 'CHECK_REVOKE_TOKEN', True):
+            token = AccessToken.for_user(self.user)
+            self.cache_as(password='changed-elsewhere')
+
+            with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed) as raised:
+                self.auth.get_user(token)
+        self.assertEqual(raised.exception.detail['code'], 'password_changed')
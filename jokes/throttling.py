@@ -0,0 +1,164 @@
+"""
+Redis token-bucket throttles shared by every worker process.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client in
+the cache and rewrites it on every request, with a race between read and
+write. These throttles keep one small hash per client and scope and update
+it with a Lua script, so a check is one atomic O(1) round trip and limits
+hold across processes and hosts.
+
+A rate 'N/period' becomes a bucket of N tokens refilled at N per period.
+Requests take tokens by cost:
+
+- AnonRedisThrottle / UserRedisThrottle: the global 'anon'/'user' budgets;
+  a request costs settings.THROTTLE_SCOPE_COSTS[scope of the action]
+  (default 1), so a search drains the budget faster than a lookup
+- ScopedRedisThrottle: a separate budget per scope, one token per request
+
+Views name their scope with throttle_scope, either a string or a dict of
+action -> scope, or define get_throttle_scope() when the scope depends on
+the request. If Redis is unreachable (settings.THROTTLE_REDIS_TIMEOUT),
+requests are let through.
+"""
+import logging
+
+import redis
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, UserRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+# Refill the bucket for the time elapsed since the last call, then take
+# `cost` tokens if available. Uses the Redis clock so app hosts need not
+# agree on time. Returns {allowed, seconds to wait (string)}.
+TOKEN_BUCKET_SCRIPT = '''
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / refill_rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_rate * 1000))
+return {allowed, tostring(wait)}
+'''
+
+_client = None
+_token_bucket = None
+
+
+def get_token_bucket():
+    """Return the registered token bucket script (client created on first use)."""
+    global _client, _token_bucket
+    if _token_bucket is None:
+        # Short timeouts: an unreachable Redis must not stall every request
+        _client = redis.Redis.from_url(
+            settings.THROTTLE_REDIS_URL,
+            socket_connect_timeout=settings.THROTTLE_REDIS_TIMEOUT,
+            socket_timeout=settings.THROTTLE_REDIS_TIMEOUT,
+        )
+        _token_bucket = _client.register_script(TOKEN_BUCKET_SCRIPT)
+    return _token_bucket
+
+
+def take_tokens(key, capacity, duration, cost=1):
+    """
+    Take cost tokens from the bucket at key. Returns (allowed, wait seconds).
+
+    The bucket holds `capacity` tokens and refills capacity per duration
+    seconds; a cost above the capacity is capped so it can still pass.
+    """
+    allowed, wait = get_token_bucket()(
+        keys=[key], args=[capacity, capacity / duration, min(cost, capacity)]
+    )
+    return bool(allowed), float(wait)
+
+
+def get_throttle_scope(view):
+    """Return the view's throttle scope for the current request, or None."""
+    if hasattr(view, 'get_throttle_scope'):
+        return view.get_throttle_scope()
+    scope = getattr(view, 'throttle_scope', None)
+    if isinstance(scope, dict):
+        return scope.get(getattr(view, 'action', None))
+    return scope
+
+
+class RedisThrottleMixin:
+    """Replace SimpleRateThrottle's cached timestamp list with a Redis token bucket."""
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_cost(self, request, view):
+        """Return the tokens this request takes (0 skips the throttle)."""
+        return 1
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cost = self.get_cost(request, view)
+        if cost <= 0:
+            return True
+
+        try:
+            allowed, wait = take_tokens(self.key, self.num_requests, self.duration, cost)
+        except redis.RedisError:
+            logger.warning('Throttle backend unavailable; allowing request', exc_info=True)
+            return True
+
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class CostWeightedThrottleMixin(RedisThrottleMixin):
+    """Charge requests by the cost of the view's throttle scope."""
+
+    def get_cost(self, request, view):
+        return settings.THROTTLE_SCOPE_COSTS.get(get_throttle_scope(view), 1)
+
+
+class AnonRedisThrottle(CostWeightedThrottleMixin, AnonRateThrottle):
+    """Global budget for anonymous clients, keyed by IP."""
+
+
+class UserRedisThrottle(CostWeightedThrottleMixin, UserRateThrottle):
+    """Global budget for authenticated users, keyed by user id."""
+
+
+class ScopedRedisThrottle(RedisThrottleMixin, ScopedRateThrottle):
+    """Per-scope budget for views (or actions) that set throttle_scope."""
+
+    def allow_request(self, request, view):
+        self.scope = get_throttle_scope(view)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -4,6 +4,7 @@ URL routing for the Jokes API.
 Uses DRF's DefaultRouter to automatically generate URLs for all viewsets.
 All endpoints are accessible under /api/v1/ (versioned path).
 """
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from . import views
@@ -20,5 +21,11 @@ router.register('preferences', views.UserPreferenceViewSet, basename='preference
 router.register('collections', views.CollectionViewSet, basename='collection')
 router.register('saved-jokes', views.SavedJokeViewSet, basename='saved-joke')
 router.register('daily-jokes', views.DailyJokeViewSet, basename='daily-joke')
+router.register('snapshots', views.CatalogSnapshotViewSet, basename='catalog-snapshot')
+router.register('data-exports', views.DataExportViewSet, basename='data-export')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
+    path('account/', views.AccountView.as_view(), name='account'),
+    *router.urls,
+]
@@ -2,26 +2,43 @@
 API views for the Jokes API.
 
 Provides viewsets for all models:
-- JokeViewSet: Search, list, retrieve, and random joke endpoints
+- JokeViewSet: Search, list, retrieve, random, change feed and partner export endpoints
 - Lookup viewsets: Format, AgeRating, Tone, ContextTag, Language, CultureTag
+- BootstrapView: All lookup tables in one ETag-validated response
+- CatalogSnapshotViewSet: Manifest of offline catalog bundles
+- AccountView: Asynchronous account deletion
+- DataExportViewSet: Personal data export requests and downloads
 - GoogleLogin: Google OAuth2 authentication endpoint
 - joke_share_page: Public share page with OG meta tags
+- joke_share_card: Lazily rendered share card size/format variants
+- share_image_file: Share card files, optionally offloaded to the front proxy
+- catalog_snapshot_file: Offline catalog bundle files with range support
 """
+import logging
+import time
+
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
+from dj_rest_auth.jwt_auth import unset_jwt_cookies
 from dj_rest_auth.registration.views import SocialLoginView
 from django.conf import settings
-from django.shortcuts import render, get_object_or_404
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags
 from django.views.decorators.http import require_GET
 
 from django.utils import timezone
 
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Max, Sum
 
 from .models import (
     Joke,
@@ -37,11 +54,36 @@ from .models import (
     DailyJoke,
     JokeRating,
     ShareEvent,
+    CatalogSnapshot,
+    DataExport,
 )
+from .accounts import request_account_deletion
+from .changes import get_joke_changes
+from .data_exports import request_data_export
+from .conditional import ConditionalViewMixin, get_catalog_version, make_etag
+from .documents import get_joke_documents
+from .lookups import get_lookup_registry
+from .prefetch import PrefetchPlanMixin
+from .ingest import iter_joke_record_batches
+from .renderers import JSONStream, NDJSONRenderer, ORJSONRenderer
 from .recommendations import get_personalized_joke, get_recently_shown_joke_ids
+from .sendfile import sendfile_response
+from .share_cards import (
+    CARD_FILENAME_RE,
+    CARD_FORMATS,
+    CARD_SIZES,
+    LEGACY_CARD_FILENAME_RE,
+    SHARE_CARD_DIR,
+    ensure_share_card,
+    get_or_create_share_card_variant,
+    get_share_card_storage,
+)
+from .share_pages import get_share_page
+from .snapshots import SNAPSHOT_DIR, SNAPSHOT_FILENAME_RE
 from .serializers import (
     JokeSerializer,
     JokeListSerializer,
+    JokeListFastSerializer,
     FormatSerializer,
     AgeRatingSerializer,
     ToneSerializer,
@@ -54,12 +96,197 @@ from .serializers import (
     CollectionCreateSerializer,
     SavedJokeSerializer,
     SavedJokeCreateSerializer,
+    SavedJokeBulkSaveSerializer,
+    SavedJokeBulkMoveSerializer,
+    SavedJokeBulkRemoveSerializer,
     DailyJokeSerializer,
     JokeRatingSerializer,
+    CatalogSnapshotSerializer,
+    DataExportSerializer,
+    parse_expand_paths,
+    parse_field_paths,
 )
 
 
-class JokeViewSet(viewsets.ReadOnlyModelViewSet):
+# Shared ?fields= / ?expand= schema parameters
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name='fields',
+        type=str,
+        description='Comma-separated fields to return; dotted paths select nested fields (e.g., id,text or joke.id,joke.text)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='expand',
+        type=str,
+        description='Comma-separated relations to render as nested objects; when given, other relations collapse to slugs/ids (e.g., expand=tones or expand=joke)',
+        required=False,
+    ),
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_joke_search_params(query_params):
+    """
+    Return (query text, filters dict) from JOKE_FILTER_PARAMETERS.
+
+    The filters dict has the keys JokeManager.search() and
+    SavedJokeQuerySet.search() accept; empty parameters are left out.
+    """
+    query_text = query_params.get('q', '').strip()
+    format_slug = query_params.get('joke_format', '').strip()  # named joke_format to avoid DRF conflict
+    age_rating_slug = query_params.get('age_rating', '').strip()
+    tones_param = query_params.get('tones', '').strip()
+    context_tags_param = query_params.get('context_tags', '').strip()
+    culture_tags_param = query_params.get('culture_tags', '').strip()
+    language_code = query_params.get('language', '').strip()
+
+    filters = {}
+    if format_slug:
+        filters['format'] = format_slug
+    if age_rating_slug:
+        filters['age_rating'] = age_rating_slug
+    if tones_param:
+        filters['tones'] = [t.strip() for t in tones_param.split(',') if t.strip()]
+    if context_tags_param:
+        filters['context_tags'] = [t.strip() for t in context_tags_param.split(',') if t.strip()]
+    if culture_tags_param:
+        filters['culture_tags'] = [t.strip() for t in culture_tags_param.split(',') if t.strip()]
+    if language_code:
+        filters['language'] = language_code
+
+    return query_text, filters
+
+# Jokes read per server-side cursor fetch in the partner export
+EXPORT_BATCH_SIZE = 2000
+
+# Shared joke search/filter schema parameters (list and export)
+JOKE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name='q',
+        type=str,
+        description='Full-text search query (searches text, setup, punchline)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='joke_format',
+        type=str,
+        description='Filter by format slug (e.g., one-liner, setup-punchline). Note: named joke_format to avoid conflict with DRF content negotiation.',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='age_rating',
+        type=str,
+        description='Filter by age rating slug (e.g., kid-safe, family-friendly)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='tones',
+        type=str,
+        description='Filter by tone slugs, comma-separated (e.g., clean,dad-jokes)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='context_tags',
+        type=str,
+        description='Filter by context tag slugs, comma-separated (e.g., wedding,icebreaker)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='culture_tags',
+        type=str,
+        description='Filter by culture tag slugs, comma-separated (e.g., american,universal)',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='language',
+        type=str,
+        description='Filter by language code (e.g., en)',
+        required=False,
+    ),
+]
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin passing ?fields= and ?expand= to serializers.
+
+    Serializers using SparseFieldsetMixin prune and collapse fields from
+    these context keys; the prefetch planner then drops the unused joins.
+    """
+
+    def get_sparse_fieldset_context(self):
+        """Return the fields/expand context parsed from the query string."""
+        request = getattr(self, 'request', None)
+        if request is None:
+            return {'fields': None, 'expand': None}
+        return {
+            'fields': parse_field_paths(request.query_params.get('fields')),
+            'expand': parse_expand_paths(request.query_params.get('expand')),
+        }
+
+    def has_sparse_fieldset(self):
+        """Return True if the request asked for ?fields= or ?expand=."""
+        context = self.get_sparse_fieldset_context()
+        return context['fields'] is not None or context['expand'] is not None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(self.get_sparse_fieldset_context())
+        return context
+
+
+# Pages with at least this many items are streamed instead of built in memory
+STREAMING_MIN_ITEMS = 200
+
+# Items serialized and rendered per streamed chunk
+STREAMING_CHUNK_SIZE = 100
+
+
+class StreamingListMixin:
+    """
+    Viewset mixin rendering large list pages incrementally.
+
+    Small pages go through the usual Response. Pages of STREAMING_MIN_ITEMS
+    or more (e.g. with ?page_size=) are serialized STREAMING_CHUNK_SIZE items
+    at a time and sent as a StreamingHttpResponse, so the full list of dicts
+    and the full JSON string never exist at once.
+    """
+
+    def list_response(self, queryset, serializer_class, context):
+        """Paginate queryset and return a (possibly streamed) list response."""
+        page = self.paginate_queryset(queryset)
+        items = page if page is not None else queryset
+
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if not hasattr(renderer, 'iter_render') or len(items) < STREAMING_MIN_ITEMS:
+            data = serializer_class(items, many=True, context=context).data
+            if page is not None:
+                return self.get_paginated_response(data)
+            return Response(data)
+
+        chunks = (
+            serializer_class(items[start:start + STREAMING_CHUNK_SIZE], many=True, context=context).data
+            for start in range(0, len(items), STREAMING_CHUNK_SIZE)
+        )
+        data = JSONStream(chunks)
+        if page is not None:
+            data = self.paginator.get_paginated_response(data).data
+
+        return StreamingHttpResponse(
+            renderer.iter_render(data, self.request.accepted_media_type),
+            content_type=renderer.media_type,
+        )
+
+
+class JokeViewSet(
+    ConditionalViewMixin,
+    SparseFieldsetViewMixin,
+    PrefetchPlanMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     Joke viewset with search, filtering, and random joke endpoints.
 
@@ -71,10 +298,50 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
 
     random:
     Return a random joke (useful for "Joke of the Day" features).
+
+    changes:
+    Return jokes changed after a sync token, plus deleted joke ids.
     """
 
     queryset = Joke.objects.all()
 
+    # Render list pages from values() rows instead of JokeListSerializer
+    use_fast_list_serializer = True
+
+    # Per-action budgets (jokes.throttling); other actions use the global ones.
+    # list is scoped 'search' only with ?q= (get_throttle_scope)
+    throttle_scope = {
+        'random': 'random',
+        'export': 'export',
+    }
+
+    # Joke data is not user-specific, so shared caches may serve it
+    cache_control = {
+        'list': {'public': True, 'max_age': 60},
+        'retrieve': {'public': True, 'max_age': 300},
+        'random': {'no_store': True},
+        'changes': {'no_store': True},
+    }
+
+    def get_throttle_scope(self):
+        """Lists with a full-text query are searches; plain browsing has no scope."""
+        if self.action == 'list':
+            return 'search' if self.request.query_params.get('q', '').strip() else None
+        return self.throttle_scope.get(self.action)
+
+    def get_etag(self):
+        """Validate list/detail against the catalog version (no query)."""
+        if self.action in ('list', 'retrieve'):
+            return make_etag('jokes', get_catalog_version(), self.request.accepted_media_type)
+        return None
+
+    def get_queryset(self):
+        """Prefetch relations the serializer renders (detail only; list plans its search)."""
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = self.plan_queryset(queryset)
+        return queryset
+
     def get_serializer_class(self):
         """Use compact serializer for list, full serializer for detail."""
         if self.action == 'list':
@@ -83,48 +350,8 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
 
     @extend_schema(
         parameters=[
-            OpenApiParameter(
-                name='q',
-                type=str,
-                description='Full-text search query (searches text, setup, punchline)',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='joke_format',
-                type=str,
-                description='Filter by format slug (e.g., one-liner, setup-punchline). Note: named joke_format to avoid conflict with DRF content negotiation.',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='age_rating',
-                type=str,
-                description='Filter by age rating slug (e.g., kid-safe, family-friendly)',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='tones',
-                type=str,
-                description='Filter by tone slugs, comma-separated (e.g., clean,dad-jokes)',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='context_tags',
-                type=str,
-                description='Filter by context tag slugs, comma-separated (e.g., wedding,icebreaker)',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='culture_tags',
-                type=str,
-                description='Filter by culture tag slugs, comma-separated (e.g., american,universal)',
-                required=False,
-            ),
-            OpenApiParameter(
-                name='language',
-                type=str,
-                description='Filter by language code (e.g., en)',
-                required=False,
-            ),
+            *JOKE_FILTER_PARAMETERS,
+            *SPARSE_FIELDSET_PARAMETERS,
         ],
         description='List jokes with optional full-text search and filtering.',
     )
@@ -140,6 +367,7 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
         - context_tags: Filter by context tag slugs (comma-separated)
         - culture_tags: Filter by culture tag slugs (comma-separated)
         - language: Filter by language code
+        - fields: Comma-separated fields to return (e.g., id,text)
 
         Examples:
         - /api/v1/jokes/?q=chicken
@@ -147,35 +375,12 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
         - /api/v1/jokes/?tones=clean,dad-jokes
         - /api/v1/jokes/?q=why&age_rating=kid-safe
         """
-        # Extract query parameters
-        query_text = request.query_params.get('q', '').strip()
-        format_slug = request.query_params.get('joke_format', '').strip()  # named joke_format to avoid DRF conflict
-        age_rating_slug = request.query_params.get('age_rating', '').strip()
-        tones_param = request.query_params.get('tones', '').strip()
-        context_tags_param = request.query_params.get('context_tags', '').strip()
-        culture_tags_param = request.query_params.get('culture_tags', '').strip()
-        language_code = request.query_params.get('language', '').strip()
-
-        # Build filters dict
-        filters = {}
-        if format_slug:
-            filters['format'] = format_slug
-        if age_rating_slug:
-            filters['age_rating'] = age_rating_slug
-        if tones_param:
-            filters['tones'] = [t.strip() for t in tones_param.split(',') if t.strip()]
-        if context_tags_param:
-            filters['context_tags'] = [t.strip() for t in context_tags_param.split(',') if t.strip()]
-        if culture_tags_param:
-            filters['culture_tags'] = [t.strip() for t in culture_tags_param.split(',') if t.strip()]
-        if language_code:
-            filters['language'] = language_code
+        queryset = self._search_queryset(request)
 
-        # Use JokeManager.search() for combined search and filtering
-        queryset = Joke.objects.search(
-            query_text=query_text if query_text else None,
-            filters=filters if filters else None,
-        )
+        if self.use_fast_list_serializer:
+            return self._fast_list(queryset)
+
+        queryset = self.plan_queryset(queryset)
 
         # Paginate results
         page = self.paginate_queryset(queryset)
@@ -186,7 +391,51 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def _search_queryset(self, request):
+        """Build the search/filter queryset from list query parameters."""
+        query_text, filters = parse_joke_search_params(request.query_params)
+
+        # Use JokeManager.search() for combined search and filtering
+        return Joke.objects.search(
+            query_text=query_text if query_text else None,
+            filters=filters if filters else None,
+        )
+
+    def _fast_list(self, queryset):
+        """Paginate values() rows and render them with JokeListFastSerializer."""
+        context = self.get_serializer_context()
+        rows = JokeListFastSerializer.get_queryset(queryset, context)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(JokeListFastSerializer(page, context=context).data)
+        return Response(JokeListFastSerializer(rows, context=context).data)
+
     @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
+        description='Return a single joke with full details.',
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return a single joke; supports ?fields= and ?expand=.
+
+        The full payload is served from the precomputed document store.
+        """
+        if self.has_sparse_fieldset():
+            return super().retrieve(request, *args, **kwargs)
+
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404('No Joke matches the given query.')
+
+        document = get_joke_documents([pk], request=request).get(pk)
+        if document is None:
+            raise Http404('No Joke matches the given query.')
+        return Response(document)
+
+    @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         description='Return a random joke with full details.',
         responses={200: JokeSerializer, 404: None},
     )
@@ -198,14 +447,113 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
         Useful for "Joke of the Day" or random joke button features.
         Returns 404 if no jokes exist in the database.
         """
-        joke = Joke.objects.order_by('?').first()
-        if joke is None:
+        if self.has_sparse_fieldset():
+            joke = self.plan_queryset(Joke.objects.order_by('?'), JokeSerializer).first()
+            if joke is None:
+                return Response(
+                    {'detail': 'No jokes found.'},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            serializer = JokeSerializer(joke, context=self.get_sparse_fieldset_context())
+            return Response(serializer.data)
+
+        pk = Joke.objects.order_by('?').values_list('pk', flat=True).first()
+        document = get_joke_documents([pk]).get(pk) if pk is not None else None
+        if document is None:
             return Response(
                 {'detail': 'No jokes found.'},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        serializer = JokeSerializer(joke)
-        return Response(serializer.data)
+        return Response(document)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='since',
+                description='Token from the previous sync ("next"); omit or 0 for a full sync',
+                required=False,
+                type=str,
+            ),
+        ],
+        description='Delta sync: jokes created or updated after a change token, plus ids of deleted jokes.',
+        responses={200: {'type': 'object', 'properties': {
+            'changes': {'type': 'array', 'items': {'type': 'object'}},
+            'deleted': {'type': 'array', 'items': {'type': 'integer'}},
+            'next': {'type': 'string'},
+            'has_more': {'type': 'boolean'},
+        }}},
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Return one page of the joke change feed after ?since=.
+
+        Clients store `next` and pass it back; while `has_more` is true
+        they fetch again right away. Changed jokes are full documents
+        from the precomputed store.
+        """
+        try:
+            since = int(request.query_params.get('since') or 0)
+        except ValueError:
+            since = -1
+        if since < 0:
+            return Response(
+                {'detail': 'since must be a token returned by this endpoint.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        upserted, deleted, next_token, has_more = get_joke_changes(since)
+        documents = get_joke_documents(upserted, request=request)
+
+        return Response({
+            'changes': [documents[pk] for pk in upserted if pk in documents],
+            # A joke deleted after its upsert entry was read has no document
+            'deleted': deleted + [pk for pk in upserted if pk not in documents],
+            'next': str(next_token),
+            'has_more': has_more,
+        })
+
+    @extend_schema(
+        parameters=JOKE_FILTER_PARAMETERS,
+        description='Stream the whole filtered catalog as NDJSON, one joke per line (lookups and tags as slugs). Accepts the list filters.',
+        responses={(200, 'application/x-ndjson'): {'type': 'string'}},
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[NDJSONRenderer],
+    )
+    def export(self, request):
+        """
+        Partner export: the filtered catalog in one streamed response.
+
+        Replaces scraping ?page=N (a COUNT, an OFFSET scan and a serializer
+        pass per page): rows come from one server-side cursor in id order,
+        tag slugs from in-memory lookup maps, so memory stays bounded.
+        """
+        queryset = self._search_queryset(request)
+        response = StreamingHttpResponse(
+            self._iter_export(queryset), content_type=NDJSONRenderer.media_type
+        )
+        response['Content-Disposition'] = 'attachment; filename="jokes.ndjson"'
+        return response
+
+    def _iter_export(self, queryset):
+        """Yield NDJSON lines per batch and log throughput when done."""
+        renderer = ORJSONRenderer()
+        exported = 0
+        started = time.monotonic()
+
+        for _, records in iter_joke_record_batches(queryset, batch_size=EXPORT_BATCH_SIZE):
+            yield b''.join(renderer.render(record) + b'\n' for record in records)
+            exported += len(records)
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            'Joke export for user %s: %d jokes in %.1fs (%.0f jokes/sec)',
+            self.request.user.pk, exported, elapsed, exported / elapsed if elapsed else 0,
+        )
 
     @extend_schema(
         description='Rate a joke with thumbs up (1) or thumbs down (-1). Updates existing rating if present.',
@@ -311,40 +659,158 @@ class JokeViewSet(viewsets.ReadOnlyModelViewSet):
 # Lookup Model Viewsets
 # =============================================================================
 
-class FormatViewSet(viewsets.ReadOnlyModelViewSet):
+class LookupViewSetMixin(ConditionalViewMixin):
+    """
+    Serve lookup list/retrieve from the process-local lookup registry.
+
+    Responses match the queryset-backed ones (same ordering and pagination)
+    but cost no database query once the worker has loaded the tables, and
+    are validated by the registry's ETag.
+    """
+
+    # Table name in jokes.lookups.LOOKUP_TABLES
+    lookup_table = None
+
+    throttle_scope = 'lookups'
+
+    cache_control = {
+        'list': {'public': True, 'max_age': 300},
+        'retrieve': {'public': True, 'max_age': 300},
+    }
+
+    def get_etag(self):
+        _, etag = get_lookup_registry().get_bootstrap()
+        return make_etag(self.lookup_table, etag, self.request.accepted_media_type)
+
+    def list(self, request, *args, **kwargs):
+        rows = get_lookup_registry().get_table(self.lookup_table)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        row = get_lookup_registry().get_row(self.lookup_table, pk)
+        if row is None:
+            raise Http404
+        return Response(row)
+
+
+class FormatViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for joke formats (one-liner, setup-punchline, etc.)."""
     queryset = Format.objects.all().order_by('name')
     serializer_class = FormatSerializer
+    lookup_table = 'formats'
 
 
-class AgeRatingViewSet(viewsets.ReadOnlyModelViewSet):
+class AgeRatingViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for age ratings (kid-safe, teen, adult, family-friendly)."""
     queryset = AgeRating.objects.all().order_by('min_age', 'name')
     serializer_class = AgeRatingSerializer
+    lookup_table = 'age_ratings'
 
 
-class ToneViewSet(viewsets.ReadOnlyModelViewSet):
+class ToneViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for humor tones (clean, dark, dad-jokes, puns, sarcasm)."""
     queryset = Tone.objects.all().order_by('name')
     serializer_class = ToneSerializer
+    lookup_table = 'tones'
 
 
-class ContextTagViewSet(viewsets.ReadOnlyModelViewSet):
+class ContextTagViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for context/situation tags (wedding, work, school, etc.)."""
     queryset = ContextTag.objects.all().order_by('name')
     serializer_class = ContextTagSerializer
+    lookup_table = 'context_tags'
 
 
-class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
+class LanguageViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for languages (ISO 639-1 codes)."""
     queryset = Language.objects.all().order_by('name')
     serializer_class = LanguageSerializer
+    lookup_table = 'languages'
 
 
-class CultureTagViewSet(viewsets.ReadOnlyModelViewSet):
+class CultureTagViewSet(LookupViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for cultural context tags (American, British, universal)."""
     queryset = CultureTag.objects.all().order_by('name')
     serializer_class = CultureTagSerializer
+    lookup_table = 'culture_tags'
+
+
+class BootstrapView(APIView):
+    """
+    All lookup tables in one response: GET /api/v1/bootstrap/
+
+    Served from the process-local lookup registry with an ETag over the
+    payload, so clients revalidating at startup get a 304 without any
+    database query.
+    """
+
+    permission_classes = [AllowAny]
+    throttle_scope = 'lookups'
+
+    @extend_schema(
+        description='All lookup tables (formats, age ratings, tones, context tags, languages, culture tags). Supports If-None-Match.',
+        responses={200: None, 304: None},
+    )
+    def get(self, request, *args, **kwargs):
+        tables, etag = get_lookup_registry().get_bootstrap()
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(tables)
+
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class CatalogSnapshotViewSet(ConditionalViewMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Offline catalog bundles: GET /api/v1/snapshots/
+
+    One entry per language and age rating, optionally filtered with
+    ?language=<code> and ?age_rating=<slug>. Clients download the bundle
+    file once, then sync with /jokes/changes/?since=<change_token>.
+    """
+
+    queryset = CatalogSnapshot.objects.select_related('language', 'age_rating')
+    serializer_class = CatalogSnapshotSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    cache_control = {
+        'list': {'public': True, 'max_age': 300},
+    }
+
+    def get_last_modified(self):
+        return CatalogSnapshot.objects.aggregate(built_at=Max('built_at'))['built_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        language_code = self.request.query_params.get('language', '').strip()
+        age_rating_slug = self.request.query_params.get('age_rating', '').strip()
+        if language_code:
+            queryset = queryset.filter(language__code=language_code)
+        if age_rating_slug:
+            queryset = queryset.filter(age_rating__slug=age_rating_slug)
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='language', description='Filter by language code', required=False, type=str),
+            OpenApiParameter(name='age_rating', description='Filter by age rating slug', required=False, type=str),
+        ],
+        description='List offline catalog bundles (gzipped SQLite with a prebuilt FTS5 index).',
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
 # =============================================================================
@@ -410,6 +876,95 @@ class UserPreferenceViewSet(viewsets.GenericViewSet):
         })
 
 
+class AccountView(APIView):
+    """
+    Delete the current account: DELETE /api/v1/account/
+
+    The account is deactivated and its refresh tokens blacklisted at once;
+    saved jokes, collections, ratings, daily jokes and preferences are
+    removed afterwards by the jokes.delete_account_data task in throttled
+    batches (share events are kept, anonymized).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        description='Delete the current account. Returns 202; data is removed in the background.',
+        responses={202: {'type': 'object', 'properties': {
+            'deletion_id': {'type': 'integer'},
+            'status': {'type': 'string'},
+        }}},
+    )
+    def delete(self, request, *args, **kwargs):
+        deletion = request_account_deletion(request.user)
+        response = Response(
+            {'deletion_id': deletion.pk, 'status': deletion.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
+        unset_jwt_cookies(response)
+        return response
+
+
+class DataExportViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Personal data exports for authenticated users.
+
+    Endpoints:
+    - POST /api/v1/data-exports/ - Request an export (built by a Celery worker)
+    - GET /api/v1/data-exports/ - List the user's exports
+    - GET /api/v1/data-exports/{id}/ - Export status and download_url
+    - GET /api/v1/data-exports/{id}/download/ - Download the zip (ranges supported)
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = DataExportSerializer
+
+    def get_queryset(self):
+        """Return exports belonging to the current user."""
+        return DataExport.objects.filter(user=self.request.user)
+
+    @extend_schema(
+        request=None,
+        description='Request a personal data export. An export already in progress is returned instead of starting another.',
+        responses={200: DataExportSerializer, 202: DataExportSerializer},
+    )
+    def create(self, request, *args, **kwargs):
+        """Queue an export, or return the one already pending/running."""
+        export, created = request_data_export(request.user)
+        if not created:
+            return Response(self.get_serializer(export).data)
+        return Response(self.get_serializer(export).data, status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(
+        description='Download a completed export as a zip of NDJSON files.',
+        responses={(200, 'application/zip'): {'type': 'string', 'format': 'binary'}, 404: None},
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Serve the zip of a completed, unexpired export."""
+        export = self.get_object()
+        if (
+            export.status != DataExport.COMPLETED
+            or export.expires_at <= timezone.now()
+            or not default_storage.exists(export.file_name)
+        ):
+            raise Http404('Export is not available.')
+
+        etag = '"export-%s-%s"' % (export.pk, int(export.finished_at.timestamp()))
+        response = sendfile_response(
+            default_storage, export.file_name, 'application/zip', request=request, etag=etag
+        )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-store'
+        response['Content-Disposition'] = f'attachment; filename="jokes-data-export-{export.pk}.zip"'
+        return response
+
+
 # =============================================================================
 # OAuth Authentication Views
 # =============================================================================
@@ -442,7 +997,12 @@ class GoogleLogin(SocialLoginView):
 # Collection and SavedJoke ViewSets
 # =============================================================================
 
-class CollectionViewSet(viewsets.ModelViewSet):
+class CollectionViewSet(
+    StreamingListMixin,
+    SparseFieldsetViewMixin,
+    PrefetchPlanMixin,
+    viewsets.ModelViewSet,
+):
     """
     Collection management for authenticated users.
 
@@ -482,6 +1042,7 @@ class CollectionViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
     @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         description='List jokes saved in this collection.',
         responses={200: SavedJokeSerializer(many=True)},
     )
@@ -489,20 +1050,20 @@ class CollectionViewSet(viewsets.ModelViewSet):
     def jokes(self, request, pk=None):
         """List jokes in this collection."""
         collection = self.get_object()
-        saved_jokes = SavedJoke.objects.filter(
-            collection=collection
-        ).select_related('joke', 'collection')
-
-        page = self.paginate_queryset(saved_jokes)
-        if page is not None:
-            serializer = SavedJokeSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        saved_jokes = self.plan_queryset(
+            SavedJoke.objects.filter(collection=collection),
+            SavedJokeSerializer,
+        )
 
-        serializer = SavedJokeSerializer(saved_jokes, many=True)
-        return Response(serializer.data)
+        return self.list_response(
+            saved_jokes, SavedJokeSerializer, self.get_sparse_fieldset_context()
+        )
 
 
 class SavedJokeViewSet(
+    StreamingListMixin,
+    SparseFieldsetViewMixin,
+    PrefetchPlanMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -515,16 +1076,23 @@ class SavedJokeViewSet(
     - GET /api/v1/saved-jokes/ - List user's saved jokes
     - POST /api/v1/saved-jokes/ - Save a joke
     - DELETE /api/v1/saved-jokes/{id}/ - Unsave a joke
-    - GET /api/v1/saved-jokes/search/?q=... - Search within saved jokes
+    - GET /api/v1/saved-jokes/search/?q=...&tones=... - Search within saved jokes
+    - POST /api/v1/saved-jokes/bulk-save/ - Save many jokes to a collection
+    - POST /api/v1/saved-jokes/bulk-move/ - Move saved jokes to another collection
+    - POST /api/v1/saved-jokes/bulk-remove/ - Unsave many jokes
+
+    Bulk operations validate with one query per input set and write with
+    one statement per kind of change, in a single transaction.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return saved jokes for the current user with related data."""
-        return SavedJoke.objects.filter(
-            user=self.request.user
-        ).select_related('joke', 'collection')
+        queryset = SavedJoke.objects.filter(user=self.request.user)
+        if self.action in ('list', 'search'):
+            queryset = self.plan_queryset(queryset)
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -536,49 +1104,161 @@ class SavedJokeViewSet(
         """Set the user when saving a joke."""
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
+        description='List the current user\'s saved jokes.',
+    )
+    def list(self, request, *args, **kwargs):
+        """List saved jokes; supports ?fields= and ?expand=."""
+        return self.list_response(
+            self.filter_queryset(self.get_queryset()),
+            SavedJokeSerializer,
+            self.get_serializer_context(),
+        )
+
     @extend_schema(
         parameters=[
-            OpenApiParameter(
-                name='q',
-                type=str,
-                description='Search query for joke text',
-                required=False,
-            ),
+            *JOKE_FILTER_PARAMETERS,
+            *SPARSE_FIELDSET_PARAMETERS,
         ],
-        description='Search within user\'s saved jokes by joke text.',
+        description='Search within user\'s saved jokes by joke text and/or the joke list filters.',
         responses={200: SavedJokeSerializer(many=True)},
     )
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search within saved jokes by joke text."""
-        query = request.query_params.get('q', '').strip()
+        """
+        Search within saved jokes by joke text and/or tag filters.
 
-        if not query:
+        Only the user's saved rows are searched (SavedJokeQuerySet.search),
+        never the whole catalog; results are ordered by relevance.
+        """
+        query_text, filters = parse_joke_search_params(request.query_params)
+
+        if not query_text and not filters:
             return Response(
-                {'detail': 'Search query "q" is required.'},
+                {'detail': 'Search query "q" or a filter is required.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get joke IDs matching the search
-        matching_joke_ids = Joke.objects.search(query_text=query).values_list('id', flat=True)
+        saved_jokes = self.get_queryset().search(query_text=query_text, filters=filters)
 
-        # Filter saved jokes to those matching
-        saved_jokes = self.get_queryset().filter(joke_id__in=matching_joke_ids)
+        return self.list_response(
+            saved_jokes, SavedJokeSerializer, self.get_sparse_fieldset_context()
+        )
 
-        page = self.paginate_queryset(saved_jokes)
-        if page is not None:
-            serializer = SavedJokeSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+    @extend_schema(
+        request=SavedJokeBulkSaveSerializer,
+        description='Save many jokes to one collection (null: no collection). Jokes already saved there are skipped.',
+        responses={201: {'type': 'object', 'properties': {
+            'saved': {'type': 'integer'},
+            'already_saved': {'type': 'integer'},
+        }}},
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-save')
+    def bulk_save(self, request):
+        """Save many jokes with one existence query and one INSERT."""
+        serializer = SavedJokeBulkSaveSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        joke_ids = serializer.validated_data['joke_ids']
+        collection = serializer.validated_data.get('collection')
+        note = serializer.validated_data['note']
+
+        with transaction.atomic():
+            # NULL collections never conflict in the unique index, so
+            # existing saves are filtered out here rather than by ON CONFLICT
+            existing = set(
+                SavedJoke.objects.filter(
+                    user=request.user, collection=collection, joke_id__in=joke_ids
+                ).values_list('joke_id', flat=True)
+            )
+            saved = SavedJoke.objects.insert_saves(
+                request.user,
+                [joke_id for joke_id in joke_ids if joke_id not in existing],
+                collection=collection,
+                note=note,
+            )
 
-        serializer = SavedJokeSerializer(saved_jokes, many=True)
-        return Response(serializer.data)
+        # Jokes a concurrent request saved first count as already saved
+        return Response(
+            {'saved': saved, 'already_saved': len(joke_ids) - saved},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        request=SavedJokeBulkMoveSerializer,
+        description='Move saved jokes to one collection (null: no collection). Jokes already in the target collection are merged into it.',
+        responses={200: {'type': 'object', 'properties': {
+            'moved': {'type': 'integer'},
+            'merged': {'type': 'integer'},
+        }}},
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-move')
+    def bulk_move(self, request):
+        """
+        Move saved jokes with one UPDATE.
+
+        A joke already in the target collection (or moved there twice from
+        different collections) keeps one row; the other rows are deleted
+        instead of violating the unique constraint.
+        """
+        serializer = SavedJokeBulkMoveSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        collection = serializer.validated_data.get('collection')
+
+        with transaction.atomic():
+            rows = list(
+                SavedJoke.objects.select_for_update().filter(
+                    user=request.user, pk__in=ids
+                ).order_by('pk').values_list('pk', 'joke_id', 'collection_id')
+            )
+            target_joke_ids = set(
+                SavedJoke.objects.filter(user=request.user, collection=collection).exclude(
+                    pk__in=ids
+                ).values_list('joke_id', flat=True)
+            )
+
+            collection_id = collection.pk if collection else None
+            move_ids, merge_ids = [], []
+            for pk, joke_id, current_collection_id in rows:
+                if joke_id in target_joke_ids:
+                    merge_ids.append(pk)
+                    continue
+                target_joke_ids.add(joke_id)
+                if current_collection_id != collection_id:
+                    move_ids.append(pk)
+
+            if merge_ids:
+                SavedJoke.objects.filter(pk__in=merge_ids).delete()
+            if move_ids:
+                SavedJoke.objects.filter(pk__in=move_ids).update(collection=collection)
+
+        return Response({'moved': len(move_ids), 'merged': len(merge_ids)})
+
+    @extend_schema(
+        request=SavedJokeBulkRemoveSerializer,
+        description='Unsave many saved jokes at once.',
+        responses={200: {'type': 'object', 'properties': {'removed': {'type': 'integer'}}}},
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-remove')
+    def bulk_remove(self, request):
+        """Unsave many saved jokes with one DELETE."""
+        serializer = SavedJokeBulkRemoveSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            removed, _ = SavedJoke.objects.filter(
+                user=request.user, pk__in=serializer.validated_data['ids']
+            ).delete()
+
+        return Response({'removed': removed})
 
 
 # =============================================================================
 # Daily Joke ViewSet
 # =============================================================================
 
-class DailyJokeViewSet(viewsets.GenericViewSet):
+class DailyJokeViewSet(SparseFieldsetViewMixin, PrefetchPlanMixin, viewsets.GenericViewSet):
     """
     ViewSet for daily joke functionality.
     All endpoints require authentication.
@@ -596,6 +1276,7 @@ class DailyJokeViewSet(viewsets.GenericViewSet):
         return DailyJoke.objects.filter(user=self.request.user)
 
     @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         description='Get today\'s personalized joke. Generates on-demand if not pre-generated.',
         responses={200: DailyJokeSerializer, 404: None},
     )
@@ -612,18 +1293,10 @@ class DailyJokeViewSet(viewsets.GenericViewSet):
         today = timezone.now().date()
 
         # Try to get pre-generated daily joke
-        daily = DailyJoke.objects.filter(
-            user=request.user,
-            date=today
-        ).select_related(
-            'joke',
-            'joke__format',
-            'joke__age_rating',
-            'joke__language'
-        ).prefetch_related(
-            'joke__tones',
-            'joke__context_tags'
-        ).first()
+        daily = DailyJoke.objects.filter(user=request.user, date=today)
+        if self.has_sparse_fieldset():
+            daily = self.plan_queryset(daily)
+        daily = daily.first()
 
         if not daily:
             # Fallback: generate on-demand
@@ -647,9 +1320,10 @@ class DailyJokeViewSet(viewsets.GenericViewSet):
             daily.delivered_at = timezone.now()
             daily.save(update_fields=['delivered_at'])
 
-        return Response(DailyJokeSerializer(daily).data)
+        return Response(self._serialize_daily_jokes([daily])[0])
 
     @extend_schema(
+        parameters=SPARSE_FIELDSET_PARAMETERS,
         description='Get user\'s daily joke history (last 30 days).',
         responses={200: DailyJokeSerializer(many=True)},
     )
@@ -659,24 +1333,40 @@ class DailyJokeViewSet(viewsets.GenericViewSet):
         Get user's daily joke history.
         Returns last 30 days of daily jokes.
         """
-        queryset = self.get_queryset().select_related(
-            'joke',
-            'joke__format',
-            'joke__age_rating',
-            'joke__language'
-        ).prefetch_related(
-            'joke__tones',
-            'joke__context_tags'
-        )[:30]
-
-        serializer = DailyJokeSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset()
+        if self.has_sparse_fieldset():
+            queryset = self.plan_queryset(queryset)
+        return Response(self._serialize_daily_jokes(queryset[:30]))
+
+    def _serialize_daily_jokes(self, daily_jokes):
+        """
+        Serialize daily jokes, embedding precomputed joke documents.
+
+        Requests with ?fields=/?expand= go through DailyJokeSerializer as-is.
+        """
+        if self.has_sparse_fieldset():
+            return DailyJokeSerializer(
+                daily_jokes, many=True, context=self.get_sparse_fieldset_context()
+            ).data
+
+        # Serialize with joke collapsed to its id, then splice in the document
+        data = DailyJokeSerializer(
+            daily_jokes, many=True, context={'fields': None, 'expand': set()}
+        ).data
+        documents = get_joke_documents([item['joke'] for item in data])
+        for item in data:
+            item['joke'] = documents.get(item['joke'])
+        return data
 
 
 # =============================================================================
 # Public Share Page View
 # =============================================================================
 
+# Browser/CDN freshness for share pages (revalidated via ETag afterwards)
+SHARE_PAGE_MAX_AGE = 300
+
+
 @require_GET
 def joke_share_page(request, pk):
     """
@@ -685,26 +1375,130 @@ def joke_share_page(request, pk):
     This page is designed for social media crawlers. It returns
     an HTML page with proper Open Graph and Twitter Card meta tags
     so the joke preview looks great when shared.
+
+    Rendered HTML is cached per joke and invalidated on joke change, so a
+    crawler burst costs one database read. Responses carry an ETag and
+    Last-Modified (joke.updated_at) and answer conditional requests with 304.
     """
-    joke = get_object_or_404(
-        Joke.objects.select_related('format', 'age_rating').prefetch_related('tones'),
-        pk=pk
+    html, etag, last_modified = get_share_page(request, pk)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
     )
+    if response is None:
+        response = HttpResponse(html)
 
-    # Build absolute URLs
-    share_image_url = ''
-    if joke.share_image:
-        share_image_url = request.build_absolute_uri(joke.share_image.url)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, public=True, max_age=SHARE_PAGE_MAX_AGE)
+    return response
 
-    canonical_url = request.build_absolute_uri()
 
-    # Get badge text from primary tone
-    tone = joke.tones.first()
-    badge_text = tone.name if tone else None
+@require_GET
+def joke_share_card(request, pk, size, fmt):
+    """
+    Share card image variant: /jokes/<pk>/card/<size>.<fmt>
+
+    Sizes: large (1200x630), medium (600x315), small (400x210), thumb (200x105).
+    Formats: png, webp. Variants are rendered from the card's SVG on first
+    request and stored; later hits are served from storage.
+
+    The ETag is the card's content key, so revalidation never touches storage.
+    Requests carrying ?v=<content key> get a year-long immutable response.
+    """
+    if size not in CARD_SIZES or fmt not in CARD_FORMATS:
+        raise Http404('Unknown card size or format.')
+
+    joke = get_object_or_404(Joke.objects.only('text', 'share_image'), pk=pk)
+    key = ensure_share_card(joke)
+    etag = f'"{key}-{size}.{fmt}"'
+
+    if request.GET.get('v') == key:
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'public, max-age=3600'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        name = get_or_create_share_card_variant(joke, size, fmt)
+        response = sendfile_response(
+            get_share_card_storage(), name, CARD_FORMATS[fmt]
+        )
+
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@require_GET
+def share_image_file(request, filename):
+    """
+    Serve a stored share card file: /media/share-cards/<filename>
+
+    Only card files (content-addressed or legacy) are served. Content-
+    addressed names never change content, so they carry a year-long
+    immutable Cache-Control. With SENDFILE_MODE set, the byte transfer is
+    handed to the front proxy via X-Accel-Redirect / X-Sendfile.
+    """
+    content_addressed = CARD_FILENAME_RE.match(filename)
+    if not content_addressed and not LEGACY_CARD_FILENAME_RE.match(filename):
+        raise Http404('Unknown share image.')
+
+    storage = get_share_card_storage()
+    name = f'{SHARE_CARD_DIR}/{filename}'
+
+    if content_addressed:
+        etag = '"%s"' % filename.rsplit('.', 1)[0]
+        cache_control = 'public, max-age=31536000, immutable'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Cache-Control'] = cache_control
+            return response
+    else:
+        etag = None
+        cache_control = 'public, max-age=3600'
+
+    if not storage.exists(name):
+        raise Http404('Unknown share image.')
+
+    content_type = CARD_FORMATS[filename.rsplit('.', 1)[1]]
+    response = sendfile_response(storage, name, content_type)
+    if etag:
+        response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
 
-    return render(request, 'jokes/share.html', {
-        'joke': joke,
-        'share_image_url': share_image_url,
-        'canonical_url': canonical_url,
-        'badge_text': badge_text,
-    })
+@require_GET
+def catalog_snapshot_file(request, filename):
+    """
+    Serve an offline catalog bundle: /media/catalog-snapshots/<filename>
+
+    Names are content-addressed, so the ETag is the hash in the name and
+    the file is cached as immutable. Range/If-Range requests let the app
+    resume interrupted downloads; superseded files stay available (with
+    the same ETag) until their grace period ends.
+    """
+    if not SNAPSHOT_FILENAME_RE.match(filename):
+        raise Http404('Unknown catalog snapshot.')
+
+    name = f'{SNAPSHOT_DIR}/{filename}'
+    etag = '"%s"' % filename.split('.', 1)[0].rsplit('-', 1)[1]
+    cache_control = 'public, max-age=31536000, immutable'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    storage = default_storage
+    if not storage.exists(name):
+        raise Http404('Unknown catalog snapshot.')
+
+    response = sendfile_response(storage, name, 'application/gzip', request=request, etag=etag)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response